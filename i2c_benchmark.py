@@ -0,0 +1,318 @@
+#############################################################################
+# zlib License
+#
+# (C) 2023 Cristóvão Beirão da Cruz e Silva <cbeiraod@cern.ch>
+#
+# This software is provided 'as-is', without any express or implied
+# warranty.  In no event will the authors be held liable for any damages
+# arising from the use of this software.
+#
+# Permission is granted to anyone to use this software for any purpose,
+# including commercial applications, and to alter it and redistribute it
+# freely, subject to the following restrictions:
+#
+# 1. The origin of this software must not be misrepresented; you must not
+#    claim that you wrote the original software. If you use this software
+#    in a product, an acknowledgment in the product documentation would be
+#    appreciated but is not required.
+# 2. Altered source versions must be plainly marked as such, and must not be
+#    misrepresented as being the original software.
+# 3. This notice may not be removed or altered from any source distribution.
+#############################################################################
+
+import logging
+import json
+import time
+import datetime
+import platform
+import subprocess
+import tracemalloc
+
+from pathlib import Path
+
+import i2c_gui
+import i2c_gui.chips
+from i2c_gui.emulator_helper import Emulator_Helper
+
+chip_address = 0x72
+ws_address = 0x73
+
+#  Each benchmark is a (setup, run) pair: setup builds what the benchmark needs and returns the arguments of run (the connection
+# first), only run is measured.
+# Everything runs on the "Emulator" connection type, so the transaction counts and bytes are the same on any machine
+
+def new_connection(args):
+    helper = i2c_gui.ScriptHelper(logging.getLogger("Benchmark_Logger"), headless=True)
+    conn = i2c_gui.Connection_Controller(helper, successive_i2c_delay_us=args.delay_us)
+    conn.connection_type = "Emulator"
+    conn.handle.profile = args.profile
+    conn.handle.realtime = args.realtime
+    conn.handle.etroc2_address = hex(chip_address)
+    conn.handle.ws_address = hex(ws_address)
+    conn.connect()
+    return helper, conn
+
+def new_etroc2(args):
+    helper, conn = new_connection(args)
+    chip = i2c_gui.chips.ETROC2_Chip(parent=helper, i2c_controller=conn)
+    chip.config_i2c_address(chip_address)
+    chip.config_waveform_sampler_i2c_address(ws_address)
+    return conn, chip
+
+def setup_construction(args):
+    helper, conn = new_connection(args)
+    return conn, helper
+
+def construct_etroc2(conn, helper):
+    i2c_gui.chips.ETROC2_Chip(parent=helper, i2c_controller=conn)
+
+def construct_etroc1(conn, helper):
+    i2c_gui.chips.ETROC1_Chip(parent=helper, i2c_controller=conn)
+
+def construct_ad5593r(conn, helper):
+    i2c_gui.chips.AD5593R_Chip(parent=helper, i2c_controller=conn)
+
+def setup_etroc2(args):
+    return new_etroc2(args)
+
+def setup_etroc2_read(args):
+    conn, chip = new_etroc2(args)
+    chip.read_all()
+    return conn, chip
+
+def etroc2_read_all(conn, chip):
+    chip.read_all()
+
+#  On a chip which was not read yet all the registers are modified, so the whole chip is written (and read back)
+def etroc2_write_all(conn, chip):
+    chip.write_all()
+
+#  A sweep over all the decoded values of the peripheral config block, setting each to a new value and reading it back
+def decoded_values(conn, chip):
+    for name in chip._register_decoding["ETROC2"]["Register Blocks"]["Peripheral Config"]:
+        variable = chip.get_decoded_display_var("ETROC2", "Peripheral Config", name)
+        variable.set(hex(int(variable.get(), 0) ^ 0x1))
+        variable.get()
+
+def ws_read_memory(conn, chip):
+    chip._ws_helper.read_memory()
+
+def pixel_matrix_config(conn, chip):
+    import numpy
+
+    thresholds = numpy.arange(256).reshape(16, 16) % 0x3ff
+    chip.set_pixel_matrix({"DAC": thresholds, "TH_offset": 0x0a, "QSel": 0x1})
+
+#  Same sequence as the auto-calibration of the notebooks (broadcast configuration, reset and start of the calibration,
+# then polling ScanDone and reading BL/NW pixel by pixel), restricted to the first calibration_pixels pixels
+def auto_calibration(conn, chip, pixels):
+    column_indexer, _, _ = chip.get_indexer("column")
+    row_indexer, _, _ = chip.get_indexer("row")
+    broadcast_indexer, _, _ = chip.get_indexer("broadcast")
+
+    column_indexer.set(0)
+    row_indexer.set(0)
+    chip.read_all_block("ETROC2", "Pixel Config")
+
+    for name, value in [("CLKEn_THCal", "1"), ("BufEn_THCal", "1"), ("Bypass_THCal", "0"), ("TH_offset", hex(0x0a))]:
+        chip.get_decoded_indexed_var("ETROC2", "Pixel Config", name).set(value)
+    broadcast_indexer.set(True)
+    chip.write_all_block("ETROC2", "Pixel Config")
+
+    for name, values in [("RSTn_THCal", ["0", "1"]), ("ScanStart_THCal", ["1", "0"])]:
+        for value in values:
+            chip.get_decoded_indexed_var("ETROC2", "Pixel Config", name).set(value)
+            broadcast_indexer.set(True)
+            chip.write_decoded_value("ETROC2", "Pixel Config", name)
+
+    scan_done = chip.get_decoded_indexed_var("ETROC2", "Pixel Status", "ScanDone")
+    baseline = chip.get_decoded_indexed_var("ETROC2", "Pixel Status", "BL")
+    noise_width = chip.get_decoded_indexed_var("ETROC2", "Pixel Status", "NW")
+    for pixel in range(pixels):
+        row_indexer.set(pixel // 16)
+        column_indexer.set(pixel % 16)
+        chip.read_all_block("ETROC2", "Pixel Status")
+        if scan_done.get() != "1":
+            raise RuntimeError("The calibration of pixel {} was not done".format(pixel))
+        int(baseline.get(), 0)
+        int(noise_width.get(), 0)
+
+def get_benchmarks(args):
+    return {
+        "construct_etroc2": (setup_construction, construct_etroc2),
+        "construct_etroc1": (setup_construction, construct_etroc1),
+        "construct_ad5593r": (setup_construction, construct_ad5593r),
+        "etroc2_read_all": (setup_etroc2, etroc2_read_all),
+        "etroc2_write_all": (setup_etroc2, etroc2_write_all),
+        "decoded_values": (setup_etroc2_read, decoded_values),
+        "ws_read_memory": (setup_etroc2_read, ws_read_memory),
+        "pixel_matrix_config": (setup_etroc2_read, pixel_matrix_config),
+        "auto_calibration": (setup_etroc2, lambda conn, chip: auto_calibration(conn, chip, args.calibration_pixels)),
+    }
+
+#  Runs a benchmark repeat times for the timing and once more under tracemalloc for the peak memory (tracing slows
+# the python code down, so it is kept out of the timed runs). The I2C statistics are those of a single run
+def run_benchmark(args, setup, function):
+    wall_times = []
+    for _ in range(args.repeat):
+        setup_args = setup(args)
+        start = time.perf_counter()
+        function(*setup_args)
+        wall_times += [time.perf_counter() - start]
+
+    setup_args = setup(args)
+    conn = setup_args[0]
+    conn.handle.reset_statistics()
+    tracemalloc.start()
+    function(*setup_args)
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    result = {
+        "wall_time_s": min(wall_times),
+        "wall_time_mean_s": sum(wall_times)/len(wall_times),
+        "repeat": args.repeat,
+        "peak_memory_bytes": peak_memory,
+    }
+    result.update(conn.handle.statistics)
+    return result
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=Path(__file__).parent, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results: dict, reference_file: Path):
+    with open(reference_file) as file_handle:
+        reference = json.load(file_handle)
+
+    print("Comparison with {} (commit {}):".format(reference_file, reference.get("commit")))
+    for name, result in results["benchmarks"].items():
+        if name not in reference["benchmarks"]:
+            continue
+        old = reference["benchmarks"][name]
+        print("  {:<22} wall time x{:.2f}, transactions {} -> {}, bytes {} -> {}".format(
+            name,
+            result["wall_time_s"]/old["wall_time_s"] if old["wall_time_s"] > 0 else float('nan'),
+            old["transactions"],
+            result["transactions"],
+            old["bytes_read"] + old["bytes_written"],
+            result["bytes_read"] + result["bytes_written"],
+        ))
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+                    prog='I2C GUI Benchmark',
+                    description='Benchmark the chip construction, the bulk I2C accesses and the scan primitives against an emulated ETROC2.\nThe results are saved as JSON so they can be compared across commits',
+                    )
+
+    parser.add_argument(
+        '-o',
+        '--output',
+        type = Path,
+        help = 'The JSON file where to store the results. Default: benchmark.json',
+        dest = 'output',
+        default = Path('benchmark.json'),
+    )
+    parser.add_argument(
+        '-c',
+        '--compare',
+        type = Path,
+        help = 'A JSON file with previous results to compare against',
+        dest = 'compare',
+    )
+    parser.add_argument(
+        '-b',
+        '--benchmark',
+        type = str,
+        action = 'append',
+        help = 'Only run the given benchmark, can be repeated. Default: all',
+        dest = 'benchmarks',
+    )
+    parser.add_argument(
+        '-r',
+        '--repeat',
+        type = int,
+        help = 'The number of timed runs of each benchmark. Default: 3',
+        dest = 'repeat',
+        default = 3,
+    )
+    parser.add_argument(
+        '-p',
+        '--profile',
+        type = str,
+        help = 'The latency profile of the emulated I2C interface. Default: Ideal',
+        choices = list(Emulator_Helper.latency_profiles.keys()),
+        dest = 'profile',
+        default = "Ideal",
+    )
+    parser.add_argument(
+        '--realtime',
+        action = 'store_true',
+        help = 'Sleep for the time modelled by the latency profile, by default it is only reported as emulated_time_s',
+        dest = 'realtime',
+    )
+    parser.add_argument(
+        '--delay-us',
+        type = int,
+        help = 'The minimum gap between successive I2C commands in microseconds. Default: 0',
+        dest = 'delay_us',
+        default = 0,
+    )
+    parser.add_argument(
+        '--calibration-pixels',
+        type = int,
+        help = 'The number of pixels read back by the auto-calibration benchmark. Default: 16',
+        dest = 'calibration_pixels',
+        default = 16,
+    )
+
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s:%(name)s:%(message)s')
+
+    benchmarks = get_benchmarks(args)
+    names = list(benchmarks.keys()) if args.benchmarks is None else args.benchmarks
+    for name in names:
+        if name not in benchmarks:
+            parser.error("Unknown benchmark {}, choose from: {}".format(name, ", ".join(benchmarks.keys())))
+
+    results = {
+        "version": i2c_gui.__version__,
+        "commit": git_commit(),
+        "date": datetime.datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.platform(),
+        "parameters": {
+            "repeat": args.repeat,
+            "profile": args.profile,
+            "realtime": args.realtime,
+            "delay_us": args.delay_us,
+            "calibration_pixels": args.calibration_pixels,
+        },
+        "benchmarks": {},
+    }
+
+    for name in names:
+        result = run_benchmark(args, *benchmarks[name])
+        results["benchmarks"][name] = result
+        print("{:<22} {:9.4f} s  {:6d} transactions  {:7d} bytes  {:9.3f} s emulated  {:6.1f} MiB peak".format(
+            name,
+            result["wall_time_s"],
+            result["transactions"],
+            result["bytes_read"] + result["bytes_written"],
+            result["emulated_time_s"],
+            result["peak_memory_bytes"]/2**20,
+        ))
+
+    with open(args.output, "w") as file_handle:
+        json.dump(results, file_handle, indent=2)
+
+    if args.compare is not None:
+        compare(results, args.compare)
+
+if __name__ == "__main__":
+    main()
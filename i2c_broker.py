@@ -0,0 +1,123 @@
+#############################################################################
+# zlib License
+#
+# (C) 2023 Cristóvão Beirão da Cruz e Silva <cbeiraod@cern.ch>
+#
+# This software is provided 'as-is', without any express or implied
+# warranty.  In no event will the authors be held liable for any damages
+# arising from the use of this software.
+#
+# Permission is granted to anyone to use this software for any purpose,
+# including commercial applications, and to alter it and redistribute it
+# freely, subject to the following restrictions:
+#
+# 1. The origin of this software must not be misrepresented; you must not
+#    claim that you wrote the original software. If you use this software
+#    in a product, an acknowledgment in the product documentation would be
+#    appreciated but is not required.
+# 2. Altered source versions must be plainly marked as such, and must not be
+#    misrepresented as being the original software.
+# 3. This notice may not be removed or altered from any source distribution.
+#############################################################################
+
+import logging
+import signal
+
+import i2c_gui
+
+#  Runs an I2C broker, which owns the connection to the I2C adapter and shares it with the scripts and notebooks
+# which connect to it with the "Broker" connection type (see i2c_gui.I2C_Broker)
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+                    prog='I2C Broker',
+                    description='Share a single I2C adapter between several scripts and notebooks.\nClients connect with the "Broker" connection type of the Connection_Controller, requests with higher priority (e.g. configuration from a notebook) are served before lower priority ones (e.g. periodic monitoring)',
+                    )
+
+    parser.add_argument(
+        '-s',
+        '--socket',
+        type = str,
+        help = 'The unix socket the broker listens on. Default: {}'.format(i2c_gui.i2c_broker_protocol.default_broker_socket),
+        dest = 'socket',
+        default = i2c_gui.i2c_broker_protocol.default_broker_socket,
+    )
+    parser.add_argument(
+        '-t',
+        '--connection-type',
+        type = str,
+        help = 'The type of I2C connection owned by the broker, the Emulator emulates an ETROC2 at address 0x72. Default: USB-ISS',
+        choices = ["USB-ISS", "FPGA-Eth", "Emulator"],
+        dest = 'connection_type',
+        default = "USB-ISS",
+    )
+    parser.add_argument(
+        '-p',
+        '--port',
+        type = str,
+        help = 'The USB-ISS port or the FPGA port number',
+        dest = 'port',
+    )
+    parser.add_argument(
+        '--hostname',
+        type = str,
+        help = 'The FPGA hostname. Default: 192.168.2.3',
+        dest = 'hostname',
+        default = '192.168.2.3',
+    )
+    parser.add_argument(
+        '--clock',
+        type = int,
+        help = 'The USB-ISS I2C clock in kHz. Default: 100',
+        dest = 'clock',
+        default = 100,
+    )
+    parser.add_argument(
+        '--delay-us',
+        type = int,
+        help = 'The minimum gap between successive I2C commands in microseconds. Default: 10000',
+        dest = 'delay_us',
+        default = 10000,
+    )
+    parser.add_argument(
+        '--emulate',
+        action = 'store_true',
+        help = 'Serve an emulated ETROC2 at address 0x72 instead of opening the adapter, for testing the clients (same as --connection-type Emulator)',
+        dest = 'emulate',
+    )
+
+    args = parser.parse_args()
+
+    if args.emulate:
+        args.connection_type = "Emulator"
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s:%(name)s:%(message)s')
+    logger = logging.getLogger("Broker_Logger")
+
+    script_helper = i2c_gui.ScriptHelper(logger, headless=True)
+    conn = i2c_gui.Connection_Controller(script_helper, successive_i2c_delay_us=args.delay_us)
+    conn.connection_type = args.connection_type
+    if args.connection_type == "USB-ISS":
+        if args.port is not None:
+            conn.handle.port = args.port
+        conn.handle.clk = args.clock
+    elif args.connection_type == "FPGA-Eth":
+        conn.handle.hostname = args.hostname
+        if args.port is not None:
+            conn.handle.port = int(args.port)
+
+    conn.connect()
+    if not conn.is_connected:
+        logger.error("Unable to open the I2C connection, the broker is not started")
+        return
+
+    broker = i2c_gui.I2C_Broker(conn, args.socket, logger)
+    signal.signal(signal.SIGTERM, lambda sig, frame: broker.stop())
+    try:
+        broker.serve_forever()
+    finally:
+        conn.disconnect()
+
+if __name__ == "__main__":
+    main()
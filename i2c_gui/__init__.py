@@ -28,12 +28,32 @@ __swap_endian__ = True  # Whether to swap register address bytes to correct for
 __no_connect__ = False  # Set to true if the connection to I2C is to be emulated
 __no_connect_type__ = "check" # Set the type of no connect to implement. For most uses "check" is enough, but for readback tests the "echo" option is preferred
 
-from .etroc1_gui import ETROC1_GUI
-from .etroc2_gui import ETROC2_GUI
-from .ad5593r_gui import AD5593R_GUI
-from .multi_gui import Multi_GUI
+import logging
+
+#  The GUIs need tkinter and pillow, without them only the headless mode (ScriptHelper(headless=True)) is available
+# and the GUI classes are not exported. Any other import error is a genuine error and is raised
+__gui_names__ = []
+try:
+    from .etroc1_gui import ETROC1_GUI
+    from .etroc2_gui import ETROC2_GUI
+    from .ad5593r_gui import AD5593R_GUI
+    from .multi_gui import Multi_GUI
+    __gui_names__ = [
+        "ETROC1_GUI",
+        "ETROC2_GUI",
+        "AD5593R_GUI",
+        "Multi_GUI",
+    ]
+except ModuleNotFoundError as error:
+    if error.name is None or error.name.split(".")[0] not in ["tkinter", "_tkinter", "PIL"]:
+        raise
+    logging.getLogger(__name__).info("The GUIs are not available because the module {} is missing, only the headless mode can be used".format(error.name))
 from .script_helper import ScriptHelper
 from .connection_controller import Connection_Controller
+from .i2c_transaction_batch import I2C_Transaction_Batch
+from .multi_bus_executor import Multi_Bus_Executor
+from .i2c_broker import I2C_Broker
+from .i2c_broker_protocol import Broker_Priority
 
 from .functions import validate_8bit_register
 from .functions import validate_variable_bit_register
@@ -66,13 +86,13 @@ def unset_swap_endian():
     global __swap_endian__
     __swap_endian__ = False
 
-__all__ = [
-    "ETROC1_GUI",
-    "ETROC2_GUI",
-    "AD5593R_GUI",
-    "Multi_GUI",
+__all__ = __gui_names__ + [
     "ScriptHelper",
     "Connection_Controller",
+    "I2C_Transaction_Batch",
+    "Multi_Bus_Executor",
+    "I2C_Broker",
+    "Broker_Priority",
     "validate_8bit_register",
     "validate_variable_bit_register",
     "validate_i2c_address",
@@ -199,7 +199,7 @@ class AD5593R_GUI(Base_GUI):
     def write_all(self):
         if self._valid_i2c_address:
             self.send_message("Writing full AD5593R chip")
-            if not self._chip.write_all(self._chip.enable_readback):
+            if not self._chip.write_all(self._chip.enable_readback, only_dirty=False):
                 self.send_message("Failed writing the full chip, one or more address spaces were not written to.", "Error")
         else:
             self.send_message("Unable to write full AD5593R chip", "Error")
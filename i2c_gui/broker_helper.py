@@ -0,0 +1,184 @@
+#############################################################################
+# zlib License
+#
+# (C) 2023 Cristóvão Beirão da Cruz e Silva <cbeiraod@cern.ch>
+#
+# This software is provided 'as-is', without any express or implied
+# warranty.  In no event will the authors be held liable for any damages
+# arising from the use of this software.
+#
+# Permission is granted to anyone to use this software for any purpose,
+# including commercial applications, and to alter it and redistribute it
+# freely, subject to the following restrictions:
+#
+# 1. The origin of this software must not be misrepresented; you must not
+#    claim that you wrote the original software. If you use this software
+#    in a product, an acknowledgment in the product documentation would be
+#    appreciated but is not required.
+# 2. Altered source versions must be plainly marked as such, and must not be
+#    misrepresented as being the original software.
+# 3. This notice may not be removed or altered from any source distribution.
+#############################################################################
+
+from __future__ import annotations
+
+from .i2c_connection_helper import I2C_Connection_Helper
+from .i2c_transaction_batch import I2C_Transaction
+from .i2c_broker_protocol import Broker_Message
+from .i2c_broker_protocol import Broker_Priority
+from .i2c_broker_protocol import default_broker_socket
+from .i2c_broker_protocol import send_frame
+from .i2c_broker_protocol import recv_frame
+from .i2c_broker_protocol import encode_transactions
+from .i2c_broker_protocol import encode_direct_commands
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from .base_gui import Base_GUI
+
+try:
+    import tkinter as tk
+    import tkinter.ttk as ttk  # For themed widgets (gives a more native visual to the elements)
+except ImportError:
+    tk = None
+    ttk = None
+import logging
+import threading
+
+import socket
+
+#  Client of an I2C_Broker: the I2C accesses are forwarded to the broker, which owns the actual connection.
+# A whole batch is sent as a single request, so executing transactions through batches amortizes the round trip
+# to the broker. The broker applies the endianness swap and the pacing of its own connection, so neither is done here
+class Broker_Helper(I2C_Connection_Helper):
+    native_batch = True
+    def __init__(self, parent: Base_GUI, max_seq_byte: int = None, swap_endian: bool = False):
+        super().__init__(parent, max_seq_byte, swap_endian)
+
+        self._socket = None
+        self._request_id = 0
+        self._request_lock = threading.Lock()
+
+        self._socket_path_var = self._build_variable("String", value=default_broker_socket)
+        self._priority_var = self._build_variable("String", value=Broker_Priority.NORMAL.name)
+
+    @property
+    def socket_path(self):
+        return self._socket_path_var.get()
+
+    @socket_path.setter
+    def socket_path(self, value: str):
+        self._socket_path_var.set(value)
+
+    @property
+    def priority(self):
+        return Broker_Priority[self._priority_var.get()]
+
+    #  Accepts a Broker_Priority, its value or its name, can be changed while connected
+    @priority.setter
+    def priority(self, value):
+        if isinstance(value, str):
+            value = Broker_Priority[value.upper()]
+        self._priority_var.set(Broker_Priority(value).name)
+
+    def _request(self, message: Broker_Message, payload: bytes = b''):
+        if self._socket is None:
+            raise RuntimeError("The connection to the I2C broker is not open")
+
+        with self._request_lock:
+            self._request_id = (self._request_id + 1) & 0xffff
+            expected_id = self._request_id
+            send_frame(self._socket, message, expected_id, payload, self.priority)
+            reply_message, _, request_id, reply = recv_frame(self._socket)
+
+        if request_id != expected_id:
+            raise RuntimeError("The I2C broker replied to request {} while waiting for request {}".format(request_id, expected_id))
+        if reply_message == Broker_Message.ERROR:
+            raise RuntimeError("I2C broker: {}".format(reply.decode('utf-8')))
+        return reply
+
+    def _check_i2c_device(self, address: int):
+        return self._request(Broker_Message.CHECK, bytes([address]))[0] == 1
+
+    def _write_i2c_device_memory(self, address: int, memory_address: int, data: list[int], register_bits: int = 16, write_type: str = 'Normal'):
+        self._execute_i2c_batch([I2C_Transaction('write', address, memory_address, len(data), list(data), register_bits, 8, write_type)])
+
+    def _read_i2c_device_memory(self, address: int, memory_address: int, byte_count: int, register_bits: int = 16, read_type: str = 'Normal') -> list[int]:
+        transaction = I2C_Transaction('read', address, memory_address, byte_count, None, register_bits, 8, read_type)
+        self._execute_i2c_batch([transaction])
+        return transaction.result()
+
+    def _direct_i2c(self, commands: list[int]) -> list[int]:
+        return list(self._request(Broker_Message.DIRECT, encode_direct_commands(commands)))
+
+    def _execute_i2c_batch(self, transactions: list[I2C_Transaction]):
+        reply = self._request(Broker_Message.BATCH, encode_transactions(transactions))
+
+        offset = 0
+        for transaction in transactions:
+            if transaction.operation == 'read':
+                transaction.set_result(list(reply[offset:offset + transaction.byte_count]))
+                offset += transaction.byte_count
+            else:
+                transaction.set_result()
+
+    def display_in_frame(self, frame: ttk.Frame):
+        if hasattr(self, '_frame') and self._frame is not None:
+            tmp = self._frame.children.copy()
+            for widget in tmp:
+                tmp[widget].destroy()
+
+        self._frame = frame
+
+        self._socket_label = ttk.Label(self._frame, text="Socket:")
+        self._socket_label.grid(column=0, row=0, sticky=(tk.W, tk.E))
+
+        self._socket_entry = ttk.Entry(self._frame, textvariable=self._socket_path_var, width=25)
+        self._socket_entry.grid(column=1, row=0, sticky=(tk.W, tk.E), padx=(0,30))
+
+        self._frame.columnconfigure(2, weight=1)
+
+        priorities = [priority.name for priority in Broker_Priority]
+
+        self._priority_label = ttk.Label(self._frame, text="Priority:")
+        self._priority_label.grid(column=3, row=0, sticky=(tk.W, tk.E))
+
+        self._priority_option = ttk.OptionMenu(self._frame, self._priority_var, self._priority_var.get(), *priorities)
+        self._priority_option.grid(column=4, row=0, sticky=(tk.W, tk.E), padx=(0,30))
+
+        self._frame.columnconfigure(5, weight=1)
+
+    def validate_connection_params(self):
+        if not hasattr(socket, "AF_UNIX"):
+            self.send_message("The I2C broker needs unix sockets, which are not available on this platform", "Error")
+            return False
+
+        if self.socket_path == "":
+            self.send_message("Please enter the path to the I2C broker socket", "Error")
+            return False
+
+        return True
+
+    def connect(self, no_connect: bool = False):
+        self._no_connect = no_connect
+        if not no_connect:  # For emulated connection
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                self._socket.connect(self.socket_path)
+            except socket.error:
+                self._socket.close()
+                self._socket = None
+                self.send_message("Unable to connect to the I2C broker on {}".format(self.socket_path))
+                return False
+
+        if hasattr(self, "_socket_entry"):
+            self._socket_entry.config(state="disabled")
+        self.send_message("Connected to the I2C broker on {}".format(self.socket_path))
+        return True
+
+    def disconnect(self):
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+        if hasattr(self, "_socket_entry"):
+            self._socket_entry.config(state="normal")
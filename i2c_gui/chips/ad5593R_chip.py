@@ -32,8 +32,12 @@ from .address_space_controller import Address_Space_Controller
 from ..i2c_messages import I2CMessages
 from math import ceil
 
-import tkinter as tk
-import tkinter.ttk as ttk  # For themed widgets (gives a more native visual to the elements)
+try:
+    import tkinter as tk
+    import tkinter.ttk as ttk  # For themed widgets (gives a more native visual to the elements)
+except ImportError:
+    tk = None
+    ttk = None
 import logging
 
 ad5593r_version = "0.0.1"
@@ -372,10 +376,44 @@ class AD5593R_Chip(Base_Chip):
         self.write_register("AD5593R", "Config_RD", "ADC_SEQ")
 
         # Select the ADC for reading (Step 3 from the "ADC Operation" in the manual)
-        self._i2c_controller.direct_i2c([I2CMessages.START, I2CMessages.WRITE2, self._i2c_address << 1, 0b01000000, I2CMessages.STOP])
+        self._i2c_controller.direct_i2c(self._adc_select_commands())
 
         # Actually read the ADC conversion data (Step 4 from the "ADC Operation" in the manual)
         data = []
+        for commands in self._adc_read_commands(num_measurements):
+            data += self._i2c_controller.direct_i2c(commands)
+
+        # Stop ADC conversion (explained at the end of the "ADC Operation" in the manual)
+        adc_sequence_handle.set(0x0000)
+        self.write_register("AD5593R", "Config_RD", "ADC_SEQ")
+
+        return self._decode_adc_results(data, num_measurements)
+
+    async def read_adc_results_async(self, adc_sequence: int, num_measurements: int):
+        if num_measurements == 0:
+            return []
+
+        adc_sequence_handle = self.get_display_var("AD5593R", "Config_RD", "ADC_SEQ")
+
+        adc_sequence_handle.set(adc_sequence)
+        await self.write_register_async("AD5593R", "Config_RD", "ADC_SEQ")
+
+        await self._i2c_controller.direct_i2c_async(self._adc_select_commands())
+
+        data = []
+        for commands in self._adc_read_commands(num_measurements):
+            data += await self._i2c_controller.direct_i2c_async(commands)
+
+        adc_sequence_handle.set(0x0000)
+        await self.write_register_async("AD5593R", "Config_RD", "ADC_SEQ")
+
+        return self._decode_adc_results(data, num_measurements)
+
+    def _adc_select_commands(self):
+        return [I2CMessages.START, I2CMessages.WRITE2, self._i2c_address << 1, 0b01000000, I2CMessages.STOP]
+
+    def _adc_read_commands(self, num_measurements: int):
+        command_list = []
         num_repeats = ceil(num_measurements/8)  #  each measurement is 2 bytes and we want to read a max of 16 bytes at a time
         for i in range(num_repeats):
             num_bytes = 16
@@ -388,12 +426,10 @@ class AD5593R_Chip(Base_Chip):
 
             commands += [I2CMessages.NACK, I2CMessages.READ1, I2CMessages.STOP]
 
-            data += self._i2c_controller.direct_i2c(commands)
-
-        # Stop ADC conversion (explained at the end of the "ADC Operation" in the manual)
-        adc_sequence_handle.set(0x0000)
-        self.write_register("AD5593R", "Config_RD", "ADC_SEQ")
+            command_list += [commands]
+        return command_list
 
+    def _decode_adc_results(self, data: list[int], num_measurements: int):
         retVal = [None for _ in range(num_measurements)]
         for i in range(num_measurements):
             retVal[i] = ((data[i * 2] & 0xff) << 8) | (data[i * 2 + 1] & 0xff)
@@ -29,9 +29,88 @@ from ..gui_helper import GUI_Helper
 
 from ..functions import hex_0fill
 
-import tkinter as tk
 import logging
 import time
+from array import array
+
+#  The parsing of the register model is shared with the emulated chips (see Emulated_Memory), so that the emulator
+# can not disagree with the controller about where the registers and the decoded values are
+def get_bit_index_lo_hi(index: str):
+    bit_idx_limits = [int(limit) for limit in index.split('-')]
+
+    if len(bit_idx_limits) == 1:
+        return (bit_idx_limits[0], bit_idx_limits[0])
+    return (bit_idx_limits[1], bit_idx_limits[0])
+
+def compile_decoded_fields(registers: dict, decoding_position_info: list[tuple], value_bits: int, register_length: int = 8):
+    #  The position strings are only parsed here, once, and turned into the integer shifts and masks
+    # which are used to encode and decode the value with plain integer operations
+    fields = []
+    for register, register_bits, value_bits_range in decoding_position_info:
+        register_lo, register_hi = get_bit_index_lo_hi(register_bits)
+        value_lo, value_hi = get_bit_index_lo_hi(value_bits_range)
+        if register_hi - register_lo != value_hi - value_lo:
+            raise RuntimeError("The register bits ({}) and value bits ({}) of a decoded value position do not have the same size".format(register_bits, value_bits_range))
+        if register_hi >= register_length or value_hi >= value_bits:
+            raise RuntimeError("The decoded value position ({}, {}, {}) is out of range".format(register, register_bits, value_bits_range))
+        fields += [(registers[register]["offset"], register_lo, (1 << (register_hi - register_lo + 1)) - 1, value_lo)]
+    return tuple(fields)
+
+#  Returns the lowest base address, the highest register address and, for each block ref of a block array,
+# the indexer parameters ('params') and the base address ('base_address') of the block
+def get_indexed_block_address_range(block_name, indexer_info, register_map):
+    indexer_function = indexer_info['function']
+
+    registers = {}
+    for idx in range(len(indexer_info['vars'])):
+        var = indexer_info['vars'][idx]
+        min = indexer_info['min'][idx]
+        max = indexer_info['max'][idx]
+
+        old_registers = registers
+        registers = {}
+
+        if var == "block" and min is None and max is None:
+            param = block_name
+            if len(old_registers) == 0:
+                registers[param] = {
+                    'params': {'block': param},
+                }
+            else:
+                for old in old_registers:
+                    registers[old + ":" + param] = {}
+                    registers[old + ":" + param]['params'] = old_registers[old]['params']
+                    registers[old + ":" + param]['params']['block'] = str(param)
+        else:
+            for val_idx in range(max - min):
+                i = min + val_idx
+                if len(old_registers) == 0:
+                    registers[i] = {
+                        'params': {var: i},
+                    }
+                else:
+                    for old in old_registers:
+                        registers[old + ":" + str(i)] = {}
+                        registers[old + ":" + str(i)]['params'] = (old_registers[old]['params']).copy()
+                        registers[old + ":" + str(i)]['params'][var] = i
+
+    min_address = None
+    max_address = None
+    for key in registers:
+        address = indexer_function(**(registers[key]['params']))
+        registers[key]['base_address'] = address
+        if min_address is None or address < min_address:
+            min_address = address
+        if max_address is None or address > max_address:
+            max_address = address
+
+    max_offset = None
+    for register in register_map:
+        offset = register_map[register]['offset']
+        if max_offset is None or offset > max_offset:
+            max_offset = offset
+
+    return min_address, max_address + max_offset, registers
 
 class Address_Space_Controller(GUI_Helper):
     def __init__(
@@ -48,18 +127,22 @@ class Address_Space_Controller(GUI_Helper):
         endianness: str = 'little',
         read_type: str = 'Normal',
         write_type: str = 'Normal',
+        read_plan_max_gap: int = 8,
     ):
         super().__init__(parent, None, parent._logger)
 
         self._name = name
         self._i2c_address = i2c_address
         self._i2c_controller = i2c_controller
+        self._i2c_controller.label_device(i2c_address, name)
         self._memory_size = memory_size
         self._blocks = {}
         self._register_map_metadata = register_map
         self._register_bits = register_bits
         self._register_length = register_length
         self._readback_delay_us = readback_delay_us
+        self._read_plan_max_gap = read_plan_max_gap
+        self._read_plans = {}
 
         if endianness not in ['little', 'big']:
             raise RuntimeError("Unknown endianness type")
@@ -75,12 +158,22 @@ class Address_Space_Controller(GUI_Helper):
 
         self._not_read = True
 
-        self._memory = [None for val in range(self._memory_size)]
-        self._read_only_map = [True for val in range(self._memory_size)]
+        #  The register values are kept in compact arrays instead of one tk variable per address,
+        # tk variables are only created on demand for the addresses (and decoded values) which
+        # are actually bound to a widget or handed out as a handle
+        typecode = self._get_array_typecode(self._register_length)
+        self._memory = array(typecode, [0]) * self._memory_size
+        self._memory_valid = bytearray(self._memory_size)
+        self._display_memory = array(typecode, [0]) * self._memory_size
+        self._read_only_map = bytearray(b'\x01') * self._memory_size
+        self._modified_addresses = set()  # Addresses whose display value differs from the known value in the chip
+        self._mapped_map = bytearray(self._memory_size)  # Addresses which are listed in the register map
 
-        self._display_vars = [tk.StringVar(value = "0", name="{}_{}_Reg{}".format(self._parent._unique_name, self._name, val)) for val in range(self._memory_size)]
+        self._display_vars = {}
+        self._var_update_depth = 0
 
         self._register_map = {}
+        self._block_array_base_addresses = {}
         for block_name in register_map:
             if "Base Address" in register_map[block_name]:
                 base_address = register_map[block_name]["Base Address"]
@@ -99,11 +192,13 @@ class Address_Space_Controller(GUI_Helper):
                         read_only = register_map[block_name]["Registers"][register]['read_only']
                     full_address = base_address + offset
                     self._register_map[block_name + "/" + register] = full_address
-                    self._display_vars[full_address].set(hex_0fill(register_map[block_name]["Registers"][register]['default'], self._register_length))
+                    self._display_memory[full_address] = register_map[block_name]["Registers"][register]['default']
                     self._read_only_map[full_address] = read_only
+                    self._mapped_map[full_address] = 1
             elif "Indexer" in register_map[block_name]:
                 indexer_info = register_map[block_name]['Indexer']
-                min_address, max_address, base_addresses = self._get_indexed_block_address_range(block_name, indexer_info, register_map[block_name]['Registers'])
+                min_address, max_address, base_addresses = get_indexed_block_address_range(block_name, indexer_info, register_map[block_name]['Registers'])
+                self._block_array_base_addresses[block_name] = base_addresses
 
                 if max_address >= min_address:  # Note: even though not frequently used, a block covering the whole array is needed for bulk read/write operations
                     self._blocks[block_name] = {
@@ -119,21 +214,32 @@ class Address_Space_Controller(GUI_Helper):
 
                 for register in register_map[block_name]["Registers"]:
                     offset = register_map[block_name]["Registers"][register]["offset"]
+                    default = register_map[block_name]["Registers"][register]['default']
+                    read_only = False
+                    if 'read_only' in register_map[block_name]["Registers"][register]:
+                        read_only = register_map[block_name]["Registers"][register]['read_only']
                     for base_name in base_addresses:
                         base_address = base_addresses[base_name]['base_address']
                         full_address = base_address + offset
-                        read_only = False
-                        if 'read_only' in register_map[block_name]["Registers"][register]:
-                            read_only = register_map[block_name]["Registers"][register]['read_only']
                         full_register_name = base_name + "/" + register
                         self._register_map[full_register_name] = full_address
-                        self._display_vars[full_address].set(hex_0fill(register_map[block_name]["Registers"][register]['default'], self._register_length))
+                        self._display_memory[full_address] = default
                         self._read_only_map[full_address] = read_only
+                        self._mapped_map[full_address] = 1
             else:
                 self._logger.error("An impossible condition occured, there was a memory block defined which does not have a base address and does not have an indexer")
 
+        self._default_memory = array(typecode, self._display_memory)
+
+        if self._mapped_map.find(1) == -1:  # Without a register map there is no way to know what to skip
+            self._mapped_map[:] = b'\x01' * self._memory_size
+        self._dirty = bytearray(self._mapped_map)  # Addresses whose display value was set since they were last read from or written to the chip
+
+        self._decoded_info = {}
+        self._decoded_fields = {}  # Map from block name and value to the compiled (offset, register shift, mask, value shift) fields of the decoded value
         self._decoded_display_vars = {}
         self._decoded_bit_size = {}
+        self._register_decoded_vars = {}  # Map from register address to the decoded values with a tk variable which depend on it
         if decoded_registers is not None:
             for block_name in decoded_registers:
                 if block_name not in register_map:
@@ -143,211 +249,291 @@ class Address_Space_Controller(GUI_Helper):
                     decoding_info = decoded_registers[block_name][value]
                     value_bits = decoding_info['bits']
 
+                    fields = compile_decoded_fields(register_map[block_name]["Registers"], decoding_info['position'], value_bits, self._register_length)
+                    self._decoded_fields[block_name + "/" + value] = fields
+
                     if "Base Address" in register_map[block_name]:
                         self._build_decoded_value(
                             value=value,
                             block_ref=block_name,
                             value_bits=value_bits,
-                            decoding_position_info=decoding_info['position'],
+                            base_address=register_map[block_name]["Base Address"],
+                            fields=fields,
                         )
                     elif "Indexer" in register_map[block_name]:
-                        _, _, base_addresses = self._get_indexed_block_address_range(block_name, indexer_info, register_map[block_name]['Registers'])
+                        base_addresses = self._block_array_base_addresses[block_name]
                         for block_ref in base_addresses:  # Note: it is a block ref and not a block name because this is a block array
                             self._build_decoded_value(
                                 value=value,
                                 block_ref=block_ref,
                                 value_bits=value_bits,
-                                decoding_position_info=decoding_info['position'],
+                                base_address=base_addresses[block_ref]['base_address'],
+                                fields=fields,
                             )
                     else:
                         self._logger.error("An impossible condition occured, there was a memory block defined which does not have a base address and does not have an indexer")
 
-    def _build_decoded_value(self, value: str, block_ref: str, value_bits: int, decoding_position_info: list[tuple]):
-        self._decoded_display_vars[block_ref + "/" + value] = tk.StringVar(name="{}_{}_{}_{}".format(self._parent._unique_name, self._name, block_ref, value))
+    @staticmethod
+    def _get_array_typecode(register_length: int):
+        if register_length <= 8:
+            return 'B'
+        elif register_length <= 16:
+            return 'H'
+        elif register_length <= 32:
+            return 'L'
+        return 'Q'
+
+    def _build_decoded_value(self, value: str, block_ref: str, value_bits: int, base_address: int, fields: tuple):
+        # Each field is resolved to (address, register shift, mask, value shift)
+        resolved_fields = tuple((base_address + offset, register_shift, mask, value_shift) for offset, register_shift, mask, value_shift in fields)
+        self._decoded_info[block_ref + "/" + value] = (block_ref, value, value_bits, resolved_fields)
         self._decoded_bit_size[block_ref + "/" + value] = value_bits
 
-        for regInfo in decoding_position_info:
-            register = regInfo[0]
-
-            register_var = self._display_vars[self._register_map[block_ref + "/" + register]]
-            self._update_decoded_value(block_ref, value, value_bits, regInfo)
-            # Note: Save ? these callbacks in case they need to be handled later
-            register_var.trace_add('write', lambda var, index, mode, block_ref=block_ref, value=value, value_bits=value_bits, position=regInfo:self._update_decoded_value(block_ref, value, value_bits, position))
-            self._decoded_display_vars[block_ref + "/" + value].trace_add('write', lambda var, index, mode, block_ref=block_ref, value=value, value_bits=value_bits, position=regInfo:self._update_register(block_ref, value, value_bits, position))
-
-    def _get_indexed_block_address_range(self, block_name, indexer_info, register_map):
-        indexer_function = indexer_info['function']
-
-        registers = {}
-        for idx in range(len(indexer_info['vars'])):
-            var = indexer_info['vars'][idx]
-            min = indexer_info['min'][idx]
-            max = indexer_info['max'][idx]
-
-            old_registers = registers
-            registers = {}
-
-            if var == "block" and min is None and max is None:
-                param = block_name
-                if len(old_registers) == 0:
-                    registers[param] = {
-                        'params': {'block': param},
-                    }
-                else:
-                    for old in old_registers:
-                        registers[old + ":" + param] = {}
-                        registers[old + ":" + param]['params'] = old_registers[old]['params']
-                        registers[old + ":" + param]['params']['block'] = str(param)
-            else:
-                for val_idx in range(max - min):
-                    i = min + val_idx
-                    if len(old_registers) == 0:
-                        registers[i] = {
-                            'params': {var: i},
-                        }
-                    else:
-                        for old in old_registers:
-                            registers[old + ":" + str(i)] = {}
-                            registers[old + ":" + str(i)]['params'] = (old_registers[old]['params']).copy()
-                            registers[old + ":" + str(i)]['params'][var] = i
-
-        min_address = None
-        max_address = None
-        for key in registers:
-            address = indexer_function(**(registers[key]['params']))
-            registers[key]['base_address'] = address
-            if min_address is None or address < min_address:
-                min_address = address
-            if max_address is None or address > max_address:
-                max_address = address
-
-        max_offset = None
-        for register in register_map:
-            offset = register_map[register]['offset']
-            if max_offset is None or offset > max_offset:
-                max_offset = offset
-
-        return min_address, max_address + max_offset, registers
-
     @property
     def is_modified(self):
         if self._i2c_address is None or self._not_read:
             return "Unknown"
 
-        for idx  in range(self._memory_size):
-            value = self._display_vars[idx].get()
-            if value == "" or value == "0x":
-                value = 0
-            else:
-                value = int(value, 0)
-            if value != self._memory[idx]:
-                return True
-        return False
-
-    def _update_register(self, block, value, bits, position):
-        #self._logger.detailed_trace("Entered Address_Space_Controller._update_register(block={}, value={}, bits={}, position={})".format(block, value, bits, position))
-        register_string = "{}/{}[{}]".format(block, position[0], position[1])
-        decoded_string = "{}[{}]".format(value, position[2])
-        self._logger.detailed_trace("Attempting to update register {} from decoded value {}".format(register_string, decoded_string))
-        if hasattr(self, "_updating_from_register"):  # Avoid an infinite loop where the two variables trigger each other
-            return
-
-        self._logger.trace("Updating register {} from decoded value {}".format(register_string, decoded_string))
-
-        self._updating_from_decoded_value = decoded_string
+        return len(self._modified_addresses) > 0
 
-        register_min_idx, register_max_idx = self._get_bit_index_min_max(position[1], 8)
-        value_min_idx,    value_max_idx    = self._get_bit_index_min_max(position[2], bits)
-
-        register_repr = self._build_bit_repr(self._display_vars[self._register_map[block + "/" + position[0]]], 8)
-        value_repr = self._build_bit_repr(self._decoded_display_vars[block + "/" + value], bits)
-
-        register_repr = [i for i in register_repr]
-        value_repr = [i for i in value_repr]
-        register_repr[register_min_idx:register_max_idx] = value_repr[value_min_idx:value_max_idx]
-        register_repr = ''.join(register_repr)
-
-        register_repr = '0b' + register_repr
-        self._display_vars[self._register_map[block + "/" + position[0]]].set(hex_0fill(int(register_repr, 0), self._register_length))
-
-        del self._updating_from_decoded_value
-
-    def _update_decoded_value(self, block, value, bits, position):
-        #self._logger.detailed_trace("Entered Address_Space_Controller._update_decoded_value(block={}, value={}, bits={}, position={})".format(block, value, bits, position))
-        register_string = "{}/{}[{}]".format(block, position[0], position[1])
-        decoded_string = "{}[{}]".format(value, position[2])
-        self._logger.detailed_trace("Attempting to update decoded value {} from register {}".format(decoded_string, register_string))
-        if hasattr(self, "_updating_from_decoded_value"):  # Avoid an infinite loop where the two variables trigger each other
-            if self._updating_from_decoded_value == decoded_string:
-                return
+    def _update_modified(self, address: int, data_size: int = 1):
+        for idx in range(address, address + data_size):
+            if self._memory_valid[idx] and self._display_memory[idx] != self._memory[idx]:
+                self._modified_addresses.add(idx)
+            else:
+                self._modified_addresses.discard(idx)
 
-        self._logger.trace("Updating decoded value {} from register {}".format(decoded_string, register_string))
+    def _parse_var_value(self, value: str):
+        if value == "" or value == "0x":
+            return 0
+        return int(value, 0)
 
-        self._updating_from_register = True
+    def _format_decoded_value(self, value: int, bits: int):
+        if bits == 1:
+            return str(value)
+        return hex_0fill(value, bits)
 
-        register_min_idx, register_max_idx = self._get_bit_index_min_max(position[1], 8)
-        value_min_idx,    value_max_idx    = self._get_bit_index_min_max(position[2], bits)
+    def _display_var_written(self, address: int):
+        if self._var_update_depth > 0:  # Avoid an infinite loop where the variables trigger each other
+            return
 
-        register_repr = self._build_bit_repr(self._display_vars[self._register_map[block + "/" + position[0]]], 8)
-        value_repr = self._build_bit_repr(self._decoded_display_vars[block + "/" + value], bits)
+        self._logger.detailed_trace("Updating register at address {} from its display variable".format(address))
 
-        register_repr = [i for i in register_repr]
-        value_repr = [i for i in value_repr]
-        value_repr[value_min_idx:value_max_idx] = register_repr[register_min_idx:register_max_idx]
-        value_repr = ''.join(value_repr)
+        self._display_memory[address] = self._parse_var_value(self._display_vars[address].get())
+        self._dirty[address] = 1
+        self._update_modified(address)
 
-        if bits == 1:
-            self._decoded_display_vars[block + "/" + value].set(value_repr)
-        else:
-            value_repr = '0b' + value_repr
-            self._decoded_display_vars[block + "/" + value].set(hex_0fill(int(value_repr, 0), bits))
+        self._var_update_depth += 1
+        try:
+            self._refresh_decoded_display_vars(address)
+        finally:
+            self._var_update_depth -= 1
 
-        del self._updating_from_register
+    def _decoded_var_written(self, value_name: str):
+        if self._var_update_depth > 0:  # Avoid an infinite loop where the variables trigger each other
+            return
 
-    def _build_bit_repr(self, var: tk.Variable, bit_length: int=8):
-        binary_string = ''.join(["0" for i in range(bit_length)])
-        value = var.get()
+        self._logger.detailed_trace("Updating registers from decoded value {}".format(value_name))
 
-        if value != "" and value != "0x":
-            binary_string = format(int(value, 0), 'b')
-            if len(binary_string) < bit_length:
-                prepend = '0'*(bit_length-len(binary_string))
-                binary_string = prepend + binary_string
+        value = self._parse_var_value(self._decoded_display_vars[value_name].get())
+        self.set_decoded_value(value_name, value, source=value_name)
 
-        return binary_string
+    def _refresh_decoded_display_vars(self, address: int, source: str = None):
+        if address not in self._register_decoded_vars:
+            return
 
-    def _get_bit_index_min_max(self, index: str, bit_size: int=8):
-        bit_idx_limits = index.split('-')
+        for value_name in self._register_decoded_vars[address]:
+            if value_name == source:
+                continue
+            bits = self._decoded_bit_size[value_name]
+            self._decoded_display_vars[value_name].set(self._format_decoded_value(self.get_decoded_value(value_name), bits))
+
+    def _refresh_display_vars(self, address: int, data_size: int):
+        self._var_update_depth += 1
+        try:
+            for var_address in self._display_vars:
+                if address <= var_address < address + data_size:
+                    self._display_vars[var_address].set(hex_0fill(self._display_memory[var_address], self._register_length))
+            for var_address in self._register_decoded_vars:
+                if address <= var_address < address + data_size:
+                    self._refresh_decoded_display_vars(var_address)
+        finally:
+            self._var_update_depth -= 1
+
+    def get_display_value(self, address: int):
+        return self._display_memory[address]
+
+    def set_display_value(self, address: int, value: int, source: str = None):
+        self._display_memory[address] = value
+        self._dirty[address] = 1
+        self._update_modified(address)
+
+        self._var_update_depth += 1
+        try:
+            if address in self._display_vars:
+                self._display_vars[address].set(hex_0fill(value, self._register_length))
+            self._refresh_decoded_display_vars(address, source)
+        finally:
+            self._var_update_depth -= 1
+
+    def set_display_block(self, address: int, values: list[int]):
+        data_size = len(values)
+        self._display_memory[address:address+data_size] = array(self._display_memory.typecode, values)
+        self._dirty[address:address+data_size] = b'\x01' * data_size
+        self._update_modified(address, data_size)
+        self._refresh_display_vars(address, data_size)
+
+    #  Bulk update of the display memory at the given addresses, only the addresses whose value actually
+    # changes are marked dirty and only the variables which depend on them are refreshed
+    def set_display_addresses(self, addresses, values):
+        import numpy
+
+        memory = self._get_numpy_memory()
+        addresses = numpy.asarray(addresses, dtype=numpy.int64)
+        values = numpy.asarray(values).astype(memory.dtype)
+
+        changed = memory[addresses] != values
+        addresses = addresses[changed]
+        memory[addresses] = values[changed]
+        del memory  # Release the view on the display memory
+
+        addresses = addresses.tolist()
+        self._var_update_depth += 1
+        try:
+            for address in addresses:
+                self._dirty[address] = 1
+                self._update_modified(address)
+                if address in self._display_vars:
+                    self._display_vars[address].set(hex_0fill(self._display_memory[address], self._register_length))
+                self._refresh_decoded_display_vars(address)
+        finally:
+            self._var_update_depth -= 1
+
+        return len(addresses)
+
+    def get_decoded_value(self, value_name: str):
+        value = 0
+        memory = self._display_memory
+        for address, register_shift, mask, value_shift in self._decoded_info[value_name][3]:
+            value |= ((memory[address] >> register_shift) & mask) << value_shift
+        return value
 
-        for idx in range(len(bit_idx_limits)):
-            bit_idx_limits[idx] = int(bit_idx_limits[idx])
+    def set_decoded_value(self, value_name: str, value: int, source: str = None):
+        memory = self._display_memory
+        for address, register_shift, mask, value_shift in self._decoded_info[value_name][3]:
+            register = memory[address] & ~(mask << register_shift)
+            register |= ((value >> value_shift) & mask) << register_shift
+            self.set_display_value(address, register, source=source)
+
+    def get_block_array_refs(self, block_name: str):
+        if block_name in self._block_array_base_addresses:
+            return list(self._block_array_base_addresses[block_name])
+        return [block_name]
+
+    def _get_block_array_addresses(self, block_name: str, block_refs: list[str]):
+        if block_name in self._block_array_base_addresses:
+            base_addresses = self._block_array_base_addresses[block_name]
+            return [base_addresses[block_ref]['base_address'] for block_ref in block_refs]
+        return [self._blocks[block_name]["Base Address"] for _ in block_refs]
+
+    def _get_numpy_memory(self):
+        import numpy
+
+        #  A numpy view directly on top of the display memory, so no copy is made and writes
+        # to the view are writes to the display memory
+        return numpy.frombuffer(self._display_memory, dtype=numpy.dtype("u{}".format(self._display_memory.itemsize)))
+
+    #  Decode a value for all the blocks of a block array (or only those in block_refs) with a single
+    # numpy operation per field, the returned array follows the order of block_refs (get_block_array_refs by default)
+    def get_decoded_value_array(self, block_name: str, value: str, block_refs: list[str] = None):
+        import numpy
+
+        if block_refs is None:
+            block_refs = self.get_block_array_refs(block_name)
+
+        memory = self._get_numpy_memory()
+        base_addresses = numpy.array(self._get_block_array_addresses(block_name, block_refs), dtype=numpy.int64)
+
+        values = numpy.zeros(len(block_refs), dtype=numpy.uint64)
+        for offset, register_shift, mask, value_shift in self._decoded_fields[block_name + "/" + value]:
+            registers = memory[base_addresses + offset].astype(numpy.uint64)
+            values |= ((registers >> numpy.uint64(register_shift)) & numpy.uint64(mask)) << numpy.uint64(value_shift)
+        return values
+
+    #  Encode a value into all the blocks of a block array (or only those in block_refs), values is either a single
+    # integer or a sequence in the order of block_refs. Only the display memory is changed, nothing is written to the chip
+    def set_decoded_value_array(self, block_name: str, value: str, values, block_refs: list[str] = None):
+        import numpy
+
+        if block_refs is None:
+            block_refs = self.get_block_array_refs(block_name)
+
+        memory = self._get_numpy_memory()
+        dirty = numpy.frombuffer(self._dirty, dtype=numpy.uint8)
+        base_addresses = numpy.array(self._get_block_array_addresses(block_name, block_refs), dtype=numpy.int64)
+        values = numpy.broadcast_to(numpy.asarray(values, dtype=numpy.uint64), base_addresses.shape)
+        if len(base_addresses) == 0:
+            return
 
-        if len(bit_idx_limits) == 1:
-            max_val = bit_size - bit_idx_limits[0]
-            min_val = max_val - 1
-        else:
-            min_val = bit_size - bit_idx_limits[0] - 1
-            max_val = bit_size - bit_idx_limits[1]
+        for offset, register_shift, mask, value_shift in self._decoded_fields[block_name + "/" + value]:
+            addresses = base_addresses + offset
+            registers = memory[addresses].astype(numpy.uint64) & ~numpy.uint64(mask << register_shift)
+            registers |= ((values >> numpy.uint64(value_shift)) & numpy.uint64(mask)) << numpy.uint64(register_shift)
+            memory[addresses] = registers.astype(memory.dtype)
+            dirty[addresses] = 1
+            for address in addresses.tolist():
+                self._update_modified(address)
+        del memory, dirty  # Release the views on the display memory and dirty map
 
-        return (min_val, max_val)
+        min_address = int(base_addresses.min())
+        max_address = int(base_addresses.max()) + max(field[0] for field in self._decoded_fields[block_name + "/" + value])
+        self._refresh_display_vars(min_address, max_address - min_address + 1)
 
     def update_i2c_address(self, address: int):
+        self._i2c_controller.label_device(address, self._name)
         if address != self._i2c_address:
             self._i2c_address = address
             self._not_read = True
 
+            # The cached memory belongs to the previous chip, so nothing is known about the new one
+            self._memory_valid[:] = bytes(self._memory_size)
+            self._dirty[:] = self._mapped_map
+            self._modified_addresses.clear()
+
             if address is not None:
                 self._logger.info("Updated address space '{}' to the I2C address {}".format(self._name, hex_0fill(address, 7)))
             else:
                 self._logger.info("Reset the I2C address for the address space '{}'".format(self._name))
 
     def get_memory(self, register_name):
-        return self._memory[self._register_map[register_name]]
+        address = self._register_map[register_name]
+        if not self._memory_valid[address]:
+            return None
+        return self._memory[address]
+
+    def _get_display_var(self, address: int):
+        if address not in self._display_vars:
+            var = self._build_variable("String", value=hex_0fill(self._display_memory[address], self._register_length), name="{}_{}_Reg{}".format(self._parent._unique_name, self._name, address))
+            var.trace_add('write', lambda var, index, mode, address=address: self._display_var_written(address))
+            self._display_vars[address] = var
+        return self._display_vars[address]
 
     def get_display_var(self, register_name):
-        return self._display_vars[self._register_map[register_name]]
+        return self._get_display_var(self._register_map[register_name])
 
     def get_decoded_display_var(self, value_name):
+        if value_name not in self._decoded_display_vars:
+            block_ref, value, bits, fields = self._decoded_info[value_name]
+
+            var = self._build_variable("String", value=self._format_decoded_value(self.get_decoded_value(value_name), bits), name="{}_{}_{}_{}".format(self._parent._unique_name, self._name, block_ref, value))
+            var.trace_add('write', lambda var, index, mode, value_name=value_name: self._decoded_var_written(value_name))
+            self._decoded_display_vars[value_name] = var
+
+            for address, _, _, _ in fields:
+                if address not in self._register_decoded_vars:
+                    self._register_decoded_vars[address] = []
+                if value_name not in self._register_decoded_vars[address]:
+                    self._register_decoded_vars[address] += [value_name]
         return self._decoded_display_vars[value_name]
 
     def get_decoded_bit_size(self, value_name):
@@ -358,16 +544,59 @@ class Address_Space_Controller(GUI_Helper):
             self.send_message("Unable to read address space '{}' because the i2c address is not set".format(self._name), "Error")
             return
 
-        self._logger.info("Reading the full '{}' address space".format(self._name))
+        read_plan = self.get_read_plan()
+        self._logger.info("Reading the full '{}' address space ({} mapped registers in {} blocks)".format(self._name, sum(length for _, length in read_plan), len(read_plan)))
 
-        if self.read_memory_block(0, self._memory_size):
+        if self._read_memory_ranges(read_plan):
             self._not_read = False
 
-    def write_all(self, write_check: bool = True):
+    async def read_all_async(self):
+        if self._i2c_address is None:
+            self.send_message("Unable to read address space '{}' because the i2c address is not set".format(self._name), "Error")
+            return
+
+        read_plan = self.get_read_plan()
+        self._logger.info("Reading the full '{}' address space ({} mapped registers in {} blocks)".format(self._name, sum(length for _, length in read_plan), len(read_plan)))
+
+        if await self._read_memory_ranges_async(read_plan):
+            self._not_read = False
+
+    #  The read plan is the list of (start address, length) ranges which cover the registers listed in the
+    # register map, unmapped addresses are not read unless they are a gap of at most max_gap addresses between
+    # two ranges, where a single longer transfer is cheaper than two. Plans are computed once per max_gap
+    def get_read_plan(self, max_gap: int = None):
+        if max_gap is None:
+            max_gap = self._read_plan_max_gap
+
+        if max_gap not in self._read_plans:
+            ranges = []
+            end = 0
+            while True:
+                start = self._mapped_map.find(1, end)
+                if start == -1:
+                    break
+                end = self._mapped_map.find(0, start)
+                if end == -1:
+                    end = self._memory_size
+
+                if len(ranges) > 0 and start - (ranges[-1][0] + ranges[-1][1]) <= max_gap:
+                    ranges[-1][1] = end - ranges[-1][0]
+                else:
+                    ranges += [[start, end - start]]
+
+            self._read_plans[max_gap] = [tuple(range_param) for range_param in ranges]
+
+        return self._read_plans[max_gap]
+
+    def write_all(self, write_check: bool = True, only_dirty: bool = True, skip_matching: bool = False):
         if self._i2c_address is None:
             self.send_message("Unable to write address space '{}' because the i2c address is not set".format(self._name), "Error")
             return False
 
+        if only_dirty:
+            self._logger.info("Writing the modified registers of the full '{}' address space".format(self._name))
+            return self.write_memory_addresses(self._get_dirty_addresses(0, self._memory_size), write_check=write_check, skip_matching=skip_matching)
+
         for val in self._read_only_map:
             if val:
                 self._logger.info("Unable to write the full '{}' address space because there are some read only registers, breaking it into smaller blocks".format(self._name))
@@ -378,6 +607,19 @@ class Address_Space_Controller(GUI_Helper):
 
         return self.write_memory_block(0, self._memory_size, write_check=write_check)
 
+    async def write_all_async(self, write_check: bool = True, only_dirty: bool = True, skip_matching: bool = False):
+        if self._i2c_address is None:
+            self.send_message("Unable to write address space '{}' because the i2c address is not set".format(self._name), "Error")
+            return False
+
+        if only_dirty:
+            self._logger.info("Writing the modified registers of the full '{}' address space".format(self._name))
+            return await self.write_memory_addresses_async(self._get_dirty_addresses(0, self._memory_size), write_check=write_check, skip_matching=skip_matching)
+
+        self._logger.info("Writing the full '{}' address space".format(self._name))
+        addresses = [address for address in range(self._memory_size) if not self._read_only_map[address]]
+        return await self.write_memory_addresses_async(addresses, write_check=write_check, only_dirty=False)
+
     def _read_memory_address_with_endian(self, address):
         if self._i2c_address is None:
             self.send_message("Unable to read address space '{}' because the i2c address is not set".format(self._name), "Error")
@@ -388,7 +630,18 @@ class Address_Space_Controller(GUI_Helper):
         read_bytes = ceil(self._register_length/8)
         tmp = self._i2c_controller.read_device_memory(self._i2c_address, address, read_bytes, self._register_bits, self._register_length, self._read_type)
 
-        if read_bytes == 1:
+        return self._bytes_to_register_value(tmp)
+
+    async def _read_memory_address_with_endian_async(self, address):
+        from math import ceil
+
+        read_bytes = ceil(self._register_length/8)
+        tmp = await self._i2c_controller.read_device_memory_async(self._i2c_address, address, read_bytes, self._register_bits, self._register_length, self._read_type)
+
+        return self._bytes_to_register_value(tmp)
+
+    def _bytes_to_register_value(self, tmp: list[int]):
+        if len(tmp) == 1:
             return tmp[0]
 
         value = 0
@@ -411,18 +664,74 @@ class Address_Space_Controller(GUI_Helper):
         self._logger.info("Reading register at address {} in the address space '{}'".format(address, self._name))
 
         self._memory[address] = self._read_memory_address_with_endian(address)
-        self._display_vars[address].set(hex_0fill(self._memory[address], self._register_length))
+        self._memory_valid[address] = 1
+        self.set_display_value(address, self._memory[address])
+        self._dirty[address] = 0
+
+        self._parent.update_whether_modified()
+
+    async def read_memory_register_async(self, address):
+        if self._i2c_address is None:
+            self.send_message("Unable to read address space '{}' because the i2c address is not set".format(self._name), "Error")
+            return
+
+        self._logger.info("Reading register at address {} in the address space '{}'".format(address, self._name))
+
+        self._memory[address] = await self._read_memory_address_with_endian_async(address)
+        self._memory_valid[address] = 1
+        self.set_display_value(address, self._memory[address])
+        self._dirty[address] = 0
 
         self._parent.update_whether_modified()
 
     def write_memory_register(self, address, write_check: bool = True, read_address = None):
+        register_bytes = self._prepare_register_write(address)
+        if register_bytes is None:
+            return False
+
+        self._i2c_controller.write_device_memory(self._i2c_address, address, register_bytes, self._register_bits, self._register_length, self._write_type)
+
+        if write_check:
+            #time.sleep(self._readback_delay_us/10E6)  # because sleep accepts seconds
+
+            if read_address is None:
+                read_address = address
+
+            if not self._check_register_write(address, self._read_memory_address_with_endian(read_address)):
+                return False
+
+        self._parent.update_whether_modified()
+
+        return True
+
+    async def write_memory_register_async(self, address, write_check: bool = True, read_address = None):
+        register_bytes = self._prepare_register_write(address)
+        if register_bytes is None:
+            return False
+
+        await self._i2c_controller.write_device_memory_async(self._i2c_address, address, register_bytes, self._register_bits, self._register_length, self._write_type)
+
+        if write_check:
+            if read_address is None:
+                read_address = address
+
+            if not self._check_register_write(address, await self._read_memory_address_with_endian_async(read_address)):
+                return False
+
+        self._parent.update_whether_modified()
+
+        return True
+
+    #  Takes the displayed value of the register as the value in the chip and returns the bytes to write,
+    # or None if the register can not be written
+    def _prepare_register_write(self, address):
         if self._i2c_address is None:
             self.send_message("Unable to write address space '{}' because the i2c address is not set".format(self._name), "Error")
-            return False
+            return None
 
         if self._read_only_map[address]:
             self._logger.info("Unable to write to the register at address {} in the address space '{}' because it is read only".format(address, self._name))
-            return False
+            return None
 
         self._logger.info("Writing register at address {} in the address space '{}'".format(address, self._name))
 
@@ -430,7 +739,10 @@ class Address_Space_Controller(GUI_Helper):
         write_bytes = ceil(self._register_length/8)
         register_bytes = []
 
-        self._memory[address] = int(self._display_vars[address].get(), 0)
+        self._memory[address] = self._display_memory[address]
+        self._memory_valid[address] = 1
+        self._dirty[address] = 0
+        self._modified_addresses.discard(address)
         tmp = self._memory[address]
         for idx in range(write_bytes):
             register_bytes += [tmp & 0xff]
@@ -438,28 +750,22 @@ class Address_Space_Controller(GUI_Helper):
         if self._endianness == "big":
             register_bytes.reverse()
 
-        self._i2c_controller.write_device_memory(self._i2c_address, address, register_bytes, self._register_bits, self._register_length, self._write_type)
+        return register_bytes
 
-        if write_check:
-            #time.sleep(self._readback_delay_us/10E6)  # because sleep accepts seconds
+    def _check_register_write(self, address, value):
+        if self._memory[address] != value:
+            self.send_message("Failure to write register at address 0x{:0x} in the {} address space (I2C address 0x{:0x})".format(address, self._name, self._i2c_address),
+                              status="Error"
+            )
+            self._memory[address] = value
+            self._dirty[address] = 1
+            self._update_modified(address)
+            self._i2c_controller.pacing_feedback(self._i2c_address, success=False)
+            # self.set_display_value(address, tmp)
 
-            if read_address is None:
-                read_address = address
-
-            tmp = self._read_memory_address_with_endian(read_address)
-            if self._memory[address] != tmp:
-                self.send_message("Failure to write register at address 0x{:0x} in the {} address space (I2C address 0x{:0x})".format(address, self._name, self._i2c_address),
-                                  status="Error"
-                )
-                self._memory[address] = tmp
-                # self._display_vars[address].set(hex_0fill(tmp, self._register_length))
-
-                self._parent.update_whether_modified()
-
-                return False
-
-        self._parent.update_whether_modified()
+            self._parent.update_whether_modified()
 
+            return False
         return True
 
     def read_memory_block(self, address, data_size):
@@ -474,26 +780,21 @@ class Address_Space_Controller(GUI_Helper):
         self._logger.info("Reading a block of {} registers ({} bytes each) starting at address {} in the address space '{}'".format(data_size, read_bytes, address, self._name))
 
         tmp = self._i2c_controller.read_device_memory(self._i2c_address, address, data_size*read_bytes, self._register_bits, self._register_length, self._read_type)
-        for i in range(data_size):
-            if read_bytes == 1:
-                self._memory[address+i] = tmp[i]
-            else:
-                value = 0
-                base_idx = i * read_bytes
-                if self._endianness == 'little':
-                    for idx in range(read_bytes):
-                        value = (value << 8) | tmp[base_idx + read_bytes - 1 - idx]
-                else:
-                    for idx in range(read_bytes):
-                        value = (value << 8) | tmp[base_idx + idx]
-                self._memory[address+i] = value
-            self._display_vars[address+i].set(hex_0fill(self._memory[address+i], self._register_length))
+        self._memory[address:address+data_size] = array(self._memory.typecode, self._bytes_to_registers(tmp, data_size))
+        self._memory_valid[address:address+data_size] = b'\x01' * data_size
+        self._display_memory[address:address+data_size] = self._memory[address:address+data_size]
+        self._dirty[address:address+data_size] = bytes(data_size)
+        self._modified_addresses.difference_update(range(address, address+data_size))
+        self._refresh_display_vars(address, data_size)
 
         self._parent.update_whether_modified()
 
         return True
 
     def write_memory_block_with_split_for_read_only(self, address, data_size, write_check: bool = True, read_address = None):
+        if read_address is None:
+            read_address = address
+
         start_address = None
         ranges = []
 
@@ -501,11 +802,9 @@ class Address_Space_Controller(GUI_Helper):
             if not self._read_only_map[address + idx] and start_address is None:
                 start_address = address + idx
             if self._read_only_map[address + idx] and start_address is not None:
-                ranges += [(start_address, address + idx - start_address)]
+                ranges += [(start_address, address + idx - start_address, start_address - address + read_address)]
                 start_address = None
         if start_address is not None:
-            if read_address is None:
-                read_address = address
             ranges += [(start_address, address + idx - start_address + 1, start_address - address + read_address)]
 
         success = True
@@ -541,19 +840,12 @@ class Address_Space_Controller(GUI_Helper):
 
         write_bytes = ceil(self._register_length/8)
 
-        for i in range(data_size):
-            self._memory[address+i] = int(self._display_vars[address+i].get(), 0)
+        self._memory[address:address+data_size] = self._display_memory[address:address+data_size]
+        self._memory_valid[address:address+data_size] = b'\x01' * data_size
+        self._dirty[address:address+data_size] = bytes(data_size)
+        self._modified_addresses.difference_update(range(address, address+data_size))
 
-        if write_bytes == 1:
-            tmp = self._memory[address:address+data_size]
-        else:
-            tmp = [None for i in range(data_size * write_bytes)]
-            for idx in range(data_size):
-                for i in range(write_bytes):
-                    if self._endianness == 'little':
-                        tmp[idx*write_bytes + i] = (self._memory[idx] >> (8 * i)) & 0xff
-                    else:
-                        tmp[idx*write_bytes + i] = (self._memory[idx] >> (8 * (write_bytes - 1 - i))) & 0xff
+        tmp = self._registers_to_bytes(self._memory[address:address+data_size])
 
         self._i2c_controller.write_device_memory(self._i2c_address, address, tmp, self._register_bits, self._register_length, self._write_type)
 
@@ -564,29 +856,18 @@ class Address_Space_Controller(GUI_Helper):
                 read_address = address
 
             tmp = self._i2c_controller.read_device_memory(self._i2c_address, read_address, data_size*write_bytes, self._register_bits, self._register_length, self._read_type)
-            if write_bytes != 1:
-                read_tmp = tmp
-                tmp = [None for i in range(data_size)]
-
-                for base_idx in range(data_size):
-                    value = 0
-                    if self._endianness == 'little':
-                        for i in range(write_bytes):
-                            value = (value << 8) | read_tmp[(base_idx + 1) * write_bytes - 1 - i]
-                    else:
-                        for i in range(write_bytes):
-                            value = (value << 8) | read_tmp[base_idx * write_bytes + i]
-                    tmp[base_idx] = value
-
-                    del read_tmp
+            tmp = self._bytes_to_registers(tmp, data_size)
 
             failed = []
             for i in range(data_size):
                 if self._memory[address+i] != tmp[i]:
                     failed += [address+i]
                     self._memory[address+i] = tmp[i]
-                    # self._display_vars[address+i].set(hex_0fill(tmp[i], self._register_length))
+                    self._dirty[address+i] = 1
+                    self._update_modified(address+i)
+                    # self.set_display_value(address+i, tmp[i])
             if len(failed) != 0:
+                self._i2c_controller.pacing_feedback(self._i2c_address, success=False)
                 failed = ["0x{:0x}".format(i) for i in failed]
                 self.send_message("Failure to write memory block at address 0x{:0x} with length {} in the {} address space (I2C address 0x{:0x}). The following register addresses failed to write: {}".format(address, data_size, self._name, self._i2c_address, ', '.join(failed)),
                                   status="Error"
@@ -600,6 +881,258 @@ class Address_Space_Controller(GUI_Helper):
 
         return True
 
+    def _get_address_ranges(self, addresses, max_gap: int = 0):
+        #  Group a list of addresses into (start address, length) ranges of contiguous addresses,
+        # ranges separated by at most max_gap addresses are merged (i.e. the gap is read/written too)
+        ranges = []
+        for address in sorted(set(addresses)):
+            if len(ranges) > 0 and address - (ranges[-1][0] + ranges[-1][1]) <= max_gap:
+                ranges[-1][1] = address - ranges[-1][0] + 1
+            else:
+                ranges += [[address, 1]]
+        return [tuple(range_param) for range_param in ranges]
+
+    def read_memory_addresses(self, addresses, max_gap: int = 0):
+        if self._i2c_address is None:
+            self.send_message("Unable to read address space '{}' because the i2c address is not set".format(self._name), "Error")
+            return False
+
+        ranges = self._get_address_ranges(addresses, max_gap)
+        if len(ranges) == 0:
+            return True
+        self._logger.info("Reading {} registers in {} blocks in the address space '{}'".format(len(addresses), len(ranges), self._name))
+
+        return self._read_memory_ranges(ranges)
+
+    async def read_memory_addresses_async(self, addresses, max_gap: int = 0):
+        if self._i2c_address is None:
+            self.send_message("Unable to read address space '{}' because the i2c address is not set".format(self._name), "Error")
+            return False
+
+        ranges = self._get_address_ranges(addresses, max_gap)
+        if len(ranges) == 0:
+            return True
+        self._logger.info("Reading {} registers in {} blocks in the address space '{}'".format(len(addresses), len(ranges), self._name))
+
+        return await self._read_memory_ranges_async(ranges)
+
+    def _read_memory_ranges(self, ranges):
+        batch, transactions = self._build_read_batch(ranges)
+        self._i2c_controller.execute_batch(batch)
+        return self._store_read_batch(ranges, transactions)
+
+    async def _read_memory_ranges_async(self, ranges):
+        batch, transactions = self._build_read_batch(ranges)
+        await self._i2c_controller.execute_batch_async(batch)
+        return self._store_read_batch(ranges, transactions)
+
+    #  All the blocks are read in a single transaction batch
+    def _build_read_batch(self, ranges):
+        from math import ceil
+        read_bytes = ceil(self._register_length/8)
+
+        batch = self._i2c_controller.new_batch()
+        transactions = []
+        for address, data_size in ranges:
+            transactions += [(address, data_size, batch.read(self._i2c_address, address, data_size*read_bytes, self._register_bits, self._register_length, self._read_type))]
+        return batch, transactions
+
+    def _store_read_batch(self, ranges, transactions):
+        for address, data_size, transaction in transactions:
+            self._memory[address:address+data_size] = array(self._memory.typecode, self._bytes_to_registers(transaction.result(), data_size))
+            self._memory_valid[address:address+data_size] = b'\x01' * data_size
+            self._display_memory[address:address+data_size] = self._memory[address:address+data_size]
+            self._dirty[address:address+data_size] = bytes(data_size)
+            self._modified_addresses.difference_update(range(address, address+data_size))
+
+        self._refresh_display_vars(ranges[0][0], ranges[-1][0] + ranges[-1][1] - ranges[0][0])
+
+        self._parent.update_whether_modified()
+
+        return True
+
+    def _bytes_to_registers(self, data: list[int], data_size: int):
+        from math import ceil
+        read_bytes = ceil(self._register_length/8)
+
+        if read_bytes == 1:
+            return data[:data_size]
+
+        values = []
+        for i in range(data_size):
+            value = 0
+            base_idx = i * read_bytes
+            if self._endianness == 'little':
+                for idx in range(read_bytes):
+                    value = (value << 8) | data[base_idx + read_bytes - 1 - idx]
+            else:
+                for idx in range(read_bytes):
+                    value = (value << 8) | data[base_idx + idx]
+            values += [value]
+        return values
+
+    def _registers_to_bytes(self, values):
+        from math import ceil
+        write_bytes = ceil(self._register_length/8)
+
+        if write_bytes == 1:
+            return list(values)
+
+        data = []
+        for value in values:
+            for i in range(write_bytes):
+                if self._endianness == 'little':
+                    data += [(value >> (8 * i)) & 0xff]
+                else:
+                    data += [(value >> (8 * (write_bytes - 1 - i))) & 0xff]
+        return data
+
+    def _get_dirty_addresses(self, address, data_size):
+        # Dirty addresses of the range which can be written, i.e. ignoring the read only ones
+        addresses = []
+        end_address = address + data_size
+        idx = self._dirty.find(1, address, end_address)
+        while idx != -1:
+            if not self._read_only_map[idx]:
+                addresses += [idx]
+            idx = self._dirty.find(1, idx + 1, end_address)
+        return addresses
+
+    #  Only the dirty addresses are written, unless only_dirty is False. With skip_matching, the addresses
+    # where the display value is the same as the value last read from (or written to) the chip are skipped too
+    #  Merge write ranges separated by at most max_gap addresses, but only when the chip is known to already hold
+    # the displayed values in the gap (and it is not read only), so writing over the gap changes nothing
+    def _merge_write_ranges(self, ranges, max_gap: int = 0):
+        merged = []
+        for address, data_size in ranges:
+            if len(merged) > 0:
+                gap_start = merged[-1][0] + merged[-1][1]
+                gap = range(gap_start, address)
+                if len(gap) <= max_gap and all(self._memory_valid[idx] and not self._read_only_map[idx] and self._display_memory[idx] == self._memory[idx] for idx in gap):
+                    merged[-1][1] = address + data_size - merged[-1][0]
+                    continue
+            merged += [[address, data_size]]
+        return [tuple(range_param) for range_param in merged]
+
+    #  Write the registers whose displayed value differs from the value known to be in the chip, or whose value in the
+    # chip is not known, in as few bursts as possible (see _merge_write_ranges). Unmapped and read only registers are skipped
+    def write_differences(self, write_check: bool = True, max_gap: int = 4):
+        addresses = self._get_difference_addresses()
+        if len(addresses) == 0:
+            self._logger.info("The address space '{}' already holds the displayed configuration".format(self._name))
+            return True
+        return self.write_memory_addresses(addresses, write_check=write_check, only_dirty=False, max_gap=max_gap)
+
+    async def write_differences_async(self, write_check: bool = True, max_gap: int = 4):
+        addresses = self._get_difference_addresses()
+        if len(addresses) == 0:
+            self._logger.info("The address space '{}' already holds the displayed configuration".format(self._name))
+            return True
+        return await self.write_memory_addresses_async(addresses, write_check=write_check, only_dirty=False, max_gap=max_gap)
+
+    def _get_difference_addresses(self):
+        import numpy
+
+        display_memory = self._get_numpy_memory()
+        memory = numpy.frombuffer(self._memory, dtype=display_memory.dtype)
+        memory_valid = numpy.frombuffer(self._memory_valid, dtype=bool)
+        mapped = numpy.frombuffer(self._mapped_map, dtype=bool)
+        read_only = numpy.frombuffer(self._read_only_map, dtype=bool)
+
+        addresses = numpy.flatnonzero(mapped & ~read_only & (~memory_valid | (display_memory != memory))).tolist()
+        del display_memory, memory, memory_valid, mapped, read_only  # Release the views on the memory buffers
+        return addresses
+
+    def write_memory_addresses(self, addresses, write_check: bool = True, only_dirty: bool = True, skip_matching: bool = False, max_gap: int = 0):
+        if self._i2c_address is None:
+            self.send_message("Unable to write address space '{}' because the i2c address is not set".format(self._name), "Error")
+            return False
+
+        ranges, read_only = self._select_write_ranges(addresses, only_dirty, skip_matching, max_gap)
+        if len(ranges) == 0:
+            return len(read_only) == 0
+
+        batch, readbacks = self._build_write_batch(ranges, write_check)
+        self._i2c_controller.execute_batch(batch)
+        return self._check_write_batch(readbacks, read_only)
+
+    async def write_memory_addresses_async(self, addresses, write_check: bool = True, only_dirty: bool = True, skip_matching: bool = False, max_gap: int = 0):
+        if self._i2c_address is None:
+            self.send_message("Unable to write address space '{}' because the i2c address is not set".format(self._name), "Error")
+            return False
+
+        ranges, read_only = self._select_write_ranges(addresses, only_dirty, skip_matching, max_gap)
+        if len(ranges) == 0:
+            return len(read_only) == 0
+
+        batch, readbacks = self._build_write_batch(ranges, write_check)
+        await self._i2c_controller.execute_batch_async(batch)
+        return self._check_write_batch(readbacks, read_only)
+
+    #  Returns the ranges to write and the read only addresses which were requested
+    def _select_write_ranges(self, addresses, only_dirty: bool, skip_matching: bool, max_gap: int):
+        if only_dirty:
+            addresses = [address for address in addresses if self._dirty[address]]
+        if skip_matching:
+            remaining = []
+            for address in addresses:
+                if self._memory_valid[address] and self._display_memory[address] == self._memory[address]:
+                    self._dirty[address] = 0
+                else:
+                    remaining += [address]
+            addresses = remaining
+
+        read_only = [address for address in addresses if self._read_only_map[address]]
+        if len(read_only) > 0:
+            self._logger.info("Unable to write {} registers in the address space '{}' because they are read only".format(len(read_only), self._name))
+            addresses = [address for address in addresses if not self._read_only_map[address]]
+
+        ranges = self._merge_write_ranges(self._get_address_ranges(addresses), max_gap)
+        if len(ranges) > 0:
+            self._logger.info("Writing {} registers in {} blocks in the address space '{}'".format(len(addresses), len(ranges), self._name))
+        return ranges, read_only
+
+    #  All the blocks, and their readback if requested, are sent in a single transaction batch
+    def _build_write_batch(self, ranges, write_check: bool):
+        from math import ceil
+        write_bytes = ceil(self._register_length/8)
+
+        batch = self._i2c_controller.new_batch()
+        readbacks = []
+        for address, data_size in ranges:
+            self._memory[address:address+data_size] = self._display_memory[address:address+data_size]
+            self._memory_valid[address:address+data_size] = b'\x01' * data_size
+            self._dirty[address:address+data_size] = bytes(data_size)
+            self._modified_addresses.difference_update(range(address, address+data_size))
+
+            batch.write(self._i2c_address, address, self._registers_to_bytes(self._memory[address:address+data_size]), self._register_bits, self._register_length, self._write_type)
+            if write_check:
+                readbacks += [(address, data_size, batch.read(self._i2c_address, address, data_size*write_bytes, self._register_bits, self._register_length, self._read_type))]
+        return batch, readbacks
+
+    def _check_write_batch(self, readbacks, read_only):
+        failed = []
+        for address, data_size, transaction in readbacks:
+            values = self._bytes_to_registers(transaction.result(), data_size)
+            for i in range(data_size):
+                if self._memory[address+i] != values[i]:
+                    failed += [address+i]
+                    self._memory[address+i] = values[i]
+                    self._dirty[address+i] = 1
+                    self._update_modified(address+i)
+
+        self._parent.update_whether_modified()
+
+        if len(failed) != 0:
+            self._i2c_controller.pacing_feedback(self._i2c_address, success=False)
+            failed = ["0x{:0x}".format(i) for i in failed]
+            self.send_message("Failure to write registers in the {} address space (I2C address 0x{:0x}). The following register addresses failed to write: {}".format(self._name, self._i2c_address, ', '.join(failed)),
+                              status="Error"
+            )
+            return False
+
+        return len(read_only) == 0
+
     def read_block(self, block_name):
         if self._i2c_address is None:
             self.send_message("Unable to read address space '{}' because the i2c address is not set".format(self._name), "Error")
@@ -610,7 +1143,17 @@ class Address_Space_Controller(GUI_Helper):
 
         self.read_memory_block(block["Base Address"], block["Length"])
 
-    def write_block(self, block_name, write_check: bool = True):
+    async def read_block_async(self, block_name):
+        if self._i2c_address is None:
+            self.send_message("Unable to read address space '{}' because the i2c address is not set".format(self._name), "Error")
+            return
+
+        block = self._blocks[block_name]
+        self._logger.info("Attempting to read block {}".format(block_name))
+
+        await self._read_memory_ranges_async([(block["Base Address"], block["Length"])])
+
+    def write_block(self, block_name, write_check: bool = True, only_dirty: bool = True, skip_matching: bool = False):
         if self._i2c_address is None:
             self.send_message("Unable to write address space '{}' because the i2c address is not set".format(self._name), "Error")
             return False
@@ -618,15 +1161,37 @@ class Address_Space_Controller(GUI_Helper):
         block = self._blocks[block_name]
         self._logger.info("Attempting to write block {}".format(block_name))
 
+        if only_dirty and "Write Base Address" not in block:
+            return self.write_memory_addresses(self._get_dirty_addresses(block["Base Address"], block["Length"]), write_check=write_check, skip_matching=skip_matching)
+
         address = block["Base Address"]
         original_address = address
         if "Write Base Address" in block:
             address = block["Write Base Address"]
             for idx in range(block["Length"]):
-                self._display_vars[address+idx].set(self._display_vars[original_address+idx].get())
+                self.set_display_value(address+idx, self._display_memory[original_address+idx])
 
         return self.write_memory_block(block["Base Address"], block["Length"], write_check, original_address)
 
+    async def write_block_async(self, block_name, write_check: bool = True, only_dirty: bool = True, skip_matching: bool = False):
+        if self._i2c_address is None:
+            self.send_message("Unable to write address space '{}' because the i2c address is not set".format(self._name), "Error")
+            return False
+
+        block = self._blocks[block_name]
+        self._logger.info("Attempting to write block {}".format(block_name))
+
+        if only_dirty and "Write Base Address" not in block:
+            return await self.write_memory_addresses_async(self._get_dirty_addresses(block["Base Address"], block["Length"]), write_check=write_check, skip_matching=skip_matching)
+
+        address = block["Base Address"]
+        if "Write Base Address" in block:
+            for idx in range(block["Length"]):
+                self.set_display_value(block["Write Base Address"]+idx, self._display_memory[address+idx])
+
+        addresses = [idx for idx in range(address, address + block["Length"]) if not self._read_only_map[idx]]
+        return await self.write_memory_addresses_async(addresses, write_check=write_check, only_dirty=False)
+
     def read_register(self, block_name, register_name):
         self._logger.detailed_trace(f'Address_Space_Controller::read_register("{block_name}", "{register_name}")')
         if self._i2c_address is None:
@@ -637,6 +1202,15 @@ class Address_Space_Controller(GUI_Helper):
 
         self.read_memory_register(self._register_map[block_name + "/" + register_name])
 
+    async def read_register_async(self, block_name, register_name):
+        if self._i2c_address is None:
+            self.send_message("Unable to read address space '{}' because the i2c address is not set".format(self._name), "Error")
+            return
+
+        self._logger.info("Attempting to read register {} in block {}".format(register_name, block_name))
+
+        await self.read_memory_register_async(self._register_map[block_name + "/" + register_name])
+
     def write_register(self, block_name, register_name, write_check: bool = True):
         if self._i2c_address is None:
             self.send_message("Unable to write address space '{}' because the i2c address is not set".format(self._name), "Error")
@@ -647,49 +1221,40 @@ class Address_Space_Controller(GUI_Helper):
         address = self._register_map[block_name + "/" + register_name]
         original_address = address
         if "Write Base Address" in self._blocks[block_name]:
-            val = self._display_vars[address].get()
+            val = self._display_memory[address]
             new_base = self._blocks[block_name]["Write Base Address"]
             old_base = self._blocks[block_name]["Base Address"]
             address = address - old_base + new_base
-            self._display_vars[address].set(val)
+            self.set_display_value(address, val)
 
         return self.write_memory_register(address, write_check, original_address)
 
+    async def write_register_async(self, block_name, register_name, write_check: bool = True):
+        if self._i2c_address is None:
+            self.send_message("Unable to write address space '{}' because the i2c address is not set".format(self._name), "Error")
+            return False
+
+        self._logger.info("Attempting to write register {} in block {}".format(register_name, block_name))
+
+        address = self._register_map[block_name + "/" + register_name]
+        original_address = address
+        if "Write Base Address" in self._blocks[block_name]:
+            val = self._display_memory[address]
+            address = address - self._blocks[block_name]["Base Address"] + self._blocks[block_name]["Write Base Address"]
+            self.set_display_value(address, val)
+
+        return await self.write_memory_register_async(address, write_check, original_address)
+
     def reset(self):
-        register_count = len(self._register_map)
-        count = 0
-        lastUpdateTime = time.time_ns()
-        for register_ref in self._register_map:
-            thisTime = time.time_ns()
-            if thisTime - lastUpdateTime > 0.3 * 10**9:
-                lastUpdateTime = thisTime
-                self.display_progress("Resetting:", count*100./register_count)
-                #self._parent._parent._frame.update_idletasks()
-                self._parent._parent._frame.update()
-
-            full_address = self._register_map[register_ref]
-
-            register_info = register_ref.split("/")
-            block_ref = register_info[0]
-            register_name = register_info[1]
-            block_info = block_ref.split(":")
-            block_name = block_info[0]
-
-            default_value = self._register_map_metadata[block_name]["Registers"][register_name]['default']
-            self._display_vars[full_address].set(hex_0fill(default_value, self._register_length))
-            count += 1
-        self.clear_progress()
+        self._display_memory[:] = self._default_memory
+        self._dirty[:] = self._mapped_map
+        self._update_modified(0, self._memory_size)
+        self._refresh_display_vars(0, self._memory_size)
 
     def revert(self):
-        lastUpdateTime = time.time_ns()
         for idx in range(self._memory_size):
-            thisTime = time.time_ns()
-            if thisTime - lastUpdateTime > 0.3 * 10**9:
-                lastUpdateTime = thisTime
-                self.display_progress("Reverting:", idx*100./self._memory_size)
-                #self._parent._parent._frame.update_idletasks()
-                self._parent._parent._frame.update()
-
-            if self._memory[idx] is not None:
-                self._display_vars[idx].set(hex_0fill(self._memory[idx], self._register_length))
-        self.clear_progress()
+            if self._memory_valid[idx]:
+                self._display_memory[idx] = self._memory[idx]
+                self._dirty[idx] = 0
+        self._modified_addresses.clear()
+        self._refresh_display_vars(0, self._memory_size)
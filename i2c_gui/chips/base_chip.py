@@ -30,8 +30,12 @@ from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from ..connection_controller import Connection_Controller
 
-import tkinter as tk
-import tkinter.ttk as ttk  # For themed widgets (gives a more native visual to the elements)
+try:
+    import tkinter as tk
+    import tkinter.ttk as ttk  # For themed widgets (gives a more native visual to the elements)
+except ImportError:
+    tk = None
+    ttk = None
 import logging
 import itertools
 import pickle
@@ -90,9 +94,9 @@ class Base_Chip(GUI_Helper):
                     self._block_array_display_vars[address_space][block] = {}
                     self._block_array_decoded_display_vars[address_space][block] = {}
                     for register in self._register_model[address_space]["Register Blocks"][block]["Registers"]:
-                        self._block_array_display_vars[address_space][block][register] = tk.StringVar(name="{}_Display_{}_{}_{}".format(self._unique_name, address_space, block, register))
+                        self._block_array_display_vars[address_space][block][register] = self._build_variable("String", name="{}_Display_{}_{}_{}".format(self._unique_name, address_space, block, register))
                     for value in self._register_decoding[address_space]["Register Blocks"][block]:
-                        self._block_array_decoded_display_vars[address_space][block][value] = tk.StringVar(name="{}_DecodedDisplay_{}_{}_{}".format(self._unique_name, address_space, block, value))
+                        self._block_array_decoded_display_vars[address_space][block][value] = self._build_variable("String", name="{}_DecodedDisplay_{}_{}_{}".format(self._unique_name, address_space, block, value))
 
     @property
     def tabs(self):
@@ -192,7 +196,7 @@ class Base_Chip(GUI_Helper):
                 value=maximum
 
             self._indexer_vars[variable] = {
-                "variable": tk.StringVar(name="{}_Indexer_{}".format(self._unique_name, variable)),
+                "variable": self._build_variable("String", name="{}_Indexer_{}".format(self._unique_name, variable)),
                 "min": minimum,
                 "max": maximum
             }
@@ -216,37 +220,173 @@ class Base_Chip(GUI_Helper):
             if val != init_val:
                 self._indexer_vars[indexer]['variable'].set(val)
 
-    def save_config(self, config_file: str):
+    #  By default the configuration is saved in the sparse format (see save_sparse_config_file), the full
+    # pickled dump of all the address spaces is still available with sparse=False
+    def save_config(self, config_file: str, sparse: bool = True):
+        if sparse:
+            self.save_sparse_config_file(config_file)
+            return
+
         info = {
         }
 
         for address_space_name in self._address_space:
             address_space: Address_Space_Controller = self._address_space[address_space_name]
-            size = address_space._memory_size
-
-            conf = [None for idx in range(size)]
+            info[address_space_name] = address_space._display_memory.tolist()
 
-            for idx in range(size):
-                conf[idx] = int(address_space._display_vars[idx].get(), 0)
+        self.save_pickle_file(config_file, info)
 
-            info[address_space_name] = conf
+    #  Hash of the configuration as it would be saved by save_config, to tag data taken with this configuration
+    def get_config_hash(self):
+        import hashlib
 
-        self.save_pickle_file(config_file, info)
+        config_hash = hashlib.sha256()
+        config_hash.update("{}:{}".format(self._chip_name, self._version).encode())
+        for address_space_name in self._address_space:
+            address_space: Address_Space_Controller = self._address_space[address_space_name]
+            config_hash.update(address_space_name.encode())
+            config_hash.update(address_space._display_memory.tobytes())
+        return config_hash.hexdigest()
 
     def load_config(self, config_file: str):
+        import zipfile
+        if zipfile.is_zipfile(config_file):
+            self.load_sparse_config_file(config_file)
+            return
+
         info = self.load_pickle_file(config_file)
+        if info is None:
+            return
 
         for address_space_name in self._address_space:
             address_space: Address_Space_Controller = self._address_space[address_space_name]
             size = address_space._memory_size
 
-            length = address_space._register_length
+            address_space.set_display_addresses(range(len(info[address_space_name][:size])), info[address_space_name][:size])
+
+        self.update_whether_modified()
+
+    #  The sparse configuration file is a numpy npz archive which only holds the registers which differ from the defaults
+    # of the register model: an array of addresses and an array of values per address space, plus a JSON header with
+    # the format version, the chip name and version, and the configuration hash (see get_config_hash)
+    _sparse_config_format = "i2c_gui sparse config"
+    _sparse_config_version = 1
+
+    def save_sparse_config_file(self, config_file: str):
+        import json
+        import numpy
+
+        header = {
+            "format": self._sparse_config_format,
+            "format_version": self._sparse_config_version,
+            "chip": self._chip_name,
+            "version": self._version,
+            "config_hash": self.get_config_hash(),
+            "address_spaces": [],
+        }
+
+        arrays = {}
+        for idx, address_space_name in enumerate(self._address_space):
+            address_space: Address_Space_Controller = self._address_space[address_space_name]
+            memory = address_space._get_numpy_memory()
+            default_memory = numpy.frombuffer(address_space._default_memory, dtype=memory.dtype)
+
+            addresses = numpy.flatnonzero(memory != default_memory)
+            arrays["addresses_{}".format(idx)] = addresses.astype(numpy.min_scalar_type(address_space._memory_size - 1))
+            arrays["values_{}".format(idx)] = memory[addresses]
+            header["address_spaces"] += [{"name": address_space_name, "memory_size": address_space._memory_size}]
+
+        # A file object is used so that numpy does not append the npz extension to the file name
+        with open(config_file, 'wb') as f:
+            numpy.savez_compressed(f, header=numpy.array(json.dumps(header)), **arrays)
+
+    def load_sparse_config_file(self, config_file: str):
+        import json
+        import numpy
+
+        with numpy.load(config_file) as data:
+            header = json.loads(str(data["header"]))
+
+            if header.get("format") != self._sparse_config_format:
+                self.send_message("The file {} is not an I2C config file".format(config_file), "Error")
+                return
+            if header["format_version"] > self._sparse_config_version:
+                self.send_message("The config file was saved with a newer format version ({}) than this one supports ({})".format(header["format_version"], self._sparse_config_version), "Error")
+                return
+            if header["chip"] != self._chip_name:
+                self.send_message("Wrong config file type. It was saved for the chip: {}; expected {}".format(header["chip"], self._chip_name), "Error")
+                return
+            if header["version"] != self._version:
+                self.send_message("Wrong config file type. It was saved for a different version of this chip: {}; expected {}".format(header["version"], self._version), "Error")
+                return
+
+            for idx, address_space_info in enumerate(header["address_spaces"]):
+                address_space_name = address_space_info["name"]
+                if address_space_name not in self._address_space:
+                    self._logger.error("Skipping unknown address space in the config file: {}".format(address_space_name))
+                    continue
+                address_space: Address_Space_Controller = self._address_space[address_space_name]
 
-            for idx in range(size):
-                address_space._display_vars[idx].set(hex_0fill(info[address_space_name][idx], length))
+                config = numpy.frombuffer(address_space._default_memory, dtype=address_space._get_numpy_memory().dtype).copy()
+                config[data["addresses_{}".format(idx)]] = data["values_{}".format(idx)]
+                address_space.set_display_addresses(numpy.arange(address_space._memory_size), config)
+
+        if header["config_hash"] != self.get_config_hash():
+            self.send_message("The loaded configuration does not match the hash stored in the config file", "Error")
 
         self.update_whether_modified()
 
+    #  Bring the chip to the configuration in config_file (or to the currently displayed configuration if no file is given)
+    # by only writing the registers which differ from the chip state. The state known from previous reads and writes is
+    # used, unless read is set in which case the mapped registers are first read back in bulk
+    def apply_config(self, config_file: str = None, read: bool = False, write_check: bool = True, max_gap: int = 4):
+        if config_file is not None:
+            self.load_config(config_file)
+
+        success = True
+        for address_space_name in self._address_space:
+            address_space: Address_Space_Controller = self._address_space[address_space_name]
+            if address_space._i2c_address is None:
+                self._logger.info("Skipping the address space {} because its i2c address is not set".format(address_space_name))
+                continue
+
+            if read:
+                import numpy
+                target = numpy.array(address_space._get_numpy_memory())
+                address_space.read_all()
+                address_space.set_display_addresses(numpy.arange(address_space._memory_size), target)
+
+            self._logger.info("Applying the configuration to the address space: {}".format(address_space_name))
+            if not address_space.write_differences(write_check=write_check, max_gap=max_gap):
+                success = False
+
+        self.update_whether_modified()
+        return success
+
+    async def apply_config_async(self, config_file: str = None, read: bool = False, write_check: bool = True, max_gap: int = 4):
+        if config_file is not None:
+            self.load_config(config_file)
+
+        success = True
+        for address_space_name in self._address_space:
+            address_space: Address_Space_Controller = self._address_space[address_space_name]
+            if address_space._i2c_address is None:
+                self._logger.info("Skipping the address space {} because its i2c address is not set".format(address_space_name))
+                continue
+
+            if read:
+                import numpy
+                target = numpy.array(address_space._get_numpy_memory())
+                await address_space.read_all_async()
+                address_space.set_display_addresses(numpy.arange(address_space._memory_size), target)
+
+            self._logger.info("Applying the configuration to the address space: {}".format(address_space_name))
+            if not await address_space.write_differences_async(write_check=write_check, max_gap=max_gap):
+                success = False
+
+        self.update_whether_modified()
+        return success
+
     def reset_config(self):
         for name in self._address_space:
             self._address_space[name].reset()
@@ -354,10 +494,27 @@ class Base_Chip(GUI_Helper):
         for address_space in self._address_space:
             self.read_all_address_space(address_space)
 
-    def write_all(self, write_check: bool = True):
+    #  By default only the registers modified since they were last read from or written to the chip are written,
+    # only_dirty=False writes all of them, e.g. when the chip lost its configuration without the cache knowing about it
+    def write_all(self, write_check: bool = True, skip_matching: bool = False, only_dirty: bool = True):
+        success = True
+        for address_space in self._address_space:
+            if not self.write_all_address_space(address_space, write_check=write_check, skip_matching=skip_matching, only_dirty=only_dirty):
+                success = False
+
+        return success
+
+    #  The *_async methods do the same as their blocking counterparts, but are awaited from an event loop, so the I2C accesses
+    # of several chips (and any other I/O) can be interleaved without threads, see Connection_Controller.execute_batch_async
+    async def read_all_async(self):
+        for address_space in self._address_space:
+            self._logger.info("Reading full address space: {}".format(address_space))
+            await self._address_space[address_space].read_all_async()
+
+    async def write_all_async(self, write_check: bool = True, skip_matching: bool = False, only_dirty: bool = True):
         success = True
         for address_space in self._address_space:
-            if not self.write_all_address_space(address_space, write_check=write_check):
+            if not await self.write_all_address_space_async(address_space, write_check=write_check, skip_matching=skip_matching, only_dirty=only_dirty):
                 success = False
 
         return success
@@ -370,10 +527,15 @@ class Base_Chip(GUI_Helper):
         address_space: Address_Space_Controller = self._address_space[address_space_name]
         address_space.read_all()
 
-    def write_all_address_space(self, address_space_name: str, write_check: bool = True):
+    def write_all_address_space(self, address_space_name: str, write_check: bool = True, skip_matching: bool = False, only_dirty: bool = True):
         self._logger.info("Writing full address space: {}".format(address_space_name))
         address_space: Address_Space_Controller = self._address_space[address_space_name]
-        return address_space.write_all(write_check=write_check)
+        return address_space.write_all(write_check=write_check, only_dirty=only_dirty, skip_matching=skip_matching)
+
+    async def write_all_address_space_async(self, address_space_name: str, write_check: bool = True, skip_matching: bool = False, only_dirty: bool = True):
+        self._logger.info("Writing full address space: {}".format(address_space_name))
+        address_space: Address_Space_Controller = self._address_space[address_space_name]
+        return await address_space.write_all_async(write_check=write_check, only_dirty=only_dirty, skip_matching=skip_matching)
 
     def read_all_block(self, address_space_name: str, block_name: str, full_array: bool = False):
         self._validate_indexers()
@@ -387,7 +549,19 @@ class Base_Chip(GUI_Helper):
         address_space: Address_Space_Controller = self._address_space[address_space_name]
         address_space.read_block(block_ref)
 
-    def write_all_block(self, address_space_name: str, block_name: str, full_array: bool = False, write_check: bool = True):
+    async def read_all_block_async(self, address_space_name: str, block_name: str, full_array: bool = False):
+        self._validate_indexers()
+        block_ref, _ = self._gen_block_ref_from_indexers(
+            address_space_name=address_space_name,
+            block_name=block_name,
+            full_array=full_array,
+        )
+
+        self.send_message("Reading block {} from address space {} of chip {}".format(block_ref, address_space_name, self._chip_name))
+        address_space: Address_Space_Controller = self._address_space[address_space_name]
+        await address_space.read_block_async(block_ref)
+
+    def write_all_block(self, address_space_name: str, block_name: str, full_array: bool = False, write_check: bool = True, skip_matching: bool = False, only_dirty: bool = True):
         self._validate_indexers()
         block_ref, _ = self._gen_block_ref_from_indexers(
             address_space_name=address_space_name,
@@ -397,7 +571,19 @@ class Base_Chip(GUI_Helper):
 
         self.send_message("Writing block {} from address space {} of chip {}".format(block_ref, address_space_name, self._chip_name))
         address_space: Address_Space_Controller = self._address_space[address_space_name]
-        return address_space.write_block(block_ref, write_check=write_check)
+        return address_space.write_block(block_ref, write_check=write_check, only_dirty=only_dirty, skip_matching=skip_matching)
+
+    async def write_all_block_async(self, address_space_name: str, block_name: str, full_array: bool = False, write_check: bool = True, skip_matching: bool = False, only_dirty: bool = True):
+        self._validate_indexers()
+        block_ref, _ = self._gen_block_ref_from_indexers(
+            address_space_name=address_space_name,
+            block_name=block_name,
+            full_array=full_array,
+        )
+
+        self.send_message("Writing block {} from address space {} of chip {}".format(block_ref, address_space_name, self._chip_name))
+        address_space: Address_Space_Controller = self._address_space[address_space_name]
+        return await address_space.write_block_async(block_ref, write_check=write_check, only_dirty=only_dirty, skip_matching=skip_matching)
 
     def _gen_block_ref_from_indexers(self, address_space_name: str, block_name: str, full_array: bool):
         block_ref = block_name
@@ -445,6 +631,19 @@ class Base_Chip(GUI_Helper):
         address_space: Address_Space_Controller = self._address_space[address_space_name]
         address_space.read_register(block_ref, register)
 
+    async def read_register_async(self, address_space_name: str, block_name: str, register: str, no_message: bool = False):
+        self._validate_indexers()
+        block_ref, _ = self._gen_block_ref_from_indexers(
+            address_space_name=address_space_name,
+            block_name=block_name,
+            full_array=False,
+        )
+
+        if not no_message:
+            self.send_message("Reading register {} from block {} of address space {} of chip {}".format(register, block_ref, address_space_name, self._chip_name))
+        address_space: Address_Space_Controller = self._address_space[address_space_name]
+        await address_space.read_register_async(block_ref, register)
+
     def write_register(self, address_space_name: str, block_name: str, register: str, write_check: bool = True, no_message: bool = False):
         self._validate_indexers()
         block_ref, _ = self._gen_block_ref_from_indexers(
@@ -458,6 +657,19 @@ class Base_Chip(GUI_Helper):
         address_space: Address_Space_Controller = self._address_space[address_space_name]
         return address_space.write_register(block_ref, register, write_check=write_check)
 
+    async def write_register_async(self, address_space_name: str, block_name: str, register: str, write_check: bool = True, no_message: bool = False):
+        self._validate_indexers()
+        block_ref, _ = self._gen_block_ref_from_indexers(
+            address_space_name=address_space_name,
+            block_name=block_name,
+            full_array=False,
+        )
+
+        if not no_message:
+            self.send_message("Writing register {} from block {} of address space {} of chip {}".format(register, block_ref, address_space_name, self._chip_name))
+        address_space: Address_Space_Controller = self._address_space[address_space_name]
+        return await address_space.write_register_async(block_ref, register, write_check=write_check)
+
     def read_decoded_value(self, address_space_name: str, block_name: str, decoded_value_name: str, no_message: bool = False):
         value_info = self._register_decoding[address_space_name]['Register Blocks'][block_name][decoded_value_name]
 
@@ -468,9 +680,29 @@ class Base_Chip(GUI_Helper):
     def write_decoded_value(self, address_space_name: str, block_name: str, decoded_value_name: str, write_check: bool = True, no_message: bool = False):
         value_info = self._register_decoding[address_space_name]['Register Blocks'][block_name][decoded_value_name]
 
+        success = True
         for position in value_info['position']:
             register = position[0]
-            self.write_register(address_space_name, block_name, register, write_check, no_message=no_message)
+            if not self.write_register(address_space_name, block_name, register, write_check, no_message=no_message):
+                success = False
+
+        return success
+
+    async def read_decoded_value_async(self, address_space_name: str, block_name: str, decoded_value_name: str, no_message: bool = False):
+        value_info = self._register_decoding[address_space_name]['Register Blocks'][block_name][decoded_value_name]
+
+        for position in value_info['position']:
+            await self.read_register_async(address_space_name, block_name, position[0], no_message=no_message)
+
+    async def write_decoded_value_async(self, address_space_name: str, block_name: str, decoded_value_name: str, write_check: bool = True, no_message: bool = False):
+        value_info = self._register_decoding[address_space_name]['Register Blocks'][block_name][decoded_value_name]
+
+        success = True
+        for position in value_info['position']:
+            if not await self.write_register_async(address_space_name, block_name, position[0], write_check, no_message=no_message):
+                success = False
+
+        return success
 
     def tab_needs_canvas(self, tab: str):
         return self._tabs[tab]["canvas"]
@@ -515,6 +747,12 @@ class Base_Chip(GUI_Helper):
 
         return self._address_space[address_space].get_decoded_display_var(block_ref + "/" + var_name)
 
+    def get_decoded_value_array(self, address_space, block_name, var_name, block_refs: list[str] = None):
+        return self._address_space[address_space].get_decoded_value_array(block_name, var_name, block_refs)
+
+    def set_decoded_value_array(self, address_space, block_name, var_name, values, block_refs: list[str] = None):
+        self._address_space[address_space].set_decoded_value_array(block_name, var_name, values, block_refs)
+
     def build_block_interface(self,
                               element: tk.Tk,
                               title: str,
@@ -29,8 +29,12 @@ if TYPE_CHECKING:
 from .base_chip import Base_Chip
 from ..gui_helper import GUI_Helper
 
-import tkinter as tk
-import tkinter.ttk as ttk  # For themed widgets (gives a more native visual to the elements)
+try:
+    import tkinter as tk
+    import tkinter.ttk as ttk  # For themed widgets (gives a more native visual to the elements)
+except ImportError:
+    tk = None
+    ttk = None
 import logging
 
 etroc1_version = "0.0.1"
@@ -30,8 +30,12 @@ from .base_chip import Base_Chip
 from ..gui_helper import GUI_Helper
 from .address_space_controller import Address_Space_Controller
 
-import tkinter as tk
-import tkinter.ttk as ttk  # For themed widgets (gives a more native visual to the elements)
+try:
+    import tkinter as tk
+    import tkinter.ttk as ttk  # For themed widgets (gives a more native visual to the elements)
+except ImportError:
+    tk = None
+    ttk = None
 import logging
 
 etroc2_version = "0.0.1"
@@ -1670,6 +1674,7 @@ class ETROC2_Chip(Base_Chip):
 
         self._i2c_address = None
         self._waveform_sampler_i2c_address = None
+        self._broadcast_images = {}  # Map from block name to the {offset: value} registers last written with a broadcast
 
         from .waveform_sampler_helper import Waveform_Sampler_Helper
         self._ws_helper = Waveform_Sampler_Helper(self)
@@ -1785,58 +1790,98 @@ class ETROC2_Chip(Base_Chip):
     #  Since there is the broadcast feature, we can not allow to write a full adress space
     # because the broadcast feature would overwrite previous addresses, so we write in blocks
     # since they do not cover the broadcast range
-    def write_all_address_space(self, address_space_name: str, write_check: bool = True):
+    def write_all_address_space(self, address_space_name: str, write_check: bool = True, skip_matching: bool = False, only_dirty: bool = True):
         if address_space_name == "ETROC2":
             self._logger.info("Writing full address space: {}".format(address_space_name))
             success = True
             broadcast_backup = self._indexer_vars['broadcast']['variable'].get()
             for block in self._register_model[address_space_name]["Register Blocks"]:
                 self._indexer_vars['broadcast']['variable'].set(broadcast_backup)
-                if not self.write_all_block(address_space_name, block, full_array=True, write_check=write_check):
+                if not self.write_all_block(address_space_name, block, full_array=True, write_check=write_check, skip_matching=skip_matching, only_dirty=only_dirty):
                     success = False
             return success
         else:
-            return super().write_all_address_space(address_space_name, write_check=write_check)
+            return super().write_all_address_space(address_space_name, write_check=write_check, skip_matching=skip_matching, only_dirty=only_dirty)
 
-    #  We need to overload the write block method so that we intercept the call for the broadcast feature
-    def write_all_block(self, address_space_name: str, block_name: str, full_array: bool = False, write_check: bool = True):
+    async def write_all_address_space_async(self, address_space_name: str, write_check: bool = True, skip_matching: bool = False, only_dirty: bool = True):
+        if address_space_name == "ETROC2":
+            self._logger.info("Writing full address space: {}".format(address_space_name))
+            success = True
+            broadcast_backup = self._indexer_vars['broadcast']['variable'].get()
+            for block in self._register_model[address_space_name]["Register Blocks"]:
+                self._indexer_vars['broadcast']['variable'].set(broadcast_backup)
+                if not await self.write_all_block_async(address_space_name, block, full_array=True, write_check=write_check, skip_matching=skip_matching, only_dirty=only_dirty):
+                    success = False
+            return success
+        else:
+            return await super().write_all_address_space_async(address_space_name, write_check=write_check, skip_matching=skip_matching, only_dirty=only_dirty)
+
+    def _is_broadcast_write(self, address_space_name: str, block_name: str):
         broadcast = self._indexer_vars['broadcast']['variable'].get()
-        if address_space_name == "ETROC2" and "Indexer" in self._register_model[address_space_name]["Register Blocks"][block_name] and broadcast == "1":
-            block_ref, params = self._gen_block_ref_from_indexers(
-                address_space_name=address_space_name,
-                block_name=block_name,
-                full_array=False,  # Always specifically set to false since we always want to address a single "element" of the array due to the broadcast feature
+        return address_space_name == "ETROC2" and "Indexer" in self._register_model[address_space_name]["Register Blocks"][block_name] and broadcast == "1"
+
+    #  Copy the displayed values of the registers at the given offsets of the selected pixel into the broadcast
+    # addresses, which stay writable until _finish_broadcast. Returns the broadcast base address of the block
+    def _prepare_broadcast(self, block_name: str, offsets: list[int], new_image: bool = False):
+        block_ref, params = self._gen_block_ref_from_indexers(
+            address_space_name="ETROC2",
+            block_name=block_name,
+            full_array=False,  # Always specifically set to false since we always want to address a single "element" of the array due to the broadcast feature
+        )
+        params['broadcast'] = True
+
+        # Fetch the base address for the broadcast block array
+        broadcast_base_address = etroc2_column_row_to_base_address(**params)
+
+        address_space: Address_Space_Controller = self._address_space["ETROC2"]
+        displayed_block_info = address_space._blocks[block_ref]
+
+        if new_image or block_name not in self._broadcast_images:
+            self._broadcast_images[block_name] = {}
+
+        # Copy values from displayed variables into the broadcast address space for writing out
+        for offset in offsets:
+            displayed_address = displayed_block_info["Base Address"] + offset
+            broadcast_address = broadcast_base_address + offset
+            address_space.set_display_value(
+                broadcast_address,
+                address_space.get_display_value(displayed_address)
             )
-            params['broadcast'] = True
+            self._broadcast_images[block_name][offset] = address_space.get_display_value(displayed_address)
 
-            self.send_message("Broadcast writing block {} from address space {} of chip {}".format(block_ref, address_space_name, self._chip_name))
+            # Temporarily disable the read-only property on the broadcast address
+            address_space._read_only_map[broadcast_address] = False
 
-            # Fetch the base address for the broadcast block array
-            broadcast_base_address = etroc2_column_row_to_base_address(**params)
+        return broadcast_base_address
 
-            address_space: Address_Space_Controller = self._address_space[address_space_name]
-            displayed_block_info = address_space._blocks[block_ref]
-            block_length = displayed_block_info["Length"]
+    def _finish_broadcast(self, block_name: str, broadcast_base_address: int, offsets: list[int], return_status: bool):
+        address_space: Address_Space_Controller = self._address_space["ETROC2"]
 
-            # Copy values from displayed variables into the broadcast address space for writing out
-            for offset in range(block_length):
-                displayed_address = displayed_block_info["Base Address"] + offset
-                broadcast_address = broadcast_base_address + offset
-                address_space._display_vars[broadcast_address].set(
-                    address_space._display_vars[displayed_address].get()
-                )
+        # Re-enable the read-only on the broadcast address
+        for offset in offsets:
+            address_space._read_only_map[broadcast_base_address + offset] = True
 
-                # Temporarily disable the read-only property on the broadcast address
-                address_space._read_only_map[broadcast_address] = False
+        self._update_broadcast_copies(block_name, {offset: self._broadcast_images[block_name][offset] for offset in offsets}, return_status)
 
-            return_status = address_space.write_memory_block(broadcast_base_address, block_length, write_check=write_check)
+    def _get_register_offset(self, block_name: str, register: str):
+        return self._register_model["ETROC2"]["Register Blocks"][block_name]['Registers'][register]['offset']
 
-            # Re-enable the read-only on the broadcast address
-            for offset in range(block_length):
-                broadcast_address = broadcast_base_address + offset
-                address_space._read_only_map[broadcast_address] = True
+    #  We need to overload the write block method so that we intercept the call for the broadcast feature
+    def write_all_block(self, address_space_name: str, block_name: str, full_array: bool = False, write_check: bool = True, skip_matching: bool = False, only_dirty: bool = True, verify_broadcast: bool = False):
+        if self._is_broadcast_write(address_space_name, block_name):
+            block_ref, _ = self._gen_block_ref_from_indexers(address_space_name=address_space_name, block_name=block_name, full_array=False)
+            self.send_message("Broadcast writing block {} from address space {} of chip {}".format(block_ref, address_space_name, self._chip_name))
+
+            address_space: Address_Space_Controller = self._address_space[address_space_name]
+            offsets = list(range(address_space._blocks[block_ref]["Length"]))
+            broadcast_base_address = self._prepare_broadcast(block_name, offsets, new_image=True)
 
-            # TODO: Validate broadcast write
+            return_status = address_space.write_memory_block(broadcast_base_address, len(offsets), write_check=write_check)
+
+            self._finish_broadcast(block_name, broadcast_base_address, offsets, return_status)
+
+            if verify_broadcast and return_status:
+                return_status = self._check_broadcast(block_name)
 
             self._indexer_vars['broadcast']['variable'].set("0")
             return return_status
@@ -1847,51 +1892,91 @@ class ETROC2_Chip(Base_Chip):
                 block_name=block_name,
                 full_array=full_array,
                 write_check=write_check,
+                skip_matching=skip_matching,
+                only_dirty=only_dirty,
             )
 
-    #  We need to overload the write register method so that we intercept the call for the broadcast feature
-    def write_register(self, address_space_name: str, block_name: str, register: str, write_check: bool = True, no_message: bool = False):
-        broadcast = self._indexer_vars['broadcast']['variable'].get()
-        if address_space_name == "ETROC2" and "Indexer" in self._register_model[address_space_name]["Register Blocks"][block_name] and broadcast == "1":
-            block_ref, params = self._gen_block_ref_from_indexers(
+    async def write_all_block_async(self, address_space_name: str, block_name: str, full_array: bool = False, write_check: bool = True, skip_matching: bool = False, only_dirty: bool = True, verify_broadcast: bool = False):
+        if self._is_broadcast_write(address_space_name, block_name):
+            block_ref, _ = self._gen_block_ref_from_indexers(address_space_name=address_space_name, block_name=block_name, full_array=False)
+            self.send_message("Broadcast writing block {} from address space {} of chip {}".format(block_ref, address_space_name, self._chip_name))
+
+            address_space: Address_Space_Controller = self._address_space[address_space_name]
+            offsets = list(range(address_space._blocks[block_ref]["Length"]))
+            broadcast_base_address = self._prepare_broadcast(block_name, offsets, new_image=True)
+
+            return_status = await address_space.write_memory_addresses_async([broadcast_base_address + offset for offset in offsets], write_check=write_check, only_dirty=False)
+
+            self._finish_broadcast(block_name, broadcast_base_address, offsets, return_status)
+
+            if verify_broadcast and return_status:
+                return_status = await self._check_broadcast_async(block_name)
+
+            self._indexer_vars['broadcast']['variable'].set("0")
+            return return_status
+        else:
+            self._indexer_vars['broadcast']['variable'].set("0")
+            return await super().write_all_block_async(
                 address_space_name=address_space_name,
                 block_name=block_name,
-                full_array=False,
+                full_array=full_array,
+                write_check=write_check,
+                skip_matching=skip_matching,
+                only_dirty=only_dirty,
             )
-            params['broadcast'] = True
 
+    #  We need to overload the write register method so that we intercept the call for the broadcast feature
+    def write_register(self, address_space_name: str, block_name: str, register: str, write_check: bool = True, no_message: bool = False, verify_broadcast: bool = False):
+        if self._is_broadcast_write(address_space_name, block_name):
             if not no_message:
+                block_ref, _ = self._gen_block_ref_from_indexers(address_space_name=address_space_name, block_name=block_name, full_array=False)
                 self.send_message("Broadcast writing register {} from block {} of address space {} of chip {}".format(register, block_ref, address_space_name, self._chip_name))
 
-            # Fetch the base address for the broadcast block array
-            broadcast_base_address = etroc2_column_row_to_base_address(**params)
-            offset = self._register_model[address_space_name]["Register Blocks"][block_name]['Registers'][register]['offset']
-            broadcast_address = broadcast_base_address + offset
+            offsets = [self._get_register_offset(block_name, register)]
+            broadcast_base_address = self._prepare_broadcast(block_name, offsets)
 
             address_space: Address_Space_Controller = self._address_space[address_space_name]
-            displayed_block_info = address_space._blocks[block_ref]
-            displayed_address = displayed_block_info["Base Address"] + offset
+            return_status = address_space.write_memory_register(broadcast_base_address + offsets[0], write_check=write_check)
+
+            self._finish_broadcast(block_name, broadcast_base_address, offsets, return_status)
 
-            # Copy values from displayed variable into the broadcast address for writing out
-            address_space._display_vars[broadcast_address].set(
-                address_space._display_vars[displayed_address].get()
+            if verify_broadcast and return_status:
+                return_status = self._check_broadcast(block_name, offsets=offsets)
+
+            self._indexer_vars['broadcast']['variable'].set("0")
+            return return_status
+        else:
+            self._indexer_vars['broadcast']['variable'].set("0")
+            return super().write_register(
+                address_space_name=address_space_name,
+                block_name=block_name,
+                register=register,
+                write_check=write_check,
+                no_message=no_message,
             )
 
-            # Temporarily disable the read-only property on the broadcast address
-            address_space._read_only_map[broadcast_address] = False
+    async def write_register_async(self, address_space_name: str, block_name: str, register: str, write_check: bool = True, no_message: bool = False, verify_broadcast: bool = False):
+        if self._is_broadcast_write(address_space_name, block_name):
+            if not no_message:
+                block_ref, _ = self._gen_block_ref_from_indexers(address_space_name=address_space_name, block_name=block_name, full_array=False)
+                self.send_message("Broadcast writing register {} from block {} of address space {} of chip {}".format(register, block_ref, address_space_name, self._chip_name))
+
+            offsets = [self._get_register_offset(block_name, register)]
+            broadcast_base_address = self._prepare_broadcast(block_name, offsets)
 
-            return_status = address_space.write_memory_register(broadcast_address, write_check=write_check)
+            address_space: Address_Space_Controller = self._address_space[address_space_name]
+            return_status = await address_space.write_memory_register_async(broadcast_base_address + offsets[0], write_check=write_check)
 
-            # Re-enable the read-only on the broadcast address
-            address_space._read_only_map[broadcast_address] = True
+            self._finish_broadcast(block_name, broadcast_base_address, offsets, return_status)
 
-            # TODO: Validate broadcast write
+            if verify_broadcast and return_status:
+                return_status = await self._check_broadcast_async(block_name, offsets=offsets)
 
             self._indexer_vars['broadcast']['variable'].set("0")
             return return_status
         else:
             self._indexer_vars['broadcast']['variable'].set("0")
-            return super().write_register(
+            return await super().write_register_async(
                 address_space_name=address_space_name,
                 block_name=block_name,
                 register=register,
@@ -1900,15 +1985,25 @@ class ETROC2_Chip(Base_Chip):
             )
 
     #  We need to overload the write register method so that we intercept the call for the broadcast feature
-    def write_decoded_value(self, address_space_name: str, block_name: str, decoded_value_name: str, write_check: bool = True, no_message: bool = False):
-        broadcast = self._indexer_vars['broadcast']['variable'].get()
-        if address_space_name == "ETROC2" and "Indexer" in self._register_model[address_space_name]["Register Blocks"][block_name] and broadcast == "1":
+    def write_decoded_value(self, address_space_name: str, block_name: str, decoded_value_name: str, write_check: bool = True, no_message: bool = False, verify_broadcast: bool = False):
+        if self._is_broadcast_write(address_space_name, block_name):
+            broadcast = self._indexer_vars['broadcast']['variable'].get()
             value_info = self._register_decoding[address_space_name]['Register Blocks'][block_name][decoded_value_name]
 
+            #  The registers are verified together after the last one is written, with a single readback of the pixels
+            return_status = True
+            offsets = []
             for position in value_info['position']:
                 self._indexer_vars['broadcast']['variable'].set(broadcast)
                 register = position[0]
-                self.write_register(address_space_name, block_name, register, write_check, no_message=no_message)
+                if not self.write_register(address_space_name, block_name, register, write_check, no_message=no_message):
+                    return_status = False
+                offsets += [self._get_register_offset(block_name, register)]
+
+            if verify_broadcast and return_status:
+                return_status = self._check_broadcast(block_name, offsets=offsets)
+
+            return return_status
         else:
             self._indexer_vars['broadcast']['variable'].set("0")
             return super().write_decoded_value(
@@ -1919,6 +2014,221 @@ class ETROC2_Chip(Base_Chip):
                 no_message=no_message,
             )
 
+    async def write_decoded_value_async(self, address_space_name: str, block_name: str, decoded_value_name: str, write_check: bool = True, no_message: bool = False, verify_broadcast: bool = False):
+        if self._is_broadcast_write(address_space_name, block_name):
+            broadcast = self._indexer_vars['broadcast']['variable'].get()
+            value_info = self._register_decoding[address_space_name]['Register Blocks'][block_name][decoded_value_name]
+
+            return_status = True
+            offsets = []
+            for position in value_info['position']:
+                self._indexer_vars['broadcast']['variable'].set(broadcast)
+                register = position[0]
+                if not await self.write_register_async(address_space_name, block_name, register, write_check, no_message=no_message):
+                    return_status = False
+                offsets += [self._get_register_offset(block_name, register)]
+
+            if verify_broadcast and return_status:
+                return_status = await self._check_broadcast_async(block_name, offsets=offsets)
+
+            return return_status
+        else:
+            self._indexer_vars['broadcast']['variable'].set("0")
+            return await super().write_decoded_value_async(
+                address_space_name=address_space_name,
+                block_name=block_name,
+                decoded_value_name=decoded_value_name,
+                write_check=write_check,
+                no_message=no_message,
+            )
+
+    #  A broadcast write changes the registers of every pixel, so the cached copy of the pixel registers is updated to
+    # match: after a successful write every pixel holds (and displays) the broadcast values, otherwise their content is
+    # unknown and they are marked as modified, so later dirty-only or skip_matching writes do not skip them
+    def _update_broadcast_copies(self, block_name: str, image: dict[int, int], success: bool):
+        address_space: Address_Space_Controller = self._address_space["ETROC2"]
+        block_refs = self._get_pixel_matrix_block_refs(block_name)
+        addresses = []
+        values = []
+        for base_address in address_space._get_block_array_addresses(block_name, block_refs):
+            for offset, value in image.items():
+                addresses += [base_address + offset]
+                values += [value]
+
+        if success:
+            for address, value in zip(addresses, values):
+                address_space._memory[address] = value
+                address_space._memory_valid[address] = 1
+            address_space.set_display_addresses(addresses, values)
+            for address in addresses:
+                address_space._dirty[address] = 0
+                address_space._update_modified(address)
+        else:
+            for address in addresses:
+                address_space._memory_valid[address] = 0
+                address_space._dirty[address] = 1
+                address_space._update_modified(address)
+        self.update_whether_modified()
+
+    #  Check that the registers written with broadcasts reached every pixel. The whole block array is read back
+    # in a single transfer and compared with the broadcast image (by default the values of the last broadcasts to
+    # the block, otherwise image is a {offset: value} dictionary). Only registers in the image are compared, and
+    # only offsets if given. Returns, for each decoded value which uses those registers, a 16x16 boolean numpy
+    # array indexed as [row, column] which is True for the pixels where the value does not match the image
+    def verify_broadcast(self, block_name: str = "Pixel Config", image: dict[int, int] = None, offsets: list[int] = None, read: bool = True):
+        image = self._get_broadcast_image(block_name, image, offsets)
+
+        if read:
+            address_space: Address_Space_Controller = self._address_space["ETROC2"]
+            address_space.read_memory_addresses(self._get_broadcast_readback_addresses(block_name, image), max_gap=address_space._read_plan_max_gap)
+
+        return self._compare_broadcast(block_name, image)
+
+    async def verify_broadcast_async(self, block_name: str = "Pixel Config", image: dict[int, int] = None, offsets: list[int] = None, read: bool = True):
+        image = self._get_broadcast_image(block_name, image, offsets)
+
+        if read:
+            address_space: Address_Space_Controller = self._address_space["ETROC2"]
+            await address_space.read_memory_addresses_async(self._get_broadcast_readback_addresses(block_name, image), max_gap=address_space._read_plan_max_gap)
+
+        return self._compare_broadcast(block_name, image)
+
+    def _get_broadcast_image(self, block_name: str, image: dict[int, int] = None, offsets: list[int] = None):
+        if image is None:
+            if block_name not in self._broadcast_images:
+                raise RuntimeError("There was no broadcast write to the block {}, so there is nothing to verify".format(block_name))
+            image = self._broadcast_images[block_name]
+        if offsets is not None:
+            image = {offset: image[offset] for offset in offsets if offset in image}
+        return image
+
+    #  All the pixels are read back in a single batch, which is a single transfer when the image covers the whole block
+    def _get_broadcast_readback_addresses(self, block_name: str, image: dict[int, int]):
+        address_space: Address_Space_Controller = self._address_space["ETROC2"]
+        base_addresses = address_space._get_block_array_addresses(block_name, self._get_pixel_matrix_block_refs(block_name))
+        return [int(base_address) + offset for base_address in base_addresses for offset in image]
+
+    def _compare_broadcast(self, block_name: str, image: dict[int, int]):
+        import numpy
+
+        address_space: Address_Space_Controller = self._address_space["ETROC2"]
+        block_refs = self._get_pixel_matrix_block_refs(block_name)
+        base_addresses = numpy.array(address_space._get_block_array_addresses(block_name, block_refs), dtype=numpy.int64)
+
+        memory = address_space._get_numpy_memory()
+        differences = {offset: memory[base_addresses + offset] ^ value for offset, value in image.items()}
+
+        mismatches = {}
+        for field in self._register_decoding["ETROC2"]["Register Blocks"][block_name]:
+            fields = [field_info for field_info in address_space._decoded_fields[block_name + "/" + field] if field_info[0] in differences]
+            if len(fields) == 0:
+                continue
+
+            mismatch = numpy.zeros(len(block_refs), dtype=bool)
+            for offset, register_shift, mask, _ in fields:
+                mismatch |= ((differences[offset] >> register_shift) & mask) != 0
+            mismatches[field] = numpy.reshape(mismatch, (16, 16))
+        return mismatches
+
+    def _check_broadcast(self, block_name: str, offsets: list[int] = None):
+        return self._report_broadcast_mismatches(block_name, self.verify_broadcast(block_name, offsets=offsets))
+
+    async def _check_broadcast_async(self, block_name: str, offsets: list[int] = None):
+        return self._report_broadcast_mismatches(block_name, await self.verify_broadcast_async(block_name, offsets=offsets))
+
+    def _report_broadcast_mismatches(self, block_name: str, mismatches: dict):
+        import numpy
+        bad_pixels = numpy.zeros((16, 16), dtype=bool)
+        for field in mismatches:
+            bad_pixels |= mismatches[field]
+
+        if bad_pixels.any():
+            bad_fields = [field for field in mismatches if mismatches[field].any()]
+            self.send_message("The broadcast write to block {} did not reach {} pixels, the mismatched values are: {}".format(block_name, numpy.count_nonzero(bad_pixels), ", ".join(bad_fields)), "Error")
+            return False
+        return True
+
+    #  The pixel matrix methods handle a decoded pixel value for all the pixels at once, as a 16x16 numpy
+    # array indexed as [row, column], and only do I2C transfers for the registers which hold the values
+    def _get_pixel_matrix_block_refs(self, block_name: str):
+        return ["{}:{}:{}".format(block_name, column, row) for row in range(16) for column in range(16)]
+
+    def _get_pixel_matrix_block_name(self, field: str):
+        for block_name in ["Pixel Config", "Pixel Status"]:
+            if field in self._register_decoding["ETROC2"]["Register Blocks"][block_name]:
+                return block_name
+        raise RuntimeError("Unknown ETROC2 pixel value: {}".format(field))
+
+    def _get_pixel_matrix_addresses(self, block_name: str, fields: list[str]):
+        registers = self._register_model["ETROC2"]["Register Blocks"][block_name]["Registers"]
+        decoding = self._register_decoding["ETROC2"]["Register Blocks"][block_name]
+
+        offsets = sorted(set(registers[position[0]]['offset'] for field in fields for position in decoding[field]['position']))
+
+        addresses = []
+        for row in range(16):
+            for column in range(16):
+                base_address = etroc2_column_row_to_base_address(block_name, column, row)
+                addresses += [base_address + offset for offset in offsets]
+        return addresses
+
+    def get_pixel_matrix(self, fields, read: bool = True, max_gap: int = 0):
+        import numpy
+
+        single_field = isinstance(fields, str)
+        if single_field:
+            fields = [fields]
+
+        block_fields = {}
+        for field in fields:
+            block_name = self._get_pixel_matrix_block_name(field)
+            if block_name not in block_fields:
+                block_fields[block_name] = []
+            block_fields[block_name] += [field]
+
+        address_space: Address_Space_Controller = self._address_space["ETROC2"]
+        if read:
+            for block_name in block_fields:
+                address_space.read_memory_addresses(self._get_pixel_matrix_addresses(block_name, block_fields[block_name]), max_gap=max_gap)
+
+        matrices = {}
+        for block_name in block_fields:
+            block_refs = self._get_pixel_matrix_block_refs(block_name)
+            for field in block_fields[block_name]:
+                values = address_space.get_decoded_value_array(block_name, field, block_refs)
+                matrices[field] = numpy.reshape(values, (16, 16))
+
+        if single_field:
+            return matrices[fields[0]]
+        return matrices
+
+    #  fields is either the name of a Pixel Config value, with values being a 16x16 array (or a single value for all pixels),
+    # or a dictionary with a 16x16 array for each value to set
+    def set_pixel_matrix(self, fields, values = None, write: bool = True, write_check: bool = True, max_gap: int = None):
+        import numpy
+
+        if isinstance(fields, str):
+            fields = {fields: values}
+
+        address_space: Address_Space_Controller = self._address_space["ETROC2"]
+        block_refs = self._get_pixel_matrix_block_refs("Pixel Config")
+        for field in fields:
+            if self._get_pixel_matrix_block_name(field) != "Pixel Config":
+                raise RuntimeError("Only ETROC2 Pixel Config values can be set, {} is not one of them".format(field))
+            field_values = numpy.broadcast_to(numpy.asarray(fields[field]), (16, 16))
+            address_space.set_decoded_value_array("Pixel Config", field, numpy.reshape(field_values, 256), block_refs)
+
+        if not write:
+            return True
+
+        #  By default the gaps between the registers of neighbouring pixels are bridged (only where the chip is known to
+        # already hold the values), so the changed pixels are streamed as a few block transfers instead of one per register.
+        # Bridging sends more bytes over the bus, a smaller max_gap trades transfers for bytes
+        addresses = self._get_pixel_matrix_addresses("Pixel Config", list(fields))
+        if max_gap is None:
+            max_gap = address_space._blocks[block_refs[0]]["Length"]  # The distance between the blocks of two pixels
+        return address_space.write_memory_addresses(addresses, write_check=write_check, skip_matching=True, max_gap=max_gap)
+
     def config_i2c_address(self, address):
         self._i2c_address = address
 
@@ -0,0 +1,170 @@
+#############################################################################
+# zlib License
+#
+# (C) 2023 Cristóvão Beirão da Cruz e Silva <cbeiraod@cern.ch>
+#
+# This software is provided 'as-is', without any express or implied
+# warranty.  In no event will the authors be held liable for any damages
+# arising from the use of this software.
+#
+# Permission is granted to anyone to use this software for any purpose,
+# including commercial applications, and to alter it and redistribute it
+# freely, subject to the following restrictions:
+#
+# 1. The origin of this software must not be misrepresented; you must not
+#    claim that you wrote the original software. If you use this software
+#    in a product, an acknowledgment in the product documentation would be
+#    appreciated but is not required.
+# 2. Altered source versions must be plainly marked as such, and must not be
+#    misrepresented as being the original software.
+# 3. This notice may not be removed or altered from any source distribution.
+#############################################################################
+
+from __future__ import annotations
+
+from ..emulator_helper import Emulated_Memory
+from .etroc2_chip import register_model
+from .etroc2_chip import register_decoding
+from .etroc2_chip import etroc2_column_row_to_base_address
+
+import math
+import random
+
+#  Emulation of the ETROC2 registers:
+#   - a write to a broadcast pixel config address is applied to the same register of all the pixels (the column
+#     and row of the broadcast address are ignored) and is also kept at the broadcast address, so it can be read back
+#   - the status registers are read-only and PixelID holds the column and row of each pixel
+#   - the threshold calibration runs on the rising edge of ScanStart_THCal while RSTn_THCal and CLKEn_THCal are set,
+#     it finishes right away (the scan takes less than 1 ms on the chip, less than a single I2C access) with ScanDone set
+#     and BL/NW close to the baseline and noise width of the pixel, which are drawn at construction from the seed
+#   - TH follows the calibration: BL + TH_offset, or DAC when the calibration is bypassed
+class Emulated_ETROC2(Emulated_Memory):
+    _pixel_size = 32  # Number of registers of each pixel block, i.e. the address bits below the row
+
+    def __init__(self, seed: int = 0, baseline_mean: float = 500, baseline_spread: float = 20, noise_width_range: tuple[int, int] = (1, 6)):
+        super().__init__(register_model["ETROC2"])
+
+        def fields(block, value):
+            return self._compile_decoded_fields(block, register_decoding["ETROC2"]["Register Blocks"][block][value])
+
+        self._config_fields = {value: fields("Pixel Config", value) for value in ["RSTn_THCal", "ScanStart_THCal", "CLKEn_THCal", "Bypass_THCal", "DAC", "TH_offset"]}
+        self._status_fields = {value: fields("Pixel Status", value) for value in ["PixelID", "ScanDone", "BL", "NW", "TH"]}
+        self._calibration_offsets = set(offset for value in self._config_fields.values() for offset, _, _, _ in value)
+
+        self._rng = random.Random(seed)
+        self._baselines = {}
+        self._noise_widths = {}
+        self._scan_start = {}
+        for column in range(16):
+            for row in range(16):
+                self._baselines[(column, row)] = int(round(self._rng.gauss(baseline_mean, baseline_spread)))
+                self._noise_widths[(column, row)] = self._rng.randint(*noise_width_range)
+                self._scan_start[(column, row)] = False
+                self.set_field(etroc2_column_row_to_base_address("Pixel Status", column, row), self._status_fields["PixelID"], (column << 4) | row)
+
+        # The whole pixel status blocks are read-only, including the unused registers and the broadcast copies
+        for column in range(16):
+            for row in range(16):
+                for broadcast in [False, True]:
+                    base_address = etroc2_column_row_to_base_address("Pixel Status", column, row, broadcast)
+                    self._read_only_map[base_address:base_address + self._pixel_size] = b'\x01' * self._pixel_size
+
+    @property
+    def baselines(self):
+        return self._baselines
+
+    @property
+    def noise_widths(self):
+        return self._noise_widths
+
+    #  Inverse of etroc2_column_row_to_base_address, returns None for the addresses outside of the pixel matrix
+    def _decode_pixel_address(self, address: int):
+        if not address & 0x8000:
+            return None
+        block = "Pixel Status" if address & 0x4000 else "Pixel Config"
+        return block, (address >> 9) & 0xf, (address >> 5) & 0xf, bool(address & 0x2000), address % self._pixel_size
+
+    def _write_register(self, address: int, value: int):
+        pixel = self._decode_pixel_address(address)
+        if pixel is None or pixel[0] != "Pixel Config" or not pixel[3]:
+            super()._write_register(address, value)
+            return
+
+        self._memory[address] = value & 0xff
+        for column in range(16):
+            for row in range(16):
+                super()._write_register(etroc2_column_row_to_base_address("Pixel Config", column, row) + pixel[4], value)
+
+    def _register_written(self, address: int, old_value: int):
+        pixel = self._decode_pixel_address(address)
+        if pixel is None or pixel[0] != "Pixel Config" or pixel[4] not in self._calibration_offsets:
+            return
+        _, column, row, _, _ = pixel
+
+        config_base = etroc2_column_row_to_base_address("Pixel Config", column, row)
+        status_base = etroc2_column_row_to_base_address("Pixel Status", column, row)
+
+        scan_start = self.get_field(config_base, self._config_fields["ScanStart_THCal"]) == 1
+        rising_edge = scan_start and not self._scan_start[(column, row)]
+        self._scan_start[(column, row)] = scan_start
+
+        if self.get_field(config_base, self._config_fields["RSTn_THCal"]) == 0:
+            for value in ["ScanDone", "BL", "NW"]:
+                self.set_field(status_base, self._status_fields[value], 0)
+        elif rising_edge and self.get_field(config_base, self._config_fields["CLKEn_THCal"]) == 1:
+            noise_width = self._noise_widths[(column, row)]
+            baseline = self._baselines[(column, row)] + self._rng.randint(-(noise_width // 2), noise_width // 2)
+            self.set_field(status_base, self._status_fields["BL"], min(max(baseline, 0), 0x3ff))
+            self.set_field(status_base, self._status_fields["NW"], min(noise_width + self._rng.randint(0, 1), 0xf))
+            self.set_field(status_base, self._status_fields["ScanDone"], 1)
+
+        if self.get_field(config_base, self._config_fields["Bypass_THCal"]) == 1:
+            threshold = self.get_field(config_base, self._config_fields["DAC"])
+        else:
+            threshold = self.get_field(status_base, self._status_fields["BL"]) + self.get_field(config_base, self._config_fields["TH_offset"])
+        self.set_field(status_base, self._status_fields["TH"], min(threshold, 0x3ff))
+
+#  Emulation of the waveform sampler: while rd_en_I2C is set, dout holds the sample at rd_addr of a 1024 sample memory.
+# The memory holds 8 interleaved channels of 128 samples with the pointer bit set on one sample of the last channel,
+# laid out so that Waveform_Sampler_Helper.build_dataframe recovers a pulse on top of a baseline
+class Emulated_Waveform_Sampler(Emulated_Memory):
+    _memory_depth = 1024
+    _channels = 8
+
+    def __init__(self, seed: int = 0, baseline: int = 10, amplitude: int = 40, pulse_time: int = 400, pulse_width: float = 30):
+        super().__init__(register_model["Waveform Sampler"])
+
+        def fields(block, value):
+            return self._compile_decoded_fields(block, register_decoding["Waveform Sampler"]["Register Blocks"][block][value])
+
+        self._config_base = register_model["Waveform Sampler"]["Register Blocks"]["Config"]["Base Address"]
+        self._status_base = register_model["Waveform Sampler"]["Register Blocks"]["Status"]["Base Address"]
+        self._rd_addr_fields = fields("Config", "rd_addr")
+        self._rd_en_fields = fields("Config", "rd_en_I2C")
+        self._dout_fields = fields("Status", "dout")
+        self._read_offsets = set(offset for offset, _, _, _ in self._rd_addr_fields + self._rd_en_fields)
+
+        rng = random.Random(seed)
+        channel_depth = self._memory_depth // self._channels
+        pointer = rng.randrange(channel_depth)
+
+        self._samples = [0] * self._memory_depth
+        for channel in range(self._channels):
+            for sample in range(channel_depth):
+                # Time of the sample once the channel is rotated after the pointer and the channels are interleaved in reverse order
+                time_index = ((sample - pointer - 1) % channel_depth) * self._channels + (self._channels - 1 - channel)
+                value = baseline + amplitude * math.exp(-0.5 * ((time_index - pulse_time)/pulse_width)**2) + rng.gauss(0, 0.5)
+                dout = min(max(int(round(value)), 0), 0x3f) << 7
+                if channel == self._channels - 1 and sample == pointer:
+                    dout |= 1 << 13
+                self._samples[channel * channel_depth + sample] = dout
+
+    @property
+    def samples(self):
+        return self._samples
+
+    def _register_written(self, address: int, old_value: int):
+        if address - self._config_base not in self._read_offsets:
+            return
+        if self.get_field(self._config_base, self._rd_en_fields) == 1:
+            self.set_field(self._status_base, self._dout_fields, self._samples[self.get_field(self._config_base, self._rd_addr_fields)])
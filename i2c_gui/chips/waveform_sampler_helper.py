@@ -26,20 +26,17 @@ from ..gui_helper import GUI_Helper
 from .base_chip import Base_Chip
 from ..functions import hex_0fill
 
-import tkinter as tk
-import tkinter.ttk as ttk  # For themed widgets (gives a more native visual to the elements)
+try:
+    import tkinter as tk
+    import tkinter.ttk as ttk  # For themed widgets (gives a more native visual to the elements)
+except ImportError:
+    tk = None
+    ttk = None
 import logging
 import time
 
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib
-matplotlib.use('TkAgg')
-from matplotlib.figure import Figure
-import pandas
 import time
 
-from tkinter import filedialog as tkfd
-
 class Waveform_Sampler_Helper(GUI_Helper):
     _orange_col = '#f0c010'
     _green_col = '#08ef10'
@@ -63,7 +60,7 @@ class Waveform_Sampler_Helper(GUI_Helper):
         for control in self._control_decoded_assoc:
             var, values = self._control_decoded_assoc[control]
             self._decoded_display_vars[control] = self._parent.get_decoded_display_var("Waveform Sampler", "Config", var)
-            self._control_vars[control] = tk.StringVar()
+            self._control_vars[control] = self._build_variable("String")
             self._control_var_updating[control] = None
             self._update_display_from_config(control)
 
@@ -75,6 +72,8 @@ class Waveform_Sampler_Helper(GUI_Helper):
         self._ws_data_out = self._parent.get_decoded_display_var("Waveform Sampler", "Status", "dout")
 
         self._has_data = False
+        self._raw_data = None
+        self._read_early_stop = False
         self._configuration_read = False
         self._is_configured = False
         self._pll_enabled = False
@@ -95,6 +94,8 @@ class Waveform_Sampler_Helper(GUI_Helper):
             self._save_raw_button.config(state=state)
         if hasattr(self, "_save_wave_button"):
             self._save_wave_button.config(state=state)
+        if hasattr(self, "_save_capture_button"):
+            self._save_capture_button.config(state=state)
 
     @property
     def is_connected(self):
@@ -205,6 +206,14 @@ class Waveform_Sampler_Helper(GUI_Helper):
             self._window.focus()
             return
 
+        #  The plotting libraries are only loaded when the window is opened, so scripts and
+        # headless use of the chip do not pay for (or require) them
+        import matplotlib
+        matplotlib.use('TkAgg')
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.figure import Figure
+        import pandas
+
         state = "disabled"
         if self.is_connected:
             state = "normal"
@@ -276,6 +285,9 @@ class Waveform_Sampler_Helper(GUI_Helper):
         self._save_wave_button = ttk.Button(self._daq_frame, text="Save Waveform", state=data_state, command=self._save_waveform_data_dialog)
         self._save_wave_button.grid(column=110, row=110)
 
+        self._save_capture_button = ttk.Button(self._daq_frame, text="Save Capture", state=data_state, command=self._save_capture_dialog)
+        self._save_capture_button.grid(column=100, row=120)
+
 
         #import numpy as np
         #t = np.arange(0.0,3.0,0.01)
@@ -353,90 +365,140 @@ class Waveform_Sampler_Helper(GUI_Helper):
         self._ws_read_en.set(1)
         self._parent.write_decoded_value("Waveform Sampler", "Config", "rd_en_I2C", no_message=True)
 
-        # For loop to read data from WS
-        max_steps = 1024  # Size of the data buffer inside the WS
+        self._raw_data = self.capture_raw_data()
+        self._df = self.build_dataframe(self._raw_data)
+
+        # Disable reading data from WS:
+        self._ws_read_en.set(0)
+        self._parent.write_decoded_value("Waveform Sampler", "Config", "rd_en_I2C", no_message=True)
+
+        self.has_data = True
+
+    #  Reads the WS memory into a numpy array of raw 14 bit dout samples, one per memory address. The rd_addr registers
+    # are written without readback and each address-set/dout-read pair is queued in a transaction batch, so a batch of
+    # capture_batch_size addresses is a single call to the I2C interface. The progress and early stop are handled between batches
+    capture_batch_size = 64
+
+    def capture_raw_data(self, max_steps: int = 1024):  # max_steps is the size of the data buffer inside the WS
+        import numpy
+        from .address_space_controller import Address_Space_Controller
+
+        address_space: Address_Space_Controller = self._parent._address_space["Waveform Sampler"]
+        device_address = address_space._i2c_address
+        if device_address is None:
+            self.send_message("Unable to read the WS memory because the i2c address is not set", "Error")
+            return numpy.zeros(0, dtype=numpy.uint16)
+
+        # Resolve the decoded values into (register address, register shift, mask, value shift)
+        config_base = address_space._blocks["Config"]["Base Address"]
+        status_base = address_space._blocks["Status"]["Base Address"]
+        address_fields = [(config_base + offset, register_shift, mask, value_shift) for offset, register_shift, mask, value_shift in address_space._decoded_fields["Config/rd_addr"]]
+        dout_fields = [(status_base + offset, register_shift, mask, value_shift) for offset, register_shift, mask, value_shift in address_space._decoded_fields["Status/dout"]]
+
+        # Register values for every memory address, the other bits of the rd_addr registers are kept as they are
+        memory_addresses = numpy.arange(max_steps, dtype=numpy.int64)
+        address_registers = []
+        for register_address, register_shift, mask, value_shift in address_fields:
+            base_value = address_space.get_display_value(register_address) & ~(mask << register_shift)
+            address_registers += [(register_address, (base_value | (((memory_addresses >> value_shift) & mask) << register_shift)).tolist())]
+
+        i2c_args = (address_space._register_bits, address_space._register_length)
+        dout_registers = numpy.zeros((max_steps, len(dout_fields)), dtype=numpy.int64)
+        steps = 0
         lastUpdateTime = time.time_ns()
-        base_data = []
-        coeff=0.04/5*8.5  # This number comes from the example script in the manual
-        time_coeff = 1/2.56  # 2.56 GHz WS frequency
-        for address in range(max_steps):
-            self._ws_read_address.set(hex_0fill(address, 10))
-            self._parent.write_decoded_value("Waveform Sampler", "Config", "rd_addr", no_message=True)
-
-            self._parent.read_decoded_value("Waveform Sampler", "Status", "dout", no_message=True)
-            data = self._ws_data_out.get()
-
-            #if time_idx == 1:
-            #    data = hex_0fill(int(data, 0) + 8192, 14)
-
-            binary_data = bin(int(data, 0))[2:].zfill(14)  # because dout is 14 bits long
-            Dout_S1 = int('0b'+binary_data[1:7], 0)
-            Dout_S2 = int(binary_data[ 7]) * 24 + \
-                      int(binary_data[ 8]) * 16 + \
-                      int(binary_data[ 9]) * 10 + \
-                      int(binary_data[10]) *  6 + \
-                      int(binary_data[11]) *  4 + \
-                      int(binary_data[12]) *  2 + \
-                      int(binary_data[13])
-
-            base_data.append(
-                {
-                    "Data Address": address,
-                    "Data": int(data, 0),
-                    "Raw Data": bin(int(data, 0))[2:].zfill(14),
-                    "pointer": int(binary_data[0]),
-                    "Dout_S1": Dout_S1,
-                    "Dout_S2": Dout_S2,
-                    "Dout": Dout_S1 - coeff * Dout_S2,
-                }
-            )
+        self._read_early_stop = False
+        while steps < max_steps:
+            batch = self._parent._i2c_controller.new_batch()
+            transactions = []
+            for address in range(steps, min(steps + self.capture_batch_size, max_steps)):
+                for register_address, values in address_registers:
+                    batch.write(device_address, register_address, [values[address]], *i2c_args, address_space._write_type)
+                transactions += [[batch.read(device_address, register_address, 1, *i2c_args, address_space._read_type) for register_address, _, _, _ in dout_fields]]
+            self._parent._i2c_controller.execute_batch(batch)
+
+            for address_transactions in transactions:
+                dout_registers[steps] = [transaction.result()[0] for transaction in address_transactions]
+                steps += 1
 
             thisTime = time.time_ns()
             if thisTime - lastUpdateTime > 0.3 * 10**9:
                 lastUpdateTime = thisTime
                 if hasattr(self, "_dialog_progress"):
-                    self._dialog_progress['value'] = int(address*100.0/max_steps)
+                    self._dialog_progress['value'] = int(steps*100.0/max_steps)
                 if hasattr(self, "_window"):
                     self._window.update()
 
             if self._read_early_stop:
                 break
 
-        self._df = pandas.DataFrame(base_data)
+        raw_data = numpy.zeros(steps, dtype=numpy.uint16)
+        for idx, (_, register_shift, mask, value_shift) in enumerate(dout_fields):
+            raw_data |= (((dout_registers[:steps, idx] >> register_shift) & mask) << value_shift).astype(numpy.uint16)
 
-        df_length = len(self._df)
-        channels = 8
+        # Bring the address space in sync with the registers which were changed behind its back
+        address_space.read_memory_addresses([field[0] for field in address_fields + dout_fields])
 
-        df_per_ch : list[pandas.DataFrame] = []
-        for ch in range(channels):
-            df_per_ch += [self._df.iloc[int(ch * df_length/channels):int((ch + 1) * df_length/channels)].copy()]
-            df_per_ch[ch].reset_index(inplace = True, drop = True)
+        return raw_data
 
-        pointer_idx = df_per_ch[-1]["pointer"].loc[df_per_ch[-1]["pointer"] != 0].index  # TODO: Maybe add a search of the pointer in any channel, not just the last one
-        if len(pointer_idx) != 0:  # If pointer found, reorder the data
-            pointer_idx = pointer_idx[0]
-            new_idx = list(set(range(len(df_per_ch[-1]))).difference(range(pointer_idx+1))) + list(range(pointer_idx+1))
-            for ch in range(channels):
-                df_per_ch[ch] = df_per_ch[ch].iloc[new_idx].reset_index(drop = True)  # Fix indexes after reordering
+    #  Decodes the raw samples and undoes the channel interleaving of the WS memory: the buffer holds 8 channels one after
+    # the other, which are rotated so the sample after the pointer (searched in the last channel) comes first and then
+    # interleaved in reverse channel order. The dataframe is indexed by the time index and has one row per sample
+    @staticmethod
+    def build_dataframe(raw_data, coeff: float = 0.04/5*8.5):  # The coeff number comes from the example script in the manual
+        import numpy
+        import pandas
 
-        # interleave the channels
-        for ch in range(channels):
-            df_per_ch[ch]["Time Index"] = df_per_ch[ch].index * channels + (channels - 1 - ch)  # Flip the order of the channels in the interleave...
-            df_per_ch[ch]["Channel"] = ch + 1
-
-        # Actually put it all together in one dataframe and sort the data correctly
-        self._df = pandas.concat(df_per_ch)
-        self._df["Time [ns]"] = self._df["Time Index"] * time_coeff
-        self._df.set_index('Time Index', inplace=True)
-        self._df.sort_index(inplace=True)
-
-        # Disable reading data from WS:
-        self._ws_read_en.set(0)
-        self._parent.write_decoded_value("Waveform Sampler", "Config", "rd_en_I2C", no_message=True)
+        time_coeff = 1/2.56  # 2.56 GHz WS frequency
+        channels = 8
 
-        self.has_data = True
+        raw_data = numpy.asarray(raw_data, dtype=numpy.int64)
+        pointer = (raw_data >> 13) & 0x1  # dout is 14 bits long
+        Dout_S1 = (raw_data >> 7) & 0x3f
+        Dout_S2 = numpy.zeros(len(raw_data), dtype=numpy.int64)
+        for bit, weight in zip(range(6, -1, -1), [24, 16, 10, 6, 4, 2, 1]):
+            Dout_S2 += ((raw_data >> bit) & 0x1) * weight
+
+        columns = {
+            "Data Address": numpy.arange(len(raw_data), dtype=numpy.int64),
+            "Data": raw_data,
+            "Raw Data": numpy.array([format(value, '014b') for value in raw_data.tolist()], dtype=object),
+            "pointer": pointer,
+            "Dout_S1": Dout_S1,
+            "Dout_S2": Dout_S2,
+            "Dout": Dout_S1 - coeff * Dout_S2,
+        }
+
+        df_length = len(raw_data)
+        bounds = [int(ch * df_length/channels) for ch in range(channels + 1)]
+
+        pointer_idx = numpy.flatnonzero(pointer[bounds[-2]:bounds[-1]])  # TODO: Maybe add a search of the pointer in any channel, not just the last one
+        row_order = []
+        time_index = []
+        channel = []
+        for ch in range(channels):
+            ch_length = bounds[ch + 1] - bounds[ch]
+            order = numpy.arange(ch_length)
+            if len(pointer_idx) != 0:  # If pointer found, reorder the data
+                order = numpy.roll(order, -(pointer_idx[0] + 1))
+            row_order += [bounds[ch] + order]
+            time_index += [numpy.arange(ch_length) * channels + (channels - 1 - ch)]  # Flip the order of the channels in the interleave...
+            channel += [numpy.full(ch_length, ch + 1)]
+
+        row_order = numpy.concatenate(row_order)
+        time_index = numpy.concatenate(time_index)
+        channel = numpy.concatenate(channel)
+
+        sort_order = numpy.argsort(time_index, kind='stable')
+        row_order = row_order[sort_order]
+
+        df = pandas.DataFrame({name: columns[name][row_order] for name in columns}, index=pandas.Index(time_index[sort_order], name="Time Index"))
+        df["Channel"] = channel[sort_order]
+        df["Time [ns]"] = df.index * time_coeff
+        return df
 
     def _save_raw_data_dialog(self):
+        from tkinter import filedialog as tkfd
+
         raw_extension = "csv"
 
         filename = tkfd.asksaveasfilename(
@@ -458,7 +520,34 @@ class Waveform_Sampler_Helper(GUI_Helper):
     def save_raw_data(self, filename):  # data is saved as a CSV
         self._df.to_csv(filename, columns=["Raw Data"])
 
+    def _save_capture_dialog(self):
+        from tkinter import filedialog as tkfd
+
+        directory = tkfd.askdirectory(
+            parent=self._window,
+            title='Select the WS Capture Store',
+            initialdir='./',
+        )
+
+        if directory is None or directory == "":
+            return
+
+        self._logger.trace("Saving WS capture to the store: {}".format(directory))
+
+        self.save_capture(directory)
+
+    #  The raw samples of the last capture are appended to a capture store (a directory, created if needed),
+    # along with the chip name, the time and the hash of the chip configuration. Returns the capture number in the store
+    def save_capture(self, store):
+        from .waveform_sampler_store import Waveform_Sampler_Store
+
+        if not isinstance(store, Waveform_Sampler_Store):
+            store = Waveform_Sampler_Store(store)
+        return store.append(self._raw_data, chip_name=self._parent._chip_name, config_hash=self._parent.get_config_hash())
+
     def _save_waveform_data_dialog(self):
+        from tkinter import filedialog as tkfd
+
         raw_extension = "csv"
 
         filename = tkfd.asksaveasfilename(
@@ -0,0 +1,145 @@
+#############################################################################
+# zlib License
+#
+# (C) 2023 Cristóvão Beirão da Cruz e Silva <cbeiraod@cern.ch>
+#
+# This software is provided 'as-is', without any express or implied
+# warranty.  In no event will the authors be held liable for any damages
+# arising from the use of this software.
+#
+# Permission is granted to anyone to use this software for any purpose,
+# including commercial applications, and to alter it and redistribute it
+# freely, subject to the following restrictions:
+#
+# 1. The origin of this software must not be misrepresented; you must not
+#    claim that you wrote the original software. If you use this software
+#    in a product, an acknowledgment in the product documentation would be
+#    appreciated but is not required.
+# 2. Altered source versions must be plainly marked as such, and must not be
+#    misrepresented as being the original software.
+# 3. This notice may not be removed or altered from any source distribution.
+#############################################################################
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy
+
+#  Append-only store for the raw waveform sampler captures. A store is a directory with:
+#   - samples.bin: the raw 14 bit samples of all the captures, back to back, as little endian uint16
+#   - index.bin: one fixed size record per capture (see _index_dtype) with its metadata and position in samples.bin
+#   - store.json: the format version
+# Both binary files are only ever appended to, the samples before the index record, so a capture which was
+# interrupted while being written is simply not listed. Reads go through memory maps, so any capture can be
+# accessed directly and long campaigns can be streamed without loading them in memory
+class Waveform_Sampler_Store:
+    _format_version = 1
+    _index_dtype = numpy.dtype([
+        ("offset", "<u8"),
+        ("length", "<u4"),
+        ("timestamp", "<f8"),
+        ("chip_name", "S32"),
+        ("config_hash", "S64"),
+    ])
+
+    def __init__(self, path: Path | str):
+        self._path = Path(path)
+        self._samples_file = self._path / "samples.bin"
+        self._index_file = self._path / "index.bin"
+
+        info_file = self._path / "store.json"
+        if info_file.exists():
+            with open(info_file, 'r') as f:
+                info = json.load(f)
+            if info["version"] != self._format_version:
+                raise RuntimeError("The waveform sampler store at {} has version {}, expected {}".format(self._path, info["version"], self._format_version))
+        else:
+            self._path.mkdir(parents=True, exist_ok=True)
+            with open(info_file, 'w') as f:
+                json.dump({"version": self._format_version, "sample_dtype": "<u2", "sample_bits": 14}, f)
+            self._samples_file.touch()
+            self._index_file.touch()
+
+        self._index = None
+        self._samples = None
+
+    @property
+    def path(self):
+        return self._path
+
+    def __len__(self):
+        return os.path.getsize(self._index_file) // self._index_dtype.itemsize
+
+    def __getitem__(self, capture: int):
+        return self.get_metadata(capture), self.get_samples(capture)
+
+    def __iter__(self):
+        return self.iter_captures()
+
+    def _get_index(self):
+        count = len(self)
+        if self._index is None or len(self._index) != count:
+            self._index = numpy.memmap(self._index_file, dtype=self._index_dtype, mode='r', shape=(count,)) if count > 0 else numpy.zeros(0, dtype=self._index_dtype)
+        return self._index
+
+    def _get_samples(self, size: int):
+        if self._samples is None or len(self._samples) < size:
+            self._samples = numpy.memmap(self._samples_file, dtype="<u2", mode='r', shape=(os.path.getsize(self._samples_file)//2,))
+        return self._samples
+
+    def append(self, samples, chip_name: str = "", config_hash: str = "", timestamp: float = None):
+        samples = numpy.asarray(samples, dtype="<u2")
+        if timestamp is None:
+            timestamp = time.time()
+
+        offset = os.path.getsize(self._samples_file) // 2
+        with open(self._samples_file, 'ab') as f:
+            f.write(samples.tobytes())
+
+        record = numpy.array([(offset, len(samples), timestamp, chip_name.encode(), config_hash.encode())], dtype=self._index_dtype)
+        with open(self._index_file, 'ab') as f:
+            f.write(record.tobytes())
+
+        return len(self) - 1
+
+    def get_metadata(self, capture: int):
+        record = self._get_index()[capture]
+        return {
+            "capture": capture if capture >= 0 else len(self) + capture,
+            "timestamp": float(record["timestamp"]),
+            "chip_name": record["chip_name"].decode(),
+            "config_hash": record["config_hash"].decode(),
+            "length": int(record["length"]),
+        }
+
+    #  Returns a read-only view of the samples in the memory map, copy it to keep it beyond the life of the store
+    def get_samples(self, capture: int):
+        record = self._get_index()[capture]
+        offset = int(record["offset"])
+        length = int(record["length"])
+        return self._get_samples(offset + length)[offset:offset + length]
+
+    def get_dataframe(self, capture: int, coeff: float = None):
+        from .waveform_sampler_helper import Waveform_Sampler_Helper
+        if coeff is None:
+            return Waveform_Sampler_Helper.build_dataframe(self.get_samples(capture))
+        return Waveform_Sampler_Helper.build_dataframe(self.get_samples(capture), coeff=coeff)
+
+    def get_metadata_table(self):
+        index = self._get_index()
+        return {
+            "timestamp": numpy.array(index["timestamp"]),
+            "chip_name": numpy.char.decode(index["chip_name"]),
+            "config_hash": numpy.char.decode(index["config_hash"]),
+            "length": numpy.array(index["length"]),
+        }
+
+    def iter_captures(self, start: int = 0, stop: int = None):
+        if stop is None:
+            stop = len(self)
+        for capture in range(start, stop):
+            yield self[capture]
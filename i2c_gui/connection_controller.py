@@ -23,21 +23,36 @@
 from __future__ import annotations
 
 from .gui_helper import GUI_Helper
-from .base_gui import Base_GUI
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from .base_gui import Base_GUI
 from .functions import hex_0fill
 from .functions import validate_bit_length
 from .functions import validate_variable_bit_register
 
 from math import ceil
 
-import tkinter as tk
-import tkinter.ttk as ttk  # For themed widgets (gives a more native visual to the elements)
+try:
+    import tkinter as tk
+    import tkinter.ttk as ttk  # For themed widgets (gives a more native visual to the elements)
+except ImportError:
+    tk = None
+    ttk = None
 import logging
 import time
 import re
+import asyncio
 
 from .usb_iss_helper import USB_ISS_Helper
 from .fpga_eth_helper import FPGA_ETH_Helper
+from .broker_helper import Broker_Helper
+from .emulator_helper import Emulator_Helper
+from .replay_helper import Replay_Helper
+from .i2c_transaction_batch import I2C_Transaction_Batch
+from .i2c_pacing import I2C_Pacer
+from .i2c_statistics import I2C_Statistics
+from .i2c_trace import I2C_Trace
+from .i2c_journal import I2C_Journal
 
 class Connection_Controller(GUI_Helper):
     _orange_col = '#f0c010'
@@ -47,13 +62,16 @@ class Connection_Controller(GUI_Helper):
     _connection_types = [
         "USB-ISS",
         "FPGA-Eth",
+        "Broker",
+        "Emulator",
+        "Replay",
     ]
 
     _parent: Base_GUI
     def __init__(
         self,
         parent: Base_GUI,
-        usb_iss_max_seq_byte = 8,
+        usb_iss_max_seq_byte = None,
         override_logger = None,
         successive_i2c_delay_us : int = 10000,
     ):
@@ -63,8 +81,6 @@ class Connection_Controller(GUI_Helper):
             super().__init__(parent, None, override_logger)
         self._is_connected = False
 
-        self._time_last_i2c_command = time.time_ns()
-
         self._usb_iss_max_seq_byte = usb_iss_max_seq_byte
 
         #  The i2c connection is instantiated as a helper class, the helper class will manage
@@ -72,39 +88,108 @@ class Connection_Controller(GUI_Helper):
         # interfaces need to be supported
         self._i2c_connection = USB_ISS_Helper(self, usb_iss_max_seq_byte)
 
-        self._i2c_connection_type_var = tk.StringVar(value=self._connection_types[0])
+        self._i2c_connection_type_var = self._build_variable("String", value=self._connection_types[0])
         self._i2c_connection_type_var.trace_add("write", self._update_connection_type) # This should probably be moved lower
 
         self._registered_connection_callbacks = []
 
-        self._successive_i2c_delay_us = successive_i2c_delay_us
+        #  All the commands sent over I2C go through the pacer, which keeps the minimum gap between
+        # them (successive_i2c_delay_us unless a gap profile is set for the backend or device)
+        self._pacer = I2C_Pacer(default_gap_us=successive_i2c_delay_us)
+        #  The broker paces the commands on the bus it owns, the clients do not need to wait
+        self._pacer.set_gap(0, backend="Broker")
+        #  The replayed journal already contains the gaps of the recorded session
+        self._pacer.set_gap(0, backend="Replay")
+
+        #  The statistics are only recorded once enabled, the device labels (address space names) are kept regardless
+        self._statistics = None
+        self._device_labels = {}
+
+        #  When a journal is started, every transaction is recorded to it, so the session can be replayed offline
+        self._journal = None
+
+        #  Serializes the asynchronous accesses (pacing and transfer) made from the event loop the lock belongs to
+        self._async_lock = None
+        self._async_lock_loop = None
 
         from . import __no_connect__
         if __no_connect__:
             self._previous_write_value = None
 
+        #  The I2C log is kept as a binary trace and only turned into text when the I2C monitor displays it
         self._do_logging_i2c = False
-        self._i2c_logging_window_status_var = tk.StringVar()
+        self._i2c_trace = I2C_Trace()
+        self._i2c_log_rendered = 0  # Sequence number of the first trace record not yet shown in the I2C monitor
+        self._i2c_logging_window_status_var = self._build_variable("String")
         self._i2c_logging_window_status_var.set("Logging Disabled")
 
-        self._i2c_window_address_var = tk.StringVar()
-        self._i2c_window_register_var = tk.StringVar()
-        self._i2c_window_register_value_var = tk.StringVar()
-        self._i2c_window_block_size_var = tk.StringVar()
+        self._i2c_window_address_var = self._build_variable("String")
+        self._i2c_window_register_var = self._build_variable("String")
+        self._i2c_window_register_value_var = self._build_variable("String")
+        self._i2c_window_block_size_var = self._build_variable("String")
 
-        self._i2c_window_register_length_var = tk.StringVar(value="8")
+        self._i2c_window_register_length_var = self._build_variable("String", value="8")
         self._i2c_window_register_length_var.trace_add("write", self._changed_register_length)
 
-        self._i2c_window_register_address_length_var = tk.StringVar(value="16")
+        self._i2c_window_register_address_length_var = self._build_variable("String", value="16")
         self._i2c_window_register_address_length_var.trace_add("write", self._changed_register_address_length)
 
-        self._enable_readback_var = tk.BooleanVar(value=True)
+        self._enable_readback_var = self._build_variable("Boolean", value=True)
         self._enable_readback_var.trace_add("write", self._toggle_enable_readback)
 
     @property
     def is_connected(self):
         return self._is_connected
 
+    @property
+    def pacer(self):
+        return self._pacer
+
+    @property
+    def pacing_statistics(self):
+        return self._pacer.statistics
+
+    def pacing_feedback(self, device_address: int, success: bool):
+        self._pacer.feedback(self.connection_type, device_address, success)
+        if not success and self._statistics is not None:
+            self._statistics.record_failure(device_address)
+
+    @property
+    def statistics(self):
+        return self._statistics
+
+    def enable_statistics(self):
+        if self._statistics is None:
+            self._statistics = I2C_Statistics(self._device_labels)
+            self._pacer.i2c_statistics = self._statistics
+        return self._statistics
+
+    def disable_statistics(self):
+        self._statistics = None
+        self._pacer.i2c_statistics = None
+
+    def label_device(self, device_address: int, address_space: str):
+        if device_address is not None:
+            self._device_labels[device_address] = address_space
+
+    @property
+    def journal(self):
+        return self._journal
+
+    def start_journal(self, filename: str):
+        self.stop_journal()
+        self._journal = I2C_Journal(filename)
+        return self._journal
+
+    def stop_journal(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    @property
+    def i2c_trace(self):
+        return self._i2c_trace
+
     @property
     def connection_type(self):
         return self._i2c_connection_type_var.get()
@@ -160,6 +245,15 @@ class Connection_Controller(GUI_Helper):
             self._i2c_connection = FPGA_ETH_Helper(self)
             self.send_message("The FPGA-Eth connection is not fully implement yet - this will not work", "Warning")
             update_display = True
+        elif connection_type == "Broker":
+            self._i2c_connection = Broker_Helper(self)
+            update_display = True
+        elif connection_type == "Emulator":
+            self._i2c_connection = Emulator_Helper(self)
+            update_display = True
+        elif connection_type == "Replay":
+            self._i2c_connection = Replay_Helper(self)
+            update_display = True
         else:
             self.send_message("Unknown I2C Connection Type: {}".format(connection_type), "Error")
             self._i2c_connection_type_var.set(self._connection_types[0])
@@ -174,17 +268,23 @@ class Connection_Controller(GUI_Helper):
             self._i2c_connection.display_in_frame(self._i2c_connection_frame)
 
     def check_i2c_device(self, address: str):
-        this_time = time.time_ns()
-        if this_time - self._time_last_i2c_command < self._successive_i2c_delay_us * 1000:
-            time.sleep(self._successive_i2c_delay_us/10E6)
-            this_time = time.time_ns()
-        self._time_last_i2c_command = this_time
-
         from . import __no_connect__
         if __no_connect__:
             return True
 
-        return self._i2c_connection.check_i2c_device(int(address, 0))
+        found = None
+        started = None if self._statistics is None else self._statistics.start()
+        journal_started = None if self._journal is None else self._journal.start()
+        self._pacer.wait(self.connection_type, int(address, 0))
+        try:
+            found = self._i2c_connection.check_i2c_device(int(address, 0))
+        finally:
+            self._pacer.done(self.connection_type, int(address, 0))
+            if started is not None:
+                self._statistics.record_latency('check', started)
+            if journal_started is not None:
+                self._journal.record('check', int(address, 0), 0, 0, None, found, journal_started, found is None)
+        return found
 
     def register_connection_callback(self, function):
         if function not in self._registered_connection_callbacks:
@@ -243,6 +343,7 @@ class Connection_Controller(GUI_Helper):
             return
 
         self._i2c_connection.disconnect()
+        self._i2c_connection.shutdown_executor()
 
         if hasattr(self, "_connect_button"):
             self._connect_button.config(text="Connect", command=self.connect)
@@ -268,27 +369,21 @@ class Connection_Controller(GUI_Helper):
         if not validate_i2c_address(hex(device_address)):
             raise RuntimeError("Invalid I2C address received: {}".format(hex(device_address)))
 
-        this_time = time.time_ns()
-        if this_time - self._time_last_i2c_command < self._successive_i2c_delay_us * 1000:
-            time.sleep(self._successive_i2c_delay_us/10E6)
-            this_time = time.time_ns()
-        self._time_last_i2c_command = this_time
-
         from . import __no_connect__
-        from . import __no_connect_type__
         if __no_connect__:
-            retVal = []
-            if __no_connect_type__ == "check" or self._previous_write_value is None:
-                retVal = [i for i in range(byte_count)]
-                if byte_count == 1:
-                    retVal[0] = 0x42
-            elif __no_connect_type__ == "echo":
-                retVal = [self._previous_write_value for i in range(byte_count)]
-            else:
-                self._logger.error("Massive error, no connect was set, but an incorrect no connect type was chosen, so the I2C emulation behaviour is unknown")
-            return retVal
+            return self._no_connect_read(byte_count)
 
-        return self._i2c_connection.read_device_memory(device_address, memory_address, byte_count, register_bits, register_length, read_type)
+        data = None
+        started = None if self._journal is None else self._journal.start()
+        try:
+            if self._statistics is not None:
+                data = self._statistics.measure('read', device_address, byte_count, self._i2c_connection.read_device_memory, device_address, memory_address, byte_count, register_bits, register_length, read_type)
+            else:
+                data = self._i2c_connection.read_device_memory(device_address, memory_address, byte_count, register_bits, register_length, read_type)
+        finally:
+            if started is not None:
+                self._journal.record('read', device_address, memory_address, byte_count, None, data, started, data is None, register_bits, register_length, read_type)
+        return data
 
     def write_device_memory(self, device_address: int, memory_address: int, data: list[int], register_bits: int = 16, register_length: int = 8, write_type: str = 'Normal'):
         if not self.is_connected:
@@ -298,20 +393,207 @@ class Connection_Controller(GUI_Helper):
         if not validate_i2c_address(hex(device_address)):
             raise RuntimeError("Invalid I2C address received: {}".format(hex(device_address)))
 
-        this_time = time.time_ns()
-        if this_time - self._time_last_i2c_command < self._successive_i2c_delay_us * 1000:
-            time.sleep(self._successive_i2c_delay_us/10E6)
-            this_time = time.time_ns()
-        self._time_last_i2c_command = this_time
-
         from . import __no_connect__
-        from . import __no_connect_type__
         if __no_connect__:
-            if __no_connect_type__ == "echo":
-                self._previous_write_value = data[len(data)-1]
+            self._no_connect_write(data)
+            return
+
+        success = False
+        started = None if self._journal is None else self._journal.start()
+        try:
+            if self._statistics is not None:
+                self._statistics.measure('write', device_address, len(data), self._i2c_connection.write_device_memory, device_address, memory_address, data, register_bits, register_length, write_type)
+            else:
+                self._i2c_connection.write_device_memory(device_address, memory_address, data, register_bits, register_length, write_type)
+            success = True
+        finally:
+            if started is not None:
+                self._journal.record('write', device_address, memory_address, len(data), data, None, started, not success, register_bits, register_length, write_type)
+
+    def _no_connect_read(self, byte_count: int):
+        from . import __no_connect_type__
+        retVal = []
+        if __no_connect_type__ == "check" or self._previous_write_value is None:
+            retVal = [i & 0xff for i in range(byte_count)]
+            if byte_count == 1:
+                retVal[0] = 0x42
+        elif __no_connect_type__ == "echo":
+            retVal = [self._previous_write_value for i in range(byte_count)]
+        else:
+            self._logger.error("Massive error, no connect was set, but an incorrect no connect type was chosen, so the I2C emulation behaviour is unknown")
+        return retVal
+
+    def _no_connect_write(self, data: list[int]):
+        from . import __no_connect_type__
+        if __no_connect_type__ == "echo":
+            self._previous_write_value = data[len(data)-1]
+
+    def new_batch(self):
+        return I2C_Transaction_Batch(self)
+
+    #  Executes all the transactions of a batch in one go: the device addresses are validated once and adjacent
+    # transactions are merged before being handed to the I2C connection helper. The pacing gap is respected before
+    # the batch for the helpers which execute it in a single step (native_batch), otherwise before each access to
+    # the interface within the batch. The results are then available from each transaction.
+    def execute_batch(self, batch: I2C_Transaction_Batch):
+        if not self.is_connected:
+            raise RuntimeError("You must first connect to a device before trying to execute I2C transactions")
+
+        if len(batch) == 0:
             return
 
-        self._i2c_connection.write_device_memory(device_address, memory_address, data, register_bits, register_length, write_type)
+        merged, device_address = self._prepare_batch(batch)
+
+        from . import __no_connect__
+        backend = self.connection_type
+        pace_batch = __no_connect__ or self._i2c_connection.native_batch  # Otherwise the helper paces each access of the batch
+        success = False
+        started = None if self._statistics is None else self._statistics.start()
+        journal_started = None if self._journal is None or __no_connect__ else self._journal.start()
+        if pace_batch:
+            self._pacer.wait(backend, device_address)
+        try:
+            if __no_connect__:
+                self._no_connect_batch(merged)
+            else:
+                self._i2c_connection.execute_batch([transaction for transaction, _ in merged])
+            success = True
+        finally:
+            if pace_batch:
+                self._pacer.done(backend, device_address, success=success)
+            self._finish_batch(merged)
+            if started is not None:
+                self._statistics.record_batch([transaction for transaction, _ in merged], started)
+            if journal_started is not None:
+                self._journal.record_batch([transaction for transaction, _ in merged], journal_started)
+
+    #  Same as execute_batch, but the event loop keeps running other tasks while waiting for the pacing gap and
+    # for the interface. Accesses from several tasks to the same connection are executed one at a time
+    async def execute_batch_async(self, batch: I2C_Transaction_Batch):
+        if not self.is_connected:
+            raise RuntimeError("You must first connect to a device before trying to execute I2C transactions")
+
+        if len(batch) == 0:
+            return
+
+        merged, device_address = self._prepare_batch(batch)
+
+        from . import __no_connect__
+        backend = self.connection_type
+        pace_batch = __no_connect__ or self._i2c_connection.native_batch  # Otherwise the helper paces each access of the batch, on its worker thread
+        async with self._get_async_lock():
+            success = False
+            started = None if self._statistics is None else self._statistics.start()
+            journal_started = None if self._journal is None or __no_connect__ else self._journal.start()
+            if pace_batch:
+                await self._pacer.wait_async(backend, device_address)
+            try:
+                if __no_connect__:
+                    self._no_connect_batch(merged)
+                else:
+                    await self._i2c_connection.execute_batch_async([transaction for transaction, _ in merged])
+                success = True
+            finally:
+                if pace_batch:
+                    self._pacer.done(backend, device_address, success=success)
+                self._finish_batch(merged)
+                if started is not None:
+                    self._statistics.record_batch([transaction for transaction, _ in merged], started)
+                if journal_started is not None:
+                    self._journal.record_batch([transaction for transaction, _ in merged], journal_started)
+
+    def _get_async_lock(self):
+        loop = asyncio.get_running_loop()
+        if self._async_lock is None or self._async_lock_loop is not loop:
+            self._async_lock = asyncio.Lock()
+            self._async_lock_loop = loop
+        return self._async_lock
+
+    #  Validates the device addresses and merges the transactions, returns the merged transactions and the device
+    # address used for pacing (None if the batch covers several devices)
+    def _prepare_batch(self, batch: I2C_Transaction_Batch):
+        from .functions import validate_i2c_address
+        device_addresses = batch.device_addresses
+        for device_address in device_addresses:
+            if not validate_i2c_address(hex(device_address)):
+                raise RuntimeError("Invalid I2C address received: {}".format(hex(device_address)))
+
+        merged = batch.merged()
+        self._logger.trace("Executing a batch of {} I2C transactions merged into {}".format(len(batch), len(merged)))
+
+        device_address = next(iter(device_addresses)) if len(device_addresses) == 1 else None
+        return merged, device_address
+
+    def _no_connect_batch(self, merged):
+        for transaction, _ in merged:
+            if transaction.operation == 'read':
+                transaction.set_result(self._no_connect_read(transaction.byte_count))
+            else:
+                self._no_connect_write(transaction.data)
+                transaction.set_result()
+
+    #  Hands the results of the merged transactions back to the transactions of the batch
+    def _finish_batch(self, merged):
+        for transaction, parts in merged:
+            offset = 0
+            for part in parts:
+                if not transaction.done:
+                    part.set_exception(RuntimeError("The I2C transaction was not executed because a previous transaction of the batch failed"))
+                elif transaction._exception is not None:
+                    part.set_exception(transaction._exception)
+                elif part.operation == 'read':
+                    part.set_result(transaction.result()[offset:offset + part.byte_count])
+                else:
+                    part.set_result()
+                offset += part.byte_count
+
+    async def read_device_memory_async(self, device_address: int, memory_address: int, byte_count: int = 1, register_bits: int = 16, register_length: int = 8, read_type: str = 'Normal'):
+        batch = self.new_batch()
+        transaction = batch.read(device_address, memory_address, byte_count, register_bits, register_length, read_type)
+        await self.execute_batch_async(batch)
+        return transaction.result()
+
+    async def write_device_memory_async(self, device_address: int, memory_address: int, data: list[int], register_bits: int = 16, register_length: int = 8, write_type: str = 'Normal'):
+        batch = self.new_batch()
+        transaction = batch.write(device_address, memory_address, data, register_bits, register_length, write_type)
+        await self.execute_batch_async(batch)
+        transaction.result()
+
+    async def check_i2c_device_async(self, address: str):
+        from . import __no_connect__
+        if __no_connect__:
+            return True
+
+        async with self._get_async_lock():
+            found = None
+            started = None if self._statistics is None else self._statistics.start()
+            journal_started = None if self._journal is None else self._journal.start()
+            await self._pacer.wait_async(self.connection_type, int(address, 0))
+            try:
+                found = await self._i2c_connection.run_in_executor(self._i2c_connection.check_i2c_device, int(address, 0))
+            finally:
+                self._pacer.done(self.connection_type, int(address, 0))
+                if started is not None:
+                    self._statistics.record_latency('check', started)
+                if journal_started is not None:
+                    self._journal.record('check', int(address, 0), 0, 0, None, found, journal_started, found is None)
+        return found
+
+    async def direct_i2c_async(self, commands: list[int]):
+        async with self._get_async_lock():
+            retVal = None
+            started = None if self._statistics is None else self._statistics.start()
+            journal_started = None if self._journal is None else self._journal.start()
+            await self._pacer.wait_async(self.connection_type)
+            try:
+                retVal = await self._i2c_connection.run_in_executor(self._i2c_connection._direct_i2c, commands)
+            finally:
+                self._pacer.done(self.connection_type)
+                if started is not None:
+                    self._statistics.record_latency('direct', started)
+                if journal_started is not None:
+                    self._journal.record('direct', 0, 0, 0, commands, retVal, journal_started, retVal is None)
+        return retVal
 
     def display_i2c_window(self):
         if hasattr(self, "_i2c_window"):
@@ -376,10 +658,16 @@ class Connection_Controller(GUI_Helper):
         self._clear_logging_button = ttk.Button(self._i2c_window_generic_control_frame, text="Clear Log", command=self.clear_i2c_log)
         self._clear_logging_button.grid(column=200, row=110, sticky=(tk.W, tk.E), padx=(0,5))
 
+        # Place the refresh log button below the clear log button
+        self._refresh_logging_button = ttk.Button(self._i2c_window_generic_control_frame, text="Refresh Log", command=self.refresh_i2c_log)
+        self._refresh_logging_button.grid(column=200, row=120, sticky=(tk.W, tk.E), padx=(0,5))
+
         # Place logging status at right of status bar
         self._i2c_logging_status_label = ttk.Label(self._i2c_window_bottom_frame, textvariable=self._i2c_logging_window_status_var)
         self._i2c_logging_status_label.grid(column=500, row=100, sticky=(tk.E), padx=(0,15), pady=(0,5))
         self.is_logging_i2c = self.is_logging_i2c
+        self._i2c_log_rendered = 0
+        self.refresh_i2c_log()
 
 
         from .functions import validate_8bit_register
@@ -506,6 +794,7 @@ class Connection_Controller(GUI_Helper):
 
         self._i2c_window.destroy()
         del self._i2c_window
+        del self._i2c_logging_status_label
 
     def toggle_i2c_logging(self):
         self.is_logging_i2c = not self.is_logging_i2c
@@ -516,12 +805,44 @@ class Connection_Controller(GUI_Helper):
 
         self._toggle_logging_button.config(text=button_text)
 
+        if self.is_logging_i2c:
+            self._schedule_i2c_log_refresh()
+        else:
+            self.refresh_i2c_log()
+
     def clear_i2c_log(self):
+        self._i2c_trace.clear()
+        self._i2c_log_rendered = 0
+
         self._text_display.configure(state='normal')
         self._text_display.delete("1.0", tk.END)
         #self._text_display.insert('end', self.get_log())
         self._text_display.configure(state='disabled')
 
+    #  Appends the trace records added since the last refresh to the I2C monitor, if records were dropped
+    # from the trace in the meantime the display is rebuilt from the oldest record still kept
+    def refresh_i2c_log(self):
+        if not hasattr(self, "_i2c_window"):
+            return
+
+        since = self._i2c_log_rendered
+        self._text_display.configure(state='normal')
+        if since < self._i2c_trace.first_sequence:
+            self._text_display.delete("1.0", tk.END)
+        text = self._i2c_trace.render(since)
+        if text != "":
+            self._text_display.insert('end', text + "\n")
+            self._text_display.see('end')
+        self._text_display.configure(state='disabled')
+        self._i2c_log_rendered = self._i2c_trace.next_sequence
+
+    #  While logging, the I2C monitor is refreshed periodically, which only renders the new records
+    def _schedule_i2c_log_refresh(self):
+        if not hasattr(self, "_i2c_window") or not self.is_logging_i2c:
+            return
+        self.refresh_i2c_log()
+        self._i2c_window.after(500, self._schedule_i2c_log_refresh)
+
     def test_i2c_device(self):
         self._normalize_i2c_address()
 
@@ -631,13 +952,19 @@ class Connection_Controller(GUI_Helper):
         )
 
     def direct_i2c(self, commands: list[int]):
-        this_time = time.time_ns()
-        if this_time - self._time_last_i2c_command < self._successive_i2c_delay_us * 1000:
-            time.sleep(self._successive_i2c_delay_us/10E6)
-            this_time = time.time_ns()
-        self._time_last_i2c_command = this_time
-
-        return self._i2c_connection._direct_i2c(commands)
+        retVal = None
+        started = None if self._statistics is None else self._statistics.start()
+        journal_started = None if self._journal is None else self._journal.start()
+        self._pacer.wait(self.connection_type)
+        try:
+            retVal = self._i2c_connection._direct_i2c(commands)
+        finally:
+            self._pacer.done(self.connection_type)
+            if started is not None:
+                self._statistics.record_latency('direct', started)
+            if journal_started is not None:
+                self._journal.record('direct', 0, 0, 0, commands, retVal, journal_started, retVal is None)
+        return retVal
 
     @property
     def is_logging_i2c(self):
@@ -650,6 +977,9 @@ class Connection_Controller(GUI_Helper):
 
         self._do_logging_i2c = value
 
+        if not hasattr(self, "_i2c_logging_status_label"):  # Only the I2C monitor displays the logging status
+            return
+
         if self._do_logging_i2c:
             self._i2c_logging_window_status_var.set("Logging Enabled")
             self._i2c_logging_status_label.config(background = self._green_col, foreground = self._black_col)
@@ -688,13 +1018,18 @@ class Connection_Controller(GUI_Helper):
     def _normalize_register_address_length(self):
         self._i2c_window_register_address_length_var.set(str(int(self._i2c_window_register_address_length_var.get(), 0)))
 
-    def send_i2c_logging_message(self, message: str):
+    #  The message is only formatted with args when the trace is rendered
+    def send_i2c_logging_message(self, message: str, *args):
         if not self.is_logging_i2c:
             return
 
-        self._text_display.configure(state='normal')
-        self._text_display.insert('end', message + "\n")
-        self._text_display.configure(state='disabled')
+        self._i2c_trace.message(message, *args)
+
+    def log_i2c_transfer(self, operation: str, device_address: int, memory_address: int, data: list[int]):
+        if not self.is_logging_i2c:
+            return
+
+        self._i2c_trace.transfer(operation, device_address, memory_address, data)
 
     def display_i2c_scan_window(self):
         if hasattr(self, "_i2c_scan_window"):
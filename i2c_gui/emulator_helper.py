@@ -0,0 +1,390 @@
+#############################################################################
+# zlib License
+#
+# (C) 2023 Cristóvão Beirão da Cruz e Silva <cbeiraod@cern.ch>
+#
+# This software is provided 'as-is', without any express or implied
+# warranty.  In no event will the authors be held liable for any damages
+# arising from the use of this software.
+#
+# Permission is granted to anyone to use this software for any purpose,
+# including commercial applications, and to alter it and redistribute it
+# freely, subject to the following restrictions:
+#
+# 1. The origin of this software must not be misrepresented; you must not
+#    claim that you wrote the original software. If you use this software
+#    in a product, an acknowledgment in the product documentation would be
+#    appreciated but is not required.
+# 2. Altered source versions must be plainly marked as such, and must not be
+#    misrepresented as being the original software.
+# 3. This notice may not be removed or altered from any source distribution.
+#############################################################################
+
+from __future__ import annotations
+
+from .i2c_connection_helper import I2C_Connection_Helper
+from .i2c_messages import I2CMessages
+from .i2c_transaction_batch import I2C_Transaction
+from .chips.address_space_controller import compile_decoded_fields
+from .chips.address_space_controller import get_indexed_block_address_range
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from .base_gui import Base_GUI
+
+try:
+    import tkinter as tk
+    import tkinter.ttk as ttk  # For themed widgets (gives a more native visual to the elements)
+except ImportError:
+    tk = None
+    ttk = None
+import logging
+import time
+
+from math import ceil
+
+#  The memory image of an emulated I2C device, built from an address space of a register model: the registers start
+# with their default value and writes to read-only registers are ignored, like on the chip. Derived classes emulate
+# the behaviour of the chip through _write_register and _register_written
+class Emulated_Memory:
+    def __init__(self, address_space_model: dict):
+        self._memory_size = address_space_model["Memory Size"]
+        self._register_bits = address_space_model["Register Bits"]
+        self._register_length = address_space_model.get("Register Length", 8)
+        self._register_blocks = address_space_model["Register Blocks"]
+
+        self._memory = bytearray(self._memory_size)
+        self._read_only_map = bytearray(self._memory_size)
+
+        for block_name, block in address_space_model["Register Blocks"].items():
+            if "Base Address" in block:
+                base_addresses = [block["Base Address"]]
+            else:
+                _, _, block_refs = get_indexed_block_address_range(block_name, block["Indexer"], block["Registers"])
+                base_addresses = [block_refs[block_ref]['base_address'] for block_ref in block_refs]
+
+            for register in block["Registers"].values():
+                read_only = register.get('read_only', block.get('read_only', False))
+                for base_address in base_addresses:
+                    self._memory[base_address + register["offset"]] = register["default"]
+                    self._read_only_map[base_address + register["offset"]] = read_only
+
+    #  Compiles a decoded value of the model into (register offset, register shift, mask, value shift) fields,
+    # for get_field and set_field
+    def _compile_decoded_fields(self, block_name: str, decoding_info: dict):
+        return compile_decoded_fields(self._register_blocks[block_name]["Registers"], decoding_info["position"], decoding_info["bits"], self._register_length)
+
+    @property
+    def memory_size(self):
+        return self._memory_size
+
+    @property
+    def register_bits(self):
+        return self._register_bits
+
+    @property
+    def memory(self):
+        return self._memory
+
+    def _check_range(self, address: int, byte_count: int):
+        if address < 0 or address + byte_count > self._memory_size:
+            raise RuntimeError("The access to {} registers starting at 0x{:04x} is outside of the emulated memory (size {})".format(byte_count, address, self._memory_size))
+
+    def read(self, address: int, byte_count: int):
+        self._check_range(address, byte_count)
+        return list(self._memory[address:address + byte_count])
+
+    def write(self, address: int, data: list[int]):
+        self._check_range(address, len(data))
+        for offset, value in enumerate(data):
+            self._write_register(address + offset, value)
+
+    def _write_register(self, address: int, value: int):
+        if self._read_only_map[address]:
+            return
+        old_value = self._memory[address]
+        self._memory[address] = value & 0xff
+        self._register_written(address, old_value)
+
+    #  Called after every register write which was not ignored, derived classes react to the registers which drive the chip
+    def _register_written(self, address: int, old_value: int):
+        pass
+
+    #  Decoded values can be read and set by the emulated chip itself, even on read-only registers
+    def get_field(self, base_address: int, fields: tuple):
+        value = 0
+        for offset, register_shift, mask, value_shift in fields:
+            value |= ((self._memory[base_address + offset] >> register_shift) & mask) << value_shift
+        return value
+
+    def set_field(self, base_address: int, fields: tuple, value: int):
+        for offset, register_shift, mask, value_shift in fields:
+            register = self._memory[base_address + offset] & ~(mask << register_shift)
+            self._memory[base_address + offset] = register | (((value >> value_shift) & mask) << register_shift)
+
+#  Emulated I2C interface, the I2C devices are Emulated_Memory objects which hold the register contents, so a script,
+# a notebook or a GUI can be run against (an emulation of) the chips without any hardware.
+# The time taken by the real interfaces is modelled by a latency profile:
+#   batch_us: fixed cost of each call to the interface (e.g. a network round trip which carries a whole batch)
+#   transaction_us: fixed cost of each I2C transaction (e.g. a USB round trip)
+#   byte_us: cost of each byte on the bus, including the device and register address bytes (90 us per byte at 100 kHz)
+# In realtime mode the emulator sleeps for the modelled time, otherwise the time is only accounted in the statistics
+class Emulator_Helper(I2C_Connection_Helper):
+    native_batch = True
+    latency_profiles = {
+        "Ideal": {"batch_us": 0, "transaction_us": 0, "byte_us": 0},
+        "USB-ISS": {"batch_us": 0, "transaction_us": 1000, "byte_us": 90},
+        "FPGA-Eth": {"batch_us": 300, "transaction_us": 20, "byte_us": 90},
+    }
+
+    def __init__(self, parent: Base_GUI, max_seq_byte: int = None, swap_endian: bool = False, profile: str = "Ideal", realtime: bool = True):
+        super().__init__(parent, max_seq_byte, swap_endian)
+
+        self._devices: dict[int, Emulated_Memory] = {}
+        self._direct_pointers = {}
+
+        self._profile_var = self._build_variable("String", value=profile)
+        self._etroc2_address_var = self._build_variable("String", value="0x72")
+        self._ws_address_var = self._build_variable("String", value="")
+        self.realtime = realtime
+
+        self.reset_statistics()
+
+    @property
+    def profile(self):
+        return self._profile_var.get()
+
+    @profile.setter
+    def profile(self, value: str):
+        if value not in self.latency_profiles:
+            raise RuntimeError("Unknown emulator latency profile: {}".format(value))
+        self._profile_var.set(value)
+
+    @property
+    def etroc2_address(self):
+        return self._etroc2_address_var.get()
+
+    @etroc2_address.setter
+    def etroc2_address(self, value: str):
+        self._etroc2_address_var.set(value)
+
+    @property
+    def ws_address(self):
+        return self._ws_address_var.get()
+
+    @ws_address.setter
+    def ws_address(self, value: str):
+        self._ws_address_var.set(value)
+
+    @property
+    def devices(self):
+        return self._devices
+
+    def add_device(self, address: int, device: Emulated_Memory):
+        self._devices[address] = device
+        return device
+
+    def remove_device(self, address: int):
+        self._devices.pop(address, None)
+        self._direct_pointers.pop(address, None)
+
+    #  Adds an emulated ETROC2 and, optionally, its waveform sampler. The seed fixes the pixel baselines and noise
+    # widths found by the auto-calibration and the waveform in the sampler memory, so runs are reproducible
+    def add_etroc2(self, address: int = 0x72, ws_address: int = None, seed: int = 0):
+        from .chips.etroc2_emulator import Emulated_ETROC2
+        from .chips.etroc2_emulator import Emulated_Waveform_Sampler
+
+        chip = self.add_device(address, Emulated_ETROC2(seed))
+        if ws_address is not None:
+            self.add_device(ws_address, Emulated_Waveform_Sampler(seed))
+        return chip
+
+    def _get_device(self, address: int):
+        if address not in self._devices:
+            raise RuntimeError("No emulated I2C device with address 0x{:02x}".format(address))
+        return self._devices[address]
+
+    def reset_statistics(self):
+        self._batches = 0
+        self._transactions = 0
+        self._bytes_read = 0
+        self._bytes_written = 0
+        self._emulated_us = 0
+
+    @property
+    def statistics(self):
+        return {
+            "batches": self._batches,
+            "transactions": self._transactions,
+            "bytes_read": self._bytes_read,
+            "bytes_written": self._bytes_written,
+            "emulated_time_s": self._emulated_us/10**6,
+        }
+
+    #  Accounts for a call to the interface with transactions carrying a given number of bytes on the bus each
+    def _spend(self, transaction_bytes: list[int]):
+        profile = self.latency_profiles[self.profile]
+        duration_us = profile["batch_us"] + len(transaction_bytes) * profile["transaction_us"] + sum(transaction_bytes) * profile["byte_us"]
+
+        self._batches += 1
+        self._transactions += len(transaction_bytes)
+        self._emulated_us += duration_us
+        if self.realtime and duration_us > 0:
+            time.sleep(duration_us/10**6)
+
+    #  Device address byte, register address bytes, data and, for reads, the device address byte after the repeated start
+    def _bus_bytes(self, operation: str, byte_count: int, register_bits: int):
+        return 1 + ceil(register_bits/8) + byte_count + (1 if operation == 'read' else 0)
+
+    def _access(self, transaction: I2C_Transaction):
+        device = self._get_device(transaction.device_address)
+        if transaction.operation == 'read':
+            self._bytes_read += transaction.byte_count
+            transaction.set_result(device.read(transaction.memory_address, transaction.byte_count))
+        else:
+            self._bytes_written += transaction.byte_count
+            device.write(transaction.memory_address, transaction.data)
+            transaction.set_result()
+
+    def _check_i2c_device(self, address: int):
+        self._spend([1])
+        return address in self._devices
+
+    def _write_i2c_device_memory(self, address: int, memory_address: int, data: list[int], register_bits: int = 16, write_type: str = 'Normal'):
+        self._execute_i2c_batch([I2C_Transaction('write', address, memory_address, len(data), list(data), register_bits, 8, write_type)])
+
+    def _read_i2c_device_memory(self, address: int, memory_address: int, byte_count: int, register_bits: int = 16, read_type: str = 'Normal') -> list[int]:
+        transaction = I2C_Transaction('read', address, memory_address, byte_count, None, register_bits, 8, read_type)
+        self._execute_i2c_batch([transaction])
+        return transaction.result()
+
+    #  The whole batch is a single call to the interface, transactions longer than max_seq_byte cost one transaction per chunk
+    def _execute_i2c_batch(self, transactions: list[I2C_Transaction]):
+        transaction_bytes = []
+        for transaction in transactions:
+            max_seq_byte = transaction.byte_count if self._max_seq_byte is None else self._max_seq_byte
+            for offset in range(0, transaction.byte_count, max(max_seq_byte, 1)):
+                transaction_bytes += [self._bus_bytes(transaction.operation, min(max_seq_byte, transaction.byte_count - offset), transaction.register_bits)]
+            self._access(transaction)
+        self._spend(transaction_bytes)
+
+    #  Runs the direct I2C commands on the emulated devices: after a start, the first written byte selects the device and
+    # direction, the next register_bits/8 written bytes set the register pointer and any further bytes are written from the
+    # pointer on. Reads return the registers from the pointer on, which advances like the address auto-increment of the chips
+    def _direct_i2c(self, commands: list[int]) -> list[int]:
+        data = []
+        device_address = None
+        reading = False
+        written = []
+        bus_bytes = 0
+
+        def finish_write():
+            if device_address is None or reading or len(written) == 0:
+                return
+            device = self._get_device(device_address)
+            pointer_bytes = ceil(device.register_bits/8)
+            if len(written) >= pointer_bytes:
+                pointer = int.from_bytes(bytes(written[:pointer_bytes]), 'big')
+                device.write(pointer, written[pointer_bytes:])
+                self._bytes_written += len(written) - pointer_bytes
+                self._direct_pointers[device_address] = pointer + len(written) - pointer_bytes
+
+        idx = 0
+        while idx < len(commands):
+            command = commands[idx]
+            idx += 1
+
+            if command in [I2CMessages.START, I2CMessages.RESTART, I2CMessages.STOP]:
+                finish_write()
+                device_address = None
+                reading = False
+                written = []
+            elif command == I2CMessages.NACK:
+                pass
+            elif isinstance(command, I2CMessages) and I2CMessages.WRITE1.value <= command.value <= I2CMessages.WRITE16.value:
+                byte_count = command.value - I2CMessages.WRITE1.value + 1
+                payload = [int(byte) for byte in commands[idx:idx + byte_count]]
+                idx += byte_count
+                bus_bytes += byte_count
+                if device_address is None and len(payload) > 0:
+                    device_address = payload[0] >> 1
+                    reading = (payload[0] & 0x1) == 1
+                    self._get_device(device_address)
+                    payload = payload[1:]
+                written += payload
+            elif isinstance(command, I2CMessages) and I2CMessages.READ1.value <= command.value <= I2CMessages.READ16.value:
+                if device_address is None or not reading:
+                    raise RuntimeError("Direct I2C read without addressing a device for reading first")
+                byte_count = command.value - I2CMessages.READ1.value + 1
+                pointer = self._direct_pointers.get(device_address, 0)
+                data += self._get_device(device_address).read(pointer, byte_count)
+                self._direct_pointers[device_address] = pointer + byte_count
+                self._bytes_read += byte_count
+                bus_bytes += byte_count
+            else:
+                raise RuntimeError("Unknown direct I2C command: {}".format(command))
+        finish_write()
+
+        self._spend([bus_bytes])
+        return data
+
+    def display_in_frame(self, frame: ttk.Frame):
+        if hasattr(self, '_frame') and self._frame is not None:
+            tmp = self._frame.children.copy()
+            for widget in tmp:
+                tmp[widget].destroy()
+
+        self._frame = frame
+
+        self._profile_label = ttk.Label(self._frame, text="Profile:")
+        self._profile_label.grid(column=0, row=0, sticky=(tk.W, tk.E))
+
+        self._profile_option = ttk.OptionMenu(self._frame, self._profile_var, self._profile_var.get(), *self.latency_profiles.keys())
+        self._profile_option.grid(column=1, row=0, sticky=(tk.W, tk.E), padx=(0,30))
+
+        self._frame.columnconfigure(2, weight=1)
+
+        self._etroc2_address_label = ttk.Label(self._frame, text="ETROC2:")
+        self._etroc2_address_label.grid(column=3, row=0, sticky=(tk.W, tk.E))
+
+        self._etroc2_address_entry = ttk.Entry(self._frame, textvariable=self._etroc2_address_var, width=6)
+        self._etroc2_address_entry.grid(column=4, row=0, sticky=(tk.W, tk.E), padx=(0,30))
+
+        self._ws_address_label = ttk.Label(self._frame, text="WS:")
+        self._ws_address_label.grid(column=5, row=0, sticky=(tk.W, tk.E))
+
+        self._ws_address_entry = ttk.Entry(self._frame, textvariable=self._ws_address_var, width=6)
+        self._ws_address_entry.grid(column=6, row=0, sticky=(tk.W, tk.E), padx=(0,30))
+
+        self._frame.columnconfigure(7, weight=1)
+
+    def validate_connection_params(self):
+        if self.profile not in self.latency_profiles:
+            self.send_message("Unknown emulator latency profile: {}".format(self.profile), "Error")
+            return False
+
+        from .functions import validate_i2c_address
+        for name, address in [("ETROC2", self.etroc2_address), ("waveform sampler", self.ws_address)]:
+            if address != "" and (address == "0x" or not validate_i2c_address(address)):
+                self.send_message("Please enter a valid I2C address for the emulated {}".format(name), "Error")
+                return False
+
+        return True
+
+    #  Without any device added beforehand, an ETROC2 (and waveform sampler) is emulated at the configured addresses.
+    # The devices are kept when disconnecting, so their registers survive a reconnection
+    def connect(self, no_connect: bool = False):
+        self._no_connect = no_connect
+        if len(self._devices) == 0 and self.etroc2_address != "":
+            ws_address = None if self.ws_address == "" else int(self.ws_address, 0)
+            self.add_etroc2(int(self.etroc2_address, 0), ws_address)
+
+        for widget in ["_etroc2_address_entry", "_ws_address_entry"]:
+            if hasattr(self, widget):
+                getattr(self, widget).config(state="disabled")
+        self.send_message("Connected to the I2C emulator with {} devices ({} latency profile)".format(len(self._devices), self.profile))
+        return True
+
+    def disconnect(self):
+        for widget in ["_etroc2_address_entry", "_ws_address_entry"]:
+            if hasattr(self, widget):
+                getattr(self, widget).config(state="normal")
@@ -23,26 +23,47 @@
 from __future__ import annotations
 
 from .i2c_connection_helper import I2C_Connection_Helper
-from .base_gui import Base_GUI
-
-import tkinter as tk
-import tkinter.ttk as ttk  # For themed widgets (gives a more native visual to the elements)
+from .i2c_transaction_batch import I2C_Transaction
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from .base_gui import Base_GUI
+
+try:
+    import tkinter as tk
+    import tkinter.ttk as ttk  # For themed widgets (gives a more native visual to the elements)
+except ImportError:
+    tk = None
+    ttk = None
 import logging
 import time
 
+import asyncio
 import socket
 import struct
 from .functions import validate_hostname
 
 class FPGA_ETH_Helper(I2C_Connection_Helper):
-    def __init__(self, parent: Base_GUI, max_seq_byte: int = 8, swap_endian: bool = False):
+    native_batch = True
+    #  Replies to status/config reads which may be left waiting on the socket before they are collected,
+    # keeps the FPGA from stalling on a full TCP window during long pipelined transfers
+    _max_outstanding_replies = 256
+
+    def __init__(self, parent: Base_GUI, max_seq_byte: int = None, swap_endian: bool = False, i2c_clock_hz: int = 100000):
         super().__init__(parent, max_seq_byte, swap_endian)
 
         self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._recv_buffer = bytearray(4*self._max_outstanding_replies)
+
+        self._hostname_var = self._build_variable("String", value='192.168.2.3') # FPGA IP address
 
-        self._hostname_var = tk.StringVar(value='192.168.2.3') # FPGA IP address
+        self._port_var = self._build_variable("Int", value=1024) # port number
 
-        self._port_var = tk.IntVar(value=1024) # port number
+        #  The I2C messages are spaced by their time on the wire at this clock, times the settle factor.
+        # If the firmware exposes a busy flag in status register 0, setting status_busy_mask polls it instead
+        self.i2c_clock_hz = i2c_clock_hz
+        self.i2c_settle_factor = 2.0
+        self.status_busy_mask = None
+        self.status_poll_timeout_s = 0.1
 
     @property
     def hostname(self):
@@ -61,141 +82,275 @@ class FPGA_ETH_Helper(I2C_Connection_Helper):
         self._port_var.set(value)
 
     def _check_i2c_device(self, address: int):
-        mode = 0
-        wr = 1
-        val = mode << 24 | address << 17 | wr << 16  # write device addr and read one byte, ignore read address
+        # write device addr and read one byte, ignore read address
+        message = self._i2c_message(mode = 0, i2c_address = address, wr = 1, read_back = True)
+        status = self._run_i2c_messages([message])[0]
 
-        self._write_fpga_config_register(4, 0xffff & val)
-        self._write_fpga_config_register(5, 0xffff & (val>>16))
-        time.sleep(0.01)
-        self._pulse_fpga_register(0x0001)  # Send a pulse to IIC module
-        time.sleep(0.01)
-
-        ack_error = self._read_fpga_status_register(0) & 0x0100  # the 9th bit of status register is ACK_ERROR
+        ack_error = status & 0x0100  # the 9th bit of status register is ACK_ERROR
         return (ack_error == 0)  # if no error, return true
 
     def _write_i2c_device_memory(self, address: int, memory_address: int, data: list[int], register_bits: int = 16, write_type: str = 'Normal'):
+        if write_type != 'Normal':
+            raise RuntimeError("The FPGA ETH interface does not support write types which are not of the normal type")
+        messages = []
         for index in range(len(data)):
-            self._write_i2c_device_register(
-                i2c_address = address,
-                memory_address = memory_address + index,
-                data = data[index],
-                addressing_mode = register_bits,
-                write_type = write_type,
-            )
+            this_messages = self._i2c_register_messages('write', address, memory_address + index, register_bits, data[index])
+            if this_messages is None:
+                return
+            messages += this_messages
+        self._run_i2c_messages(messages)
         return
 
     def _write_i2c_device_register(self, i2c_address: int, memory_address: int, data: int, addressing_mode: int = 16, write_type: str = 'Normal'):
-        if write_type != 'Normal':
-            raise RuntimeError("The FPGA ETH interface does not support write types which are not of the normal type")
-        wr = 0  # Operation is a write
-        if addressing_mode == 8 :
-            mode = 1  # Send an I2C message where 2 bytes are acted on
-            val = mode << 24 | (0x7f & i2c_address) << 17 | wr << 16 | (0xff & memory_address) << 8 | (0xff & data)
-            self._write_fpga_config_register(4, 0xffff & val)
-            self._write_fpga_config_register(5, 0xffff & (val>>16))
-            time.sleep(0.01)
-            self._pulse_fpga_register(0x0001)
-            time.sleep(0.01)
-        elif addressing_mode == 16:
-            memory_address_lsb = 0x00ff & memory_address
-            memory_address_msb = 0xff00 & memory_address
-            mode = 2  # Send an I2C message where 3 bytes are acted on
-            val = mode << 24 | (0x7f & i2c_address) << 17 | wr << 16 | (0xff & memory_address_lsb) << 8 | (0xff & data)
-            self._write_fpga_config_register(4, 0xffff & val)
-            self._write_fpga_config_register(5, 0xffff & (val>>16))
-            self._write_fpga_config_register(6, 0xffff & (0xff &(memory_address_msb >> 8)))
-            time.sleep(0.01)
-            self._pulse_fpga_register(0x0001)
-            time.sleep(0.01)
-        else:
-            self.send_message("Unknown adressing mode for writing an i2c device register", "Error")
-        return
+        self._write_i2c_device_memory(i2c_address, memory_address, [data], addressing_mode, write_type)
 
     def _read_i2c_device_memory(self, address: int, memory_address: int, byte_count: int, register_bits: int = 16, read_type: str = 'Normal') -> list[int]:
-        retVal = []
+        if read_type != 'Normal':
+            raise RuntimeError("The FPGA ETH interface does not support read types which are not of the normal type")
+        messages = []
         for index in range(byte_count):
-            retVal += [self._read_i2c_device_register(
-                i2c_address = address,
-                memory_address = memory_address + index,
-                addressing_mode = register_bits,
-                read_type = read_type,
-            )]
-        return retVal
+            this_messages = self._i2c_register_messages('read', address, memory_address + index, register_bits)
+            if this_messages is None:
+                return []
+            messages += this_messages
+        return [status & 0x00ff for status in self._run_i2c_messages(messages)]
 
     def _read_i2c_device_register(self, i2c_address: int, memory_address: int, addressing_mode: int = 16, read_type: str = 'Normal') -> int:
-        if read_type != 'Normal':
-            raise RuntimeError("The FPGA ETH interface does not support read types which are not of the normal type")
-        if addressing_mode == 8 :
-            mode = 0  # Send an I2C message where 1 byte is acted on
-            wr = 0  # Operation is a write
-            val = mode << 24 | (0x7f & i2c_address) << 17 | wr << 16 | (0xff & memory_address) << 8 | 0x00
-            #write 8 bit address first
-            self._write_fpga_config_register(4, 0xffff & val)
-            self._write_fpga_config_register(5, 0xffff & (val>>16))
-            time.sleep(0.01)
-            self._pulse_fpga_register(0x0001)
-            time.sleep(0.01)
-
-            #read 8 bit data
-            wr = 1  # Operation is a read
-            val = mode << 24 | (0x7f & i2c_address) << 17 | wr << 16 | (0xff & memory_address) << 8 | 0x00
-            self._write_fpga_config_register(4, 0xffff & val)
-            self._write_fpga_config_register(5, 0xffff & (val>>16))
-            time.sleep(0.01)
-            self._pulse_fpga_register(0x0001)
-            time.sleep(0.01)
+        retVal = self._read_i2c_device_memory(i2c_address, memory_address, 1, addressing_mode, read_type)
+        if len(retVal) == 0:
+            return 0
+        return retVal[0]
+
+    #  All registers of all the transactions are sent as a single pipeline of I2C messages
+    def _execute_i2c_batch(self, transactions: list[I2C_Transaction]):
+        status = self._run_i2c_messages(self._batch_messages(transactions))
+        self._set_batch_results(transactions, status)
+
+    #  The same pipeline, but the socket is used in non-blocking mode and the waits between messages are
+    # handed back to the event loop, so no thread is needed
+    async def _execute_i2c_batch_async(self, transactions: list[I2C_Transaction]):
+        messages = self._batch_messages(transactions)
+        self._socket.setblocking(False)
+        try:
+            status = await self._run_i2c_messages_async(messages)
+        finally:
+            self._socket.setblocking(True)
+        self._set_batch_results(transactions, status)
+
+    def _batch_messages(self, transactions: list[I2C_Transaction]):
+        messages = []
+        for transaction in transactions:
+            if transaction.access_type != 'Normal':
+                raise RuntimeError("The FPGA ETH interface does not support access types which are not of the normal type")
+
+            for index in range(transaction.byte_count):
+                memory_address = transaction.memory_address + index
+                if self._swap_endian and transaction.register_bits == 16:
+                    memory_address = self.swap_endian_16bit(memory_address)
+
+                if transaction.operation == 'read':
+                    this_messages = self._i2c_register_messages('read', transaction.device_address, memory_address, transaction.register_bits)
+                else:
+                    this_messages = self._i2c_register_messages('write', transaction.device_address, memory_address, transaction.register_bits, transaction.data[index])
+                if this_messages is None:
+                    raise RuntimeError("Unknown addressing mode for the FPGA ETH batch execution: {}".format(transaction.register_bits))
+                messages += this_messages
+        return messages
+
+    def _set_batch_results(self, transactions: list[I2C_Transaction], status: list[int]):
+        idx = 0
+        for transaction in transactions:
+            if transaction.operation == 'read':
+                transaction.set_result([value & 0x00ff for value in status[idx:idx + transaction.byte_count]])
+                idx += transaction.byte_count
+            else:
+                transaction.set_result()
+
+    #  Messages needed to read or write a single register, the register address is always written first
+    # and for reads the data byte is then fetched with a second message
+    def _i2c_register_messages(self, operation: str, i2c_address: int, memory_address: int, addressing_mode: int, data: int = 0):
+        if addressing_mode == 8:
+            if operation == 'write':
+                # Send an I2C message where 2 bytes are acted on
+                return [self._i2c_message(1, i2c_address, 0, memory_address, data)]
+            # Write the 8 bit address, then read 8 bit data
+            return [
+                self._i2c_message(0, i2c_address, 0, memory_address),
+                self._i2c_message(0, i2c_address, 1, memory_address, read_back = True),
+            ]
         elif addressing_mode == 16:
             memory_address_lsb = 0x00ff & memory_address
-            memory_address_msb = 0xff00 & memory_address
-            #write 16 bit address first
-            mode = 1  # Send an I2C message where 2 bytes are acted on
-            wr = 0  # Operation is a write
-            val = mode << 24 | (0x7f & i2c_address) << 17 | wr << 16 | (0xff & memory_address_lsb) << 8 | (0xff & (memory_address_msb >> 8))
-            self._write_fpga_config_register(4, 0xffff & val)
-            self._write_fpga_config_register(5, 0xffff & (val>>16))
-            time.sleep(0.01)
-            self._pulse_fpga_register(0x0001)
-            time.sleep(0.01)
-
-            #read 8 bit data
-            mode = 0  # Send an I2C message where 1 byte is acted on
-            wr = 1  # Operation is a read
-            val = mode << 24 | (0x7f & i2c_address) << 17 | 1 << 16 | (0xff & memory_address_lsb) << 8 | 0x00
-            self._write_fpga_config_register(4, 0xffff & val)
-            self._write_fpga_config_register(5, 0xffff & (val>>16))
-            time.sleep(0.01)
-            self._pulse_fpga_register(0x0001)
-            time.sleep(0.01)
+            memory_address_msb = (0xff00 & memory_address) >> 8
+            if operation == 'write':
+                # Send an I2C message where 3 bytes are acted on
+                return [self._i2c_message(2, i2c_address, 0, memory_address_lsb, data, extra_byte = memory_address_msb)]
+            # Write the 16 bit address, then read 8 bit data
+            return [
+                self._i2c_message(1, i2c_address, 0, memory_address_lsb, memory_address_msb),
+                self._i2c_message(0, i2c_address, 1, memory_address_lsb, read_back = True),
+            ]
         else:
-            self.send_message("Unknown adressing mode for reading an i2c device register", "Error")
-        return self._read_fpga_status_register(0) & 0x00ff
+            self.send_message("Unknown adressing mode for {} an i2c device register".format("writing" if operation == 'write' else "reading"), "Error")
+            return None
+
+    #  A message is the list of command words which configure and start the I2C module, along with its
+    # duration on the wire (start, device address and mode + 1 bytes with their ack, stop) in bits
+    def _i2c_message(self, mode: int, i2c_address: int, wr: int, byte1: int = 0, byte0: int = 0, extra_byte: int = None, read_back: bool = False):
+        val = mode << 24 | (0x7f & i2c_address) << 17 | wr << 16 | (0xff & byte1) << 8 | (0xff & byte0)
+        words = [
+            self._config_register_word(4, 0xffff & val),
+            self._config_register_word(5, 0xffff & (val>>16)),
+        ]
+        if extra_byte is not None:
+            words += [self._config_register_word(6, 0xff & extra_byte)]
+        words += [self._pulse_register_word(0x0001)]  # Send a pulse to IIC module
+        return (words, 9*(mode + 2) + 2, read_back)
+
+    #  Each message is sent in a single buffer as soon as the previous one is done on the wire. The status read
+    # of a read message is sent along with the next message and the replies are only collected at the end
+    # (or once too many are waiting), so the host does not wait for a round trip on every register.
+    # Returns the status register value after each read back message
+    def _run_i2c_messages(self, messages: list[tuple[list[int], int, bool]]) -> list[int]:
+        status = []
+        pending_words = []
+        outstanding = 0
+        for words, wire_bits, read_back in messages:
+            self._send_words(pending_words + words)
+            pending_words = []
+
+            if self.status_busy_mask is not None:
+                this_status = self._poll_i2c_status(wire_bits)
+                if read_back:
+                    status += [this_status]
+                continue
+
+            time.sleep(wire_bits * self.i2c_settle_factor / self.i2c_clock_hz)
+            if read_back:
+                pending_words = [self._status_register_word(0)]
+                outstanding += 1
+                if outstanding >= self._max_outstanding_replies:
+                    self._send_words(pending_words)
+                    pending_words = []
+                    status += self._recv_words(outstanding)
+                    outstanding = 0
+
+        if len(pending_words) > 0:
+            self._send_words(pending_words)
+        if outstanding > 0:
+            status += self._recv_words(outstanding)
+        return status
+
+    def _poll_i2c_status(self, wire_bits: int):
+        time.sleep(wire_bits / self.i2c_clock_hz)
+        deadline = time.perf_counter() + self.status_poll_timeout_s
+        while True:
+            status = self._read_fpga_status_register(0)
+            if status & self.status_busy_mask == 0:
+                return status
+            if time.perf_counter() > deadline:
+                raise RuntimeError("Timed out waiting for the FPGA I2C module to finish the I2C message")
+
+    async def _run_i2c_messages_async(self, messages: list[tuple[list[int], int, bool]]) -> list[int]:
+        status = []
+        pending_words = []
+        outstanding = 0
+        for words, wire_bits, read_back in messages:
+            await self._send_words_async(pending_words + words)
+            pending_words = []
+
+            if self.status_busy_mask is not None:
+                this_status = await self._poll_i2c_status_async(wire_bits)
+                if read_back:
+                    status += [this_status]
+                continue
+
+            await asyncio.sleep(wire_bits * self.i2c_settle_factor / self.i2c_clock_hz)
+            if read_back:
+                pending_words = [self._status_register_word(0)]
+                outstanding += 1
+                if outstanding >= self._max_outstanding_replies:
+                    await self._send_words_async(pending_words)
+                    pending_words = []
+                    status += await self._recv_words_async(outstanding)
+                    outstanding = 0
+
+        if len(pending_words) > 0:
+            await self._send_words_async(pending_words)
+        if outstanding > 0:
+            status += await self._recv_words_async(outstanding)
+        return status
+
+    async def _poll_i2c_status_async(self, wire_bits: int):
+        await asyncio.sleep(wire_bits / self.i2c_clock_hz)
+        deadline = time.perf_counter() + self.status_poll_timeout_s
+        while True:
+            await self._send_words_async([self._status_register_word(0)])
+            status = (await self._recv_words_async(1))[0]
+            if status & self.status_busy_mask == 0:
+                return status
+            if time.perf_counter() > deadline:
+                raise RuntimeError("Timed out waiting for the FPGA I2C module to finish the I2C message")
+
+    def _send_words(self, words: list[int]):
+        self._socket.sendall(struct.pack('>{}I'.format(len(words)), *words))
+
+    def _recv_words(self, count: int) -> list[int]:
+        size = 4*count
+        if len(self._recv_buffer) < size:
+            self._recv_buffer = bytearray(size)
+        view = memoryview(self._recv_buffer)
+        received = 0
+        while received < size:
+            this_size = self._socket.recv_into(view[received:size], size - received)
+            if this_size == 0:
+                raise RuntimeError("The connection to the FPGA was closed while waiting for a reply")
+            received += this_size
+        return list(struct.unpack_from('>{}I'.format(count), self._recv_buffer))
+
+    async def _send_words_async(self, words: list[int]):
+        await asyncio.get_running_loop().sock_sendall(self._socket, struct.pack('>{}I'.format(len(words)), *words))
+
+    async def _recv_words_async(self, count: int) -> list[int]:
+        loop = asyncio.get_running_loop()
+        size = 4*count
+        if len(self._recv_buffer) < size:
+            self._recv_buffer = bytearray(size)
+        view = memoryview(self._recv_buffer)
+        received = 0
+        while received < size:
+            this_size = await loop.sock_recv_into(self._socket, view[received:size])
+            if this_size == 0:
+                raise RuntimeError("The connection to the FPGA was closed while waiting for a reply")
+            received += this_size
+        return list(struct.unpack_from('>{}I'.format(count), self._recv_buffer))
+
+    def _config_register_word(self, register_address: int, data: int):
+        return 0x00200000 + (register_address << 16) + data
+
+    def _status_register_word(self, register_address: int):
+        return 0x80000000 + (register_address << 16)
+
+    def _pulse_register_word(self, register_address: int):
+        return 0x000b0000 + register_address
 
     def _read_fpga_config_register(self, register_address: int):
-        package_data = 0x80200000 + (register_address << 16)
-        self._socket.sendall(struct.pack('I', package_data)[::-1])
-        return struct.unpack('I', self._socket.recv(4)[::-1])[0]
+        self._send_words([0x80000000 | self._config_register_word(register_address, 0)])
+        return self._recv_words(1)[0]
 
     def _write_fpga_config_register(self, register_address: int, data: int):
-        package_data = 0x00200000 + (register_address << 16) + data
-        self._socket.sendall(struct.pack('I',package_data)[::-1])
+        self._send_words([self._config_register_word(register_address, data)])
 
     def _read_fpga_status_register(self, register_address: int):
-        package_data = 0x80000000 + (register_address << 16)
-        self._socket.sendall(struct.pack('I',package_data)[::-1])
-        return struct.unpack('I', self._socket.recv(4)[::-1])[0]
+        self._send_words([self._status_register_word(register_address)])
+        return self._recv_words(1)[0]
 
     def _pulse_fpga_register(self, register_address: int):
-        package_data = 0x000b0000 + register_address
-        self._socket.sendall(struct.pack('I',package_data)[::-1])
+        self._send_words([self._pulse_register_word(register_address)])
 
     def _read_fpga_data_fifo(self, count: int):
         package_data = 0x00190000 + (count -1)
-        self._socket.sendall(struct.pack('I', package_data)[::-1])
-        fifo_data = []
-        for i in range(count):
-            fifo_data += [struct.unpack('I', self._socket.recv(4)[::-1])[0]]
-        return fifo_data
+        self._send_words([package_data])
+        return self._recv_words(count)
 
     def display_in_frame(self, frame: ttk.Frame):
         if hasattr(self, '_frame') and self._frame is not None:
@@ -242,6 +397,7 @@ class FPGA_ETH_Helper(I2C_Connection_Helper):
         self._no_connect = no_connect
         if not no_connect:  # For emulated connection
             try:
+                self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)  # The command buffers must not be held back and merged
                 self._socket.connect((self.hostname, self.port))
             except socket.error:
                 self.send_message("Unable to connect to {} on port {}".format(self.hostname, self.port))
@@ -22,10 +22,23 @@
 
 from __future__ import annotations
 
-import tkinter as tk
+try:
+    import tkinter as tk
+except ImportError:  # Without tkinter only the headless mode is available
+    tk = None
 import logging
 
+from .headless_variable import Headless_StringVar
+from .headless_variable import Headless_IntVar
+from .headless_variable import Headless_BooleanVar
+
 class GUI_Helper:
+    _headless_variables = {
+        "String": Headless_StringVar,
+        "Int": Headless_IntVar,
+        "Boolean": Headless_BooleanVar,
+    }
+
     def __init__(self, parent: 'GUI_Helper', frame: tk.Tk, logger: logging.Logger):
         self._parent = parent
         self._frame = frame
@@ -37,6 +50,17 @@ class GUI_Helper:
             raise RuntimeError("You can only find if the app is connected from a stack of classes which handle the connection correctly")
         return self._parent.is_connected
 
+    @property
+    def is_headless(self):
+        if self._parent is None:
+            return tk is None
+        return self._parent.is_headless
+
+    def _build_variable(self, var_type: str = "String", value = None, name: str = None):
+        if self.is_headless:
+            return self._headless_variables[var_type](value=value, name=name)
+        return getattr(tk, var_type + "Var")(value=value, name=name)
+
     def send_message(self, message:str, status:str = "Message"):
         if self._parent is None:
             raise RuntimeError("You can only call send_message from a stack of classes which route the message correctly")
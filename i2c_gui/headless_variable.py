@@ -0,0 +1,95 @@
+#############################################################################
+# zlib License
+#
+# (C) 2023 Cristóvão Beirão da Cruz e Silva <cbeiraod@cern.ch>
+#
+# This software is provided 'as-is', without any express or implied
+# warranty.  In no event will the authors be held liable for any damages
+# arising from the use of this software.
+#
+# Permission is granted to anyone to use this software for any purpose,
+# including commercial applications, and to alter it and redistribute it
+# freely, subject to the following restrictions:
+#
+# 1. The origin of this software must not be misrepresented; you must not
+#    claim that you wrote the original software. If you use this software
+#    in a product, an acknowledgment in the product documentation would be
+#    appreciated but is not required.
+# 2. Altered source versions must be plainly marked as such, and must not be
+#    misrepresented as being the original software.
+# 3. This notice may not be removed or altered from any source distribution.
+#############################################################################
+
+
+from __future__ import annotations
+
+import itertools
+
+class Headless_Variable:
+    _convert = None
+    _newid = itertools.count()
+
+    def __init__(self, master=None, value=None, name: str = None):
+        if name is None:
+            name = "HEADLESS_VAR{}".format(next(Headless_Variable._newid))
+        self._name = name
+        self._value = self._default
+        self._callbacks = {}
+        self._callback_id = itertools.count()
+
+        if value is not None:
+            self._value = value
+
+    def __str__(self):
+        return self._name
+
+    def get(self):
+        return self._convert(self._value)
+
+    def set(self, value):
+        self._value = value
+        for cbname in list(self._callbacks):
+            mode, callback = self._callbacks[cbname]
+            if 'write' in mode:
+                callback(self._name, '', 'write')
+
+    def trace_add(self, mode, callback):
+        if isinstance(mode, str):
+            mode = (mode,)
+        cbname = "{}_cb{}".format(self._name, next(self._callback_id))
+        self._callbacks[cbname] = (tuple(mode), callback)
+        return cbname
+
+    def trace_remove(self, mode, cbname):
+        if cbname in self._callbacks:
+            del self._callbacks[cbname]
+
+    def trace_info(self):
+        return [(mode, cbname) for cbname, (mode, _) in self._callbacks.items()]
+
+def _to_string(value):
+    if isinstance(value, bool):  # Mimic Tcl, which stores booleans as 0 and 1
+        value = int(value)
+    return str(value)
+
+def _to_int(value):
+    if isinstance(value, str):
+        return int(value, 0)
+    return int(value)
+
+def _to_boolean(value):
+    if isinstance(value, str):
+        return value.lower() in ["1", "true", "yes", "on"]
+    return bool(value)
+
+class Headless_StringVar(Headless_Variable):
+    _default = ""
+    _convert = staticmethod(_to_string)
+
+class Headless_IntVar(Headless_Variable):
+    _default = 0
+    _convert = staticmethod(_to_int)
+
+class Headless_BooleanVar(Headless_Variable):
+    _default = False
+    _convert = staticmethod(_to_boolean)
@@ -0,0 +1,212 @@
+#############################################################################
+# zlib License
+#
+# (C) 2023 Cristóvão Beirão da Cruz e Silva <cbeiraod@cern.ch>
+#
+# This software is provided 'as-is', without any express or implied
+# warranty.  In no event will the authors be held liable for any damages
+# arising from the use of this software.
+#
+# Permission is granted to anyone to use this software for any purpose,
+# including commercial applications, and to alter it and redistribute it
+# freely, subject to the following restrictions:
+#
+# 1. The origin of this software must not be misrepresented; you must not
+#    claim that you wrote the original software. If you use this software
+#    in a product, an acknowledgment in the product documentation would be
+#    appreciated but is not required.
+# 2. Altered source versions must be plainly marked as such, and must not be
+#    misrepresented as being the original software.
+# 3. This notice may not be removed or altered from any source distribution.
+#############################################################################
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from .connection_controller import Connection_Controller
+
+from .i2c_broker_protocol import Broker_Message
+from .i2c_broker_protocol import default_broker_socket
+from .i2c_broker_protocol import send_frame
+from .i2c_broker_protocol import recv_frame
+from .i2c_broker_protocol import decode_transactions
+from .i2c_broker_protocol import decode_direct_commands
+
+import itertools
+import logging
+import os
+import queue
+import socket
+import threading
+
+#  Shares a single I2C connection (USB-ISS, FPGA-Eth or an emulated one) between several processes. The broker
+# owns the Connection_Controller and serves the requests of the clients (Connection_Controllers with the "Broker"
+# connection type) over a unix socket. Each client connection has a thread which queues the requests it receives
+# and a single worker executes them on the bus in priority order (see Broker_Priority), so periodic monitoring
+# waits while a notebook is configuring chips. Each request is executed as a whole, a client batch is never
+# interleaved with the transactions of another client
+class I2C_Broker:
+    def __init__(self, connection: Connection_Controller, socket_path: str = default_broker_socket, logger: logging.Logger = None):
+        if not hasattr(socket, "AF_UNIX"):
+            raise RuntimeError("The I2C broker needs unix sockets, which are not available on this platform")
+
+        self._connection = connection
+        self._socket_path = socket_path
+        self._logger = logger if logger is not None else connection._logger
+
+        self._queue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._server = None
+        self._clients = set()
+        self._clients_lock = threading.Lock()
+        self._accept_thread = None
+        self._worker_thread = None
+        self._running = False
+
+        self._served_requests = {}
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    @property
+    def socket_path(self):
+        return self._socket_path
+
+    @property
+    def is_running(self):
+        return self._running
+
+    @property
+    def client_count(self):
+        with self._clients_lock:
+            return len(self._clients)
+
+    #  Number of requests served so far, per priority
+    @property
+    def statistics(self):
+        return dict(self._served_requests)
+
+    def start(self):
+        if self._running:
+            return
+
+        if os.path.exists(self._socket_path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self._socket_path)
+                raise RuntimeError("Another I2C broker is already listening on {}".format(self._socket_path))
+            except (ConnectionRefusedError, FileNotFoundError):
+                os.unlink(self._socket_path)  # Left behind by a broker which did not exit cleanly
+            finally:
+                probe.close()
+
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(self._socket_path)
+        self._server.listen()
+        self._running = True
+
+        self._worker_thread = threading.Thread(target=self._worker_loop, name="I2C_Broker_Worker", daemon=True)
+        self._worker_thread.start()
+        self._accept_thread = threading.Thread(target=self._accept_loop, name="I2C_Broker_Accept", daemon=True)
+        self._accept_thread.start()
+        self._logger.info("I2C broker listening on {}".format(self._socket_path))
+
+    #  Runs the broker until stop is called from another thread or the process is interrupted
+    def serve_forever(self):
+        self.start()
+        try:
+            while self._worker_thread.is_alive():
+                self._worker_thread.join(0.5)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self):
+        if not self._running:
+            return
+        self._running = False
+
+        try:
+            self._server.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._server.close()
+        self._queue.put((-1, next(self._sequence), None, None, None, None, None))  # Stops the worker before any pending request
+
+        with self._clients_lock:
+            clients = list(self._clients)
+            self._clients.clear()
+        for client in clients:
+            try:
+                client.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            client.close()
+
+        if threading.current_thread() is not self._worker_thread:
+            self._worker_thread.join()
+        if os.path.exists(self._socket_path):
+            os.unlink(self._socket_path)
+        self._logger.info("I2C broker stopped")
+
+    def _accept_loop(self):
+        while self._running:
+            try:
+                client, _ = self._server.accept()
+            except OSError:
+                break
+            with self._clients_lock:
+                self._clients.add(client)
+            threading.Thread(target=self._client_loop, args=(client,), name="I2C_Broker_Client", daemon=True).start()
+
+    def _client_loop(self, client: socket.socket):
+        send_lock = threading.Lock()
+        try:
+            while self._running:
+                message, priority, request_id, payload = recv_frame(client)
+                self._queue.put((priority, next(self._sequence), client, send_lock, message, request_id, payload))
+        except (ConnectionError, OSError, ValueError):
+            pass
+        finally:
+            with self._clients_lock:
+                self._clients.discard(client)
+            client.close()
+
+    def _worker_loop(self):
+        while True:
+            priority, _, client, send_lock, message, request_id, payload = self._queue.get()
+            if client is None:
+                break
+
+            try:
+                reply = self._handle_request(message, payload)
+                reply_message = Broker_Message.REPLY
+            except Exception as exception:
+                self._logger.error("The I2C broker failed to execute a request: {}".format(exception))
+                reply = str(exception).encode('utf-8')
+                reply_message = Broker_Message.ERROR
+            self._served_requests[priority] = self._served_requests.get(priority, 0) + 1
+
+            try:
+                with send_lock:
+                    send_frame(client, reply_message, request_id, reply, priority)
+            except OSError:
+                pass  # The client went away while its request was waiting
+
+    def _handle_request(self, message: Broker_Message, payload: bytes):
+        if message == Broker_Message.BATCH:
+            batch = self._connection.new_batch()
+            transactions = decode_transactions(payload, batch)
+            self._connection.execute_batch(batch)
+            return b''.join(bytes(transaction.result()) for transaction in transactions if transaction.operation == 'read')
+        elif message == Broker_Message.CHECK:
+            return bytes([1 if self._connection.check_i2c_device(hex(payload[0])) else 0])
+        elif message == Broker_Message.DIRECT:
+            return bytes(self._connection.direct_i2c(decode_direct_commands(payload)))
+        raise RuntimeError("Unknown I2C broker request: {}".format(message))
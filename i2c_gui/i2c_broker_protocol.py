@@ -0,0 +1,138 @@
+#############################################################################
+# zlib License
+#
+# (C) 2023 Cristóvão Beirão da Cruz e Silva <cbeiraod@cern.ch>
+#
+# This software is provided 'as-is', without any express or implied
+# warranty.  In no event will the authors be held liable for any damages
+# arising from the use of this software.
+#
+# Permission is granted to anyone to use this software for any purpose,
+# including commercial applications, and to alter it and redistribute it
+# freely, subject to the following restrictions:
+#
+# 1. The origin of this software must not be misrepresented; you must not
+#    claim that you wrote the original software. If you use this software
+#    in a product, an acknowledgment in the product documentation would be
+#    appreciated but is not required.
+# 2. Altered source versions must be plainly marked as such, and must not be
+#    misrepresented as being the original software.
+# 3. This notice may not be removed or altered from any source distribution.
+#############################################################################
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from .i2c_transaction_batch import I2C_Transaction
+    from .i2c_transaction_batch import I2C_Transaction_Batch
+
+from .i2c_messages import I2CMessages
+
+from enum import IntEnum
+import os
+import socket
+import struct
+import tempfile
+
+default_broker_socket = os.path.join(tempfile.gettempdir(), "i2c_gui_broker.sock")
+
+class Broker_Message(IntEnum):
+    BATCH  = 0x01  #  Payload: the encoded transactions, reply: the bytes read, in transaction order
+    CHECK  = 0x02  #  Payload: the device address, reply: 1 if the device acknowledged
+    DIRECT = 0x03  #  Payload: the direct I2C commands, reply: the bytes returned by the interface
+    REPLY  = 0x80
+    ERROR  = 0x81  #  Payload: the error message, utf-8 encoded
+
+#  Requests waiting on the broker are served lowest priority value first, and in arrival order within a priority.
+# A request which is already running is never interrupted, so clients should keep monitoring batches small
+class Broker_Priority(IntEnum):
+    INTERACTIVE = 0
+    NORMAL      = 1
+    MONITORING  = 2
+
+#  Every message is a frame: message type, priority, request id and payload size, followed by the payload
+_frame_header = struct.Struct('<BBHI')
+#  Each transaction of a batch: flags (see below), device address, memory address, byte count, register bits
+# and register length, followed by the data bytes for writes
+_transaction_header = struct.Struct('<BBHHBB')
+_flag_write = 0x01
+_flag_repeated_start = 0x02
+
+def _recv_exact(sock: socket.socket, size: int):
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:], size - received)
+        if count == 0:
+            raise ConnectionError("The I2C broker connection was closed")
+        received += count
+    return buffer
+
+def send_frame(sock: socket.socket, message: Broker_Message, request_id: int, payload: bytes = b'', priority: int = Broker_Priority.NORMAL):
+    sock.sendall(_frame_header.pack(message, priority, request_id & 0xffff, len(payload)) + payload)
+
+#  Returns (message, priority, request_id, payload), raises ConnectionError if the other side closed the connection
+def recv_frame(sock: socket.socket):
+    message, priority, request_id, size = _frame_header.unpack(_recv_exact(sock, _frame_header.size))
+    payload = _recv_exact(sock, size) if size > 0 else bytearray()
+    return Broker_Message(message), priority, request_id, payload
+
+def encode_transactions(transactions: list[I2C_Transaction]):
+    parts = []
+    for transaction in transactions:
+        flags = 0
+        if transaction.operation == 'write':
+            flags |= _flag_write
+        if transaction.access_type == 'Repeated Start':
+            flags |= _flag_repeated_start
+        elif transaction.access_type != 'Normal':
+            raise RuntimeError("The I2C broker does not support the access type: {}".format(transaction.access_type))
+
+        parts += [_transaction_header.pack(
+            flags,
+            transaction.device_address,
+            transaction.memory_address,
+            transaction.byte_count,
+            transaction.register_bits,
+            transaction.register_length,
+        )]
+        if transaction.operation == 'write':
+            parts += [bytes(transaction.data)]
+    return b''.join(parts)
+
+#  Adds the encoded transactions to the batch, returns the transactions which were added
+def decode_transactions(payload: bytes, batch: I2C_Transaction_Batch):
+    transactions = []
+    offset = 0
+    while offset < len(payload):
+        flags, device_address, memory_address, byte_count, register_bits, register_length = _transaction_header.unpack_from(payload, offset)
+        offset += _transaction_header.size
+
+        access_type = 'Repeated Start' if flags & _flag_repeated_start else 'Normal'
+        if flags & _flag_write:
+            data = list(payload[offset:offset + byte_count])
+            offset += byte_count
+            transactions += [batch.write(device_address, memory_address, data, register_bits, register_length, access_type)]
+        else:
+            transactions += [batch.read(device_address, memory_address, byte_count, register_bits, register_length, access_type)]
+    return transactions
+
+#  Direct I2C commands mix I2CMessages and the data bytes of the WRITE commands, both are sent as bytes and the
+# messages are recovered from their position, as the interface itself does
+def encode_direct_commands(commands: list):
+    return bytes(command.value if isinstance(command, I2CMessages) else command for command in commands)
+
+def decode_direct_commands(payload: bytes):
+    commands = []
+    idx = 0
+    while idx < len(payload):
+        command = I2CMessages(payload[idx])
+        commands += [command]
+        idx += 1
+        if I2CMessages.WRITE1.value <= command.value <= I2CMessages.WRITE16.value:
+            count = command.value - I2CMessages.WRITE1.value + 1
+            commands += list(payload[idx:idx + count])
+            idx += count
+    return commands
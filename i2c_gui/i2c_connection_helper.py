@@ -23,32 +23,45 @@
 from __future__ import annotations
 
 from .gui_helper import GUI_Helper
-from .base_gui import Base_GUI
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from .base_gui import Base_GUI
 from .i2c_messages import I2CMessages
+from .i2c_transaction_batch import I2C_Transaction
 
 from math import ceil
 
-import tkinter as tk
-import tkinter.ttk as ttk  # For themed widgets (gives a more native visual to the elements)
+try:
+    import tkinter as tk
+    import tkinter.ttk as ttk  # For themed widgets (gives a more native visual to the elements)
+except ImportError:
+    tk = None
+    ttk = None
 import logging
 import time
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
 class I2C_Connection_Helper(GUI_Helper):
     _parent: Base_GUI
+
+    #  True for the interfaces whose _execute_i2c_batch hands the whole batch over in a single step, the batch is
+    # then paced as a single command. Otherwise each access to the interface within the batch is paced on its own
+    native_batch = False
+
     def __init__(
         self,
         parent: Base_GUI,
         max_seq_byte: int,
         swap_endian: bool,
-        successive_i2c_delay_us : int = 10000,
         ):
         super().__init__(parent, None, parent._logger)
         self._max_seq_byte = max_seq_byte
         self._swap_endian = swap_endian
 
         self._no_connect = None
-
-        self.successive_i2c_delay_us = successive_i2c_delay_us
+        self._executor = None
 
     def _check_i2c_device(self, address: int):
         raise RuntimeError("Derived classes must implement the individual device access functions: _check_i2c_device")
@@ -62,6 +75,31 @@ class I2C_Connection_Helper(GUI_Helper):
     def _direct_i2c(self, commands: list[int]) -> list[int]:
         raise RuntimeError("Derived classes must implement the individual device access functions: _direct_i2c")
 
+    #  Derived classes can override this method to execute a list of transactions natively (e.g. by sending
+    # them all to the interface at once, see native_batch), the default breaks them into max_seq_byte accesses
+    # and runs them one after the other, each respecting the pacing gap
+    def _execute_i2c_batch(self, transactions: list[I2C_Transaction]):
+        for transaction in transactions:
+            register_bytes = ceil(transaction.register_length/8)
+            max_seq_byte = transaction.byte_count if self._max_seq_byte is None else self._max_seq_byte
+
+            data = []
+            for offset in range(0, transaction.byte_count, max_seq_byte):
+                this_block_address = transaction.memory_address + offset//register_bytes
+                byte_count = min(max_seq_byte, transaction.byte_count - offset)
+                if self._swap_endian and transaction.register_bits == 16:
+                    this_block_address = self.swap_endian_16bit(this_block_address)
+
+                if transaction.operation == 'read':
+                    data += self._paced_access(transaction.device_address, self._read_i2c_device_memory, transaction.device_address, this_block_address, byte_count, transaction.register_bits, transaction.access_type)
+                else:
+                    self._paced_access(transaction.device_address, self._write_i2c_device_memory, transaction.device_address, this_block_address, transaction.data[offset:offset+byte_count], transaction.register_bits, transaction.access_type)
+
+            if transaction.operation == 'read':
+                transaction.set_result(data)
+            else:
+                transaction.set_result()
+
     def display_in_frame(self, frame: ttk.Frame):
         raise RuntimeError("Derived classes must implement the display function")
 
@@ -74,19 +112,117 @@ class I2C_Connection_Helper(GUI_Helper):
     def disconnect(self):
         raise RuntimeError("Derived classes must implement the disconnect method")
 
+    #  The logging messages are only formatted when rendered (and only recorded when the I2C logging is enabled),
+    # so the arguments are passed along with the message instead of being formatted here
     def check_i2c_device(self, address: int):
-        self._parent.send_i2c_logging_message("Trying to find the I2C device with address 0x{:02x}".format(address))
-
         if not self.is_connected or self._no_connect:
-            self._parent.send_i2c_logging_message("   The USB-ISS module is not connected or you are using software emulated mode.\n")
+            self._parent.send_i2c_logging_message("The I2C device with address 0x{:02x} was not searched, the I2C interface is not connected or you are using software emulated mode", address)
             return False
 
         if not self._check_i2c_device(address):
-            self._parent.send_i2c_logging_message("   The I2C device can not be found.\n")
+            self._parent.send_i2c_logging_message("The I2C device with address 0x{:02x} can not be found", address)
+            return False
+        self._parent.send_i2c_logging_message("The I2C device with address 0x{:02x} was found", address)
+        return True
+
+    #  Returns False if the batch was already handled, i.e. in software emulation (no connect) mode
+    def _start_batch(self, transactions: list[I2C_Transaction]):
+        if not self.is_connected:
+            raise RuntimeError("You must first connect to a device before trying to execute I2C transactions")
+
+        self._parent.send_i2c_logging_message("Executing a batch of {} I2C transactions", len(transactions))
+
+        if self._no_connect:
+            for transaction in transactions:
+                if transaction.operation == 'read':
+                    if transaction.byte_count == 1:
+                        transaction.set_result([42])
+                    else:
+                        transaction.set_result([i & 0xff for i in range(transaction.byte_count)])
+                else:
+                    transaction.set_result()
+            self._parent.send_i2c_logging_message("Software emulation (no connect) is enabled, so returning dummy values and taking no write action")
             return False
-        self._parent.send_i2c_logging_message("   The I2C device was found.\n")
         return True
 
+    def _fail_batch(self, transactions: list[I2C_Transaction], exception: Exception):
+        for transaction in transactions:
+            if not transaction.done:
+                transaction.set_exception(exception)
+
+    def _log_batch(self, transactions: list[I2C_Transaction]):
+        if not self._parent.is_logging_i2c:
+            return
+
+        for transaction in transactions:
+            if transaction.operation == 'read':
+                self._parent.log_i2c_transfer('read', transaction.device_address, transaction.memory_address, transaction.result())
+            else:
+                self._parent.log_i2c_transfer('write', transaction.device_address, transaction.memory_address, transaction.data)
+
+    def execute_batch(self, transactions: list[I2C_Transaction]):
+        if not self._start_batch(transactions):
+            return
+
+        try:
+            self._execute_i2c_batch(transactions)
+        except Exception as exception:
+            self._fail_batch(transactions, exception)
+            raise
+
+        self._log_batch(transactions)
+
+    async def execute_batch_async(self, transactions: list[I2C_Transaction]):
+        if not self._start_batch(transactions):
+            return
+
+        try:
+            await self._execute_i2c_batch_async(transactions)
+        except Exception as exception:
+            self._fail_batch(transactions, exception)
+            raise
+
+        self._log_batch(transactions)
+
+    #  Derived classes can override this method to access the interface without blocking the event loop (e.g. with
+    # a non-blocking socket), the default runs _execute_i2c_batch on the worker thread of the connection
+    async def _execute_i2c_batch_async(self, transactions: list[I2C_Transaction]):
+        await self.run_in_executor(self._execute_i2c_batch, transactions)
+
+    #  Runs a blocking access to the interface on a worker thread dedicated to this connection, so the event loop
+    # is not blocked and the accesses are still executed one at a time, in order
+    async def run_in_executor(self, function, *args):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="I2C_Connection")
+        return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+
+    def shutdown_executor(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    #  Each individual access to the I2C interface goes through the pacer of the connection controller,
+    # which waits for the minimum gap since the previous command and keeps the timing statistics
+    def _paced_access(self, device_address: int, function, *args):
+        pacer = self._parent.pacer
+        backend = self._parent.connection_type
+
+        pacer.wait(backend, device_address)
+        try:
+            retVal = function(*args)
+        except Exception:
+            pacer.done(backend, device_address, success=False)
+            raise
+        pacer.done(backend, device_address)
+        return retVal
+
+    #  A native batch is paced as a single command, otherwise _execute_i2c_batch paces each of its accesses
+    def _paced_batch(self, transactions: list[I2C_Transaction], device_address: int):
+        if self.native_batch:
+            self._paced_access(device_address, self._execute_i2c_batch, transactions)
+        else:
+            self._execute_i2c_batch(transactions)
+
     def swap_endian_16bit(self, address: int):
         from .functions import hex_0fill
         tmp = hex_0fill(address, 16)
@@ -103,33 +239,28 @@ class I2C_Connection_Helper(GUI_Helper):
             raise RuntimeError("Invalid I2C address received: {}".format(hex(device_address)))
 
         register_bytes = ceil(register_length/8)
-
-        #reg_chars = ceil(register_length/4)
-        addr_chars = ceil(register_bits/4)
-
-        if byte_count <= register_bytes:
-            self._parent.send_i2c_logging_message((f"Trying to read the register 0x{{:0{addr_chars}x}} of the I2C device with address 0x{{:02x}}:").format(memory_address, device_address))
-        else:
-            self._parent.send_i2c_logging_message((f"Trying to read a register block with size {{}} starting at register 0x{{:0{addr_chars}x}} of the I2C device with address 0x{{:02x}}:").format(byte_count, memory_address, device_address))
+        logging_i2c = self._parent.is_logging_i2c
 
         data = []
         if self._no_connect:
             if byte_count == 1:
                 data = [42]
             else:
-                data = [i for i in range(byte_count)]
-            self._parent.send_i2c_logging_message("   Software emulation (no connect) is enabled, so returning dummy values.\n   {}\n".format(repr(data)))
+                data = [i & 0xff for i in range(byte_count)]
+            if logging_i2c:
+                self._parent.send_i2c_logging_message("Software emulation (no connect) is enabled, so returning dummy values")
+                self._parent.log_i2c_transfer('read', device_address, memory_address, data)
 
         elif self._max_seq_byte is None:
-            if self._swap_endian and register_bits == 16:
-                memory_address = self.swap_endian_16bit(memory_address)
-            data = self._read_i2c_device_memory(device_address, memory_address, byte_count, register_bits, read_type)
-            self._parent.send_i2c_logging_message("   {}\n".format(repr(data)))
+            #  Without a maximum sequence size, the interface sizes the transfer itself through the batch execution
+            transaction = I2C_Transaction('read', device_address, memory_address, byte_count, None, register_bits, register_length, read_type)
+            self._paced_batch([transaction], device_address)
+            data = transaction.result()
+            if logging_i2c:
+                self._parent.log_i2c_transfer('read', device_address, memory_address, data)
         else:
-            from time import sleep
             data = []
             seq_calls = ceil(byte_count/self._max_seq_byte)
-            self._parent.send_i2c_logging_message("   Breaking the read into {} individual reads of {} bytes:".format(seq_calls, self._max_seq_byte))
 
             lastUpdateTime = time.time_ns()
             for i in range(seq_calls):
@@ -142,18 +273,17 @@ class I2C_Connection_Helper(GUI_Helper):
 
                 this_block_address = int(memory_address + i*self._max_seq_byte/register_bytes)
                 bytes_to_read = min(self._max_seq_byte, byte_count - i*self._max_seq_byte)
-                self._parent.send_i2c_logging_message("      Read operation {}: reading {} bytes starting from 0x{:04x}".format(i, bytes_to_read, this_block_address))
 
+                bus_address = this_block_address
                 if self._swap_endian and register_bits == 16:
-                    this_block_address = self.swap_endian_16bit(this_block_address)
-                this_data = self._read_i2c_device_memory(device_address, this_block_address, bytes_to_read, register_bits, read_type)
-                self._parent.send_i2c_logging_message("         {}".format(repr(this_data)))
+                    bus_address = self.swap_endian_16bit(this_block_address)
+                this_data = self._paced_access(device_address, self._read_i2c_device_memory, device_address, bus_address, bytes_to_read, register_bits, read_type)
+                if logging_i2c:
+                    self._parent.log_i2c_transfer('read', device_address, this_block_address, this_data)
 
                 data += this_data
-                sleep(self.successive_i2c_delay_us*10**-6)
 
             self.clear_progress()
-            self._parent.send_i2c_logging_message("   Full data:\n      {}\n".format(repr(data)))
         return data
 
     def write_device_memory(self, device_address: int, memory_address: int, data: list[int], register_bits: int = 16, register_length: int = 8, write_type: str = 'Normal'):
@@ -166,28 +296,21 @@ class I2C_Connection_Helper(GUI_Helper):
 
         register_bytes = ceil(register_length/8)
         byte_count = len(data)
-
-        reg_chars = ceil(register_length/4)
-        addr_chars = ceil(register_bits/4)
-
-        if byte_count <= register_bytes:
-            self._parent.send_i2c_logging_message((f"Trying to write the value 0x{{:0{reg_chars}x}} to the register 0x{{:0{addr_chars}x}} of the I2C device with address 0x{{:02x}}:").format(data[0], memory_address, device_address))
-        else:
-            self._parent.send_i2c_logging_message((f"Trying to write a register block with size {{}} starting at register 0x{{:0{addr_chars}x}} of the I2C device with address 0x{{:02x}}:\n   Writing the value array: {{}}").format(byte_count, memory_address, device_address, repr(data)))
+        logging_i2c = self._parent.is_logging_i2c
 
         if self._no_connect:
-            self._parent.send_i2c_logging_message("   Software emulation (no connect) is enabled, so no write action is taken.\n")
+            if logging_i2c:
+                self._parent.send_i2c_logging_message("Software emulation (no connect) is enabled, so no write action is taken")
+                self._parent.log_i2c_transfer('write', device_address, memory_address, data)
             return
 
         if self._max_seq_byte is None:
-            self._parent.send_i2c_logging_message("   Writing the full block at once\n")
-            if self._swap_endian and register_bits == 16:
-                memory_address = self.swap_endian_16bit(memory_address)
-            self._write_i2c_device_memory(device_address, memory_address, data, register_bits, write_type)
+            transaction = I2C_Transaction('write', device_address, memory_address, byte_count, list(data), register_bits, register_length, write_type)
+            self._paced_batch([transaction], device_address)
+            if logging_i2c:
+                self._parent.log_i2c_transfer('write', device_address, memory_address, data)
         else:
-            from time import sleep
             seq_calls = ceil(byte_count/self._max_seq_byte)
-            self._parent.send_i2c_logging_message("   Breaking the write into {} individual writes of {} bytes:".format(seq_calls, self._max_seq_byte))
 
             lastUpdateTime = time.time_ns()
             for i in range(seq_calls):
@@ -200,15 +323,12 @@ class I2C_Connection_Helper(GUI_Helper):
 
                 this_block_address = int(memory_address + i*self._max_seq_byte/register_bytes)
                 bytes_to_write = min(self._max_seq_byte, byte_count - i*self._max_seq_byte)
-                self._parent.send_i2c_logging_message("      Write operation {}: writing {} bytes starting from 0x{:04x}".format(i, bytes_to_write, this_block_address))
-
                 this_data = data[i*self._max_seq_byte:i*self._max_seq_byte+bytes_to_write]
-                self._parent.send_i2c_logging_message("         {}".format(repr(this_data)))
 
+                bus_address = this_block_address
                 if self._swap_endian and register_bits == 16:
-                    this_block_address = self.swap_endian_16bit(this_block_address)
-                self._write_i2c_device_memory(device_address, this_block_address, this_data, register_bits, write_type)
-
-                sleep(self.successive_i2c_delay_us*10**-6)
-            self._parent.send_i2c_logging_message("")
+                    bus_address = self.swap_endian_16bit(this_block_address)
+                self._paced_access(device_address, self._write_i2c_device_memory, device_address, bus_address, this_data, register_bits, write_type)
+                if logging_i2c:
+                    self._parent.log_i2c_transfer('write', device_address, this_block_address, this_data)
             self.clear_progress()
\ No newline at end of file
@@ -0,0 +1,209 @@
+#############################################################################
+# zlib License
+#
+# (C) 2023 Cristóvão Beirão da Cruz e Silva <cbeiraod@cern.ch>
+#
+# This software is provided 'as-is', without any express or implied
+# warranty.  In no event will the authors be held liable for any damages
+# arising from the use of this software.
+#
+# Permission is granted to anyone to use this software for any purpose,
+# including commercial applications, and to alter it and redistribute it
+# freely, subject to the following restrictions:
+#
+# 1. The origin of this software must not be misrepresented; you must not
+#    claim that you wrote the original software. If you use this software
+#    in a product, an acknowledgment in the product documentation would be
+#    appreciated but is not required.
+# 2. Altered source versions must be plainly marked as such, and must not be
+#    misrepresented as being the original software.
+# 3. This notice may not be removed or altered from any source distribution.
+#############################################################################
+
+from __future__ import annotations
+
+import time
+import struct
+from collections import namedtuple
+
+from .i2c_messages import I2CMessages
+
+I2C_Journal_Entry = namedtuple('I2C_Journal_Entry', [
+    'operation',
+    'device_address',
+    'memory_address',
+    'byte_count',
+    'register_bits',
+    'register_length',
+    'access_type',
+    'payload',  # Data written, or the direct I2C commands
+    'result',  # Data read, the direct I2C result or [found] for the device checks
+    'start_ns',  # Since the journal was started
+    'duration_ns',  # Including the pacing gap before the transaction
+    'failed',
+    'batch',  # Executed as part of a batch, in which case the timing is the one of the whole batch
+])
+
+#  Compact binary journal of the I2C transactions of a connection, so a session can be replayed offline (see Replay_Helper).
+# The file starts with a header (magic, version, start time) followed by one record per transaction: a fixed size header
+# and then the payload and result bytes. The direct I2C commands are stored with the I2CMessages as their value
+class I2C_Journal:
+    _magic = b'I2CJRNL\x00'
+    _version = 1
+    _file_header = struct.Struct('<8sHd')  # magic, version, start time
+    _record_header = struct.Struct('<BBBBBIIqqII')  # operation, flags, device address, register bits, register length, memory address, byte count, start, duration, payload length, result length
+    _operations = ['read', 'write', 'check', 'direct']
+    _access_types = ['Normal', 'Repeated Start']
+
+    _flag_failed = 0x1
+    _flag_batch = 0x2
+
+    def __init__(self, filename: str):
+        self._filename = filename
+        self._file = open(filename, 'wb')
+        self._file.write(self._file_header.pack(self._magic, self._version, time.time()))
+        self._start_ns = time.perf_counter_ns()
+        self._records = 0
+
+    @property
+    def filename(self):
+        return self._filename
+
+    @property
+    def records(self):
+        return self._records
+
+    @property
+    def closed(self):
+        return self._file is None
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def start(self):
+        return time.perf_counter_ns()
+
+    def record(
+        self,
+        operation: str,
+        device_address: int,
+        memory_address: int,
+        byte_count: int,
+        payload: list[int],
+        result,
+        started: int,
+        failed: bool = False,
+        register_bits: int = 16,
+        register_length: int = 8,
+        access_type: str = 'Normal',
+        batch: bool = False,
+        ended: int = None,
+    ):
+        if self._file is None:
+            raise RuntimeError("The I2C journal {} was already closed".format(self._filename))
+        if access_type not in self._access_types:
+            raise RuntimeError("Unknown I2C access type for the journal: {}".format(access_type))
+
+        if ended is None:
+            ended = time.perf_counter_ns()
+        if result is None:
+            result = []
+        elif isinstance(result, bool):
+            result = [int(result)]
+        payload = bytes(self.encode_commands(payload)) if operation == 'direct' else bytes(payload or [])
+        result = bytes(result)
+
+        flags = self._access_types.index(access_type) << 4
+        if failed:
+            flags |= self._flag_failed
+        if batch:
+            flags |= self._flag_batch
+
+        self._file.write(self._record_header.pack(
+            self._operations.index(operation),
+            flags,
+            device_address,
+            register_bits,
+            register_length,
+            memory_address,
+            byte_count,
+            started - self._start_ns,
+            ended - started,
+            len(payload),
+            len(result),
+        ) + payload + result)
+        self._records += 1
+
+    #  All the transactions of a batch share the timing of the batch, the ones which were not executed are recorded as failed
+    def record_batch(self, transactions: list, started: int):
+        ended = time.perf_counter_ns()
+        for transaction in transactions:
+            failed = not transaction.done or transaction._exception is not None
+            result = None
+            if transaction.operation == 'read' and not failed:
+                result = transaction.result()
+            self.record(
+                transaction.operation,
+                transaction.device_address,
+                transaction.memory_address,
+                transaction.byte_count,
+                transaction.data,
+                result,
+                started,
+                failed=failed,
+                register_bits=transaction.register_bits,
+                register_length=transaction.register_length,
+                access_type=transaction.access_type,
+                batch=True,
+                ended=ended,
+            )
+
+    @staticmethod
+    def encode_commands(commands: list):
+        return [command.value if isinstance(command, I2CMessages) else int(command) for command in commands]
+
+    @classmethod
+    def load(cls, filename: str):
+        with open(filename, 'rb') as file:
+            content = file.read()
+
+        if len(content) < cls._file_header.size:
+            raise RuntimeError("The file {} is not an I2C journal".format(filename))
+        magic, version, _ = cls._file_header.unpack_from(content)
+        if magic != cls._magic:
+            raise RuntimeError("The file {} is not an I2C journal".format(filename))
+        if version != cls._version:
+            raise RuntimeError("Unsupported I2C journal version {} in {}".format(version, filename))
+
+        entries = []
+        offset = cls._file_header.size
+        while offset < len(content):
+            if offset + cls._record_header.size > len(content):  # Journal cut while recording, e.g. on a crash
+                break
+            operation, flags, device_address, register_bits, register_length, memory_address, byte_count, start_ns, duration_ns, payload_length, result_length = cls._record_header.unpack_from(content, offset)
+            offset += cls._record_header.size
+            if offset + payload_length + result_length > len(content):
+                break
+            payload = list(content[offset:offset + payload_length])
+            offset += payload_length
+            result = list(content[offset:offset + result_length])
+            offset += result_length
+
+            entries += [I2C_Journal_Entry(
+                cls._operations[operation],
+                device_address,
+                memory_address,
+                byte_count,
+                register_bits,
+                register_length,
+                cls._access_types[flags >> 4],
+                payload,
+                result,
+                start_ns,
+                duration_ns,
+                (flags & cls._flag_failed) != 0,
+                (flags & cls._flag_batch) != 0,
+            )]
+        return entries
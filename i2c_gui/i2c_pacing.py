@@ -0,0 +1,150 @@
+#############################################################################
+# zlib License
+#
+# (C) 2023 Cristóvão Beirão da Cruz e Silva <cbeiraod@cern.ch>
+#
+# This software is provided 'as-is', without any express or implied
+# warranty.  In no event will the authors be held liable for any damages
+# arising from the use of this software.
+#
+# Permission is granted to anyone to use this software for any purpose,
+# including commercial applications, and to alter it and redistribute it
+# freely, subject to the following restrictions:
+#
+# 1. The origin of this software must not be misrepresented; you must not
+#    claim that you wrote the original software. If you use this software
+#    in a product, an acknowledgment in the product documentation would be
+#    appreciated but is not required.
+# 2. Altered source versions must be plainly marked as such, and must not be
+#    misrepresented as being the original software.
+# 3. This notice may not be removed or altered from any source distribution.
+#############################################################################
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+#  Enforces a minimum idle gap between successive I2C commands. The gap is counted from the end
+# of the previous command, so the time spent on the bus already counts towards it.
+# Gaps can be set per backend and per device address, the most specific one being used:
+#   (backend, device) -> (backend, None) -> (None, device) -> default
+# With auto tuning, the gap of a backend/device pair is reduced after each successful command
+# (down to min_gap_us) and increased after each failure (NACK, readback mismatch, ...)
+class I2C_Pacer:
+    def __init__(
+        self,
+        default_gap_us: int = 10000,
+        auto_tune: bool = False,
+        min_gap_us: int = 0,
+        max_gap_us: int = 100000,
+        tighten_factor: float = 0.9,
+        backoff_factor: float = 2.0,
+        backoff_step_us: int = 100,
+    ):
+        self._default_gap_us = default_gap_us
+        self._gap_profiles = {}
+        self._tuned_gaps = {}
+
+        self.auto_tune = auto_tune
+        self.min_gap_us = min_gap_us
+        self.max_gap_us = max_gap_us
+        self.tighten_factor = tighten_factor
+        self.backoff_factor = backoff_factor
+        self.backoff_step_us = backoff_step_us
+
+        self._last_command_end_ns = 0
+        self._command_start_ns = None
+
+        self.i2c_statistics = None  # I2C_Statistics which also records the time spent waiting, if any
+
+        self.reset_statistics()
+
+    @property
+    def default_gap_us(self):
+        return self._default_gap_us
+
+    @default_gap_us.setter
+    def default_gap_us(self, value: int):
+        self._default_gap_us = value
+
+    def set_gap(self, gap_us: int, backend: str = None, device_address: int = None):
+        self._gap_profiles[(backend, device_address)] = gap_us
+        self._tuned_gaps.pop((backend, device_address), None)
+
+    def clear_gap(self, backend: str = None, device_address: int = None):
+        self._gap_profiles.pop((backend, device_address), None)
+
+    def get_gap(self, backend: str = None, device_address: int = None):
+        key = (backend, device_address)
+        if key in self._tuned_gaps:
+            return self._tuned_gaps[key]
+
+        for profile_key in [key, (backend, None), (None, device_address)]:
+            if profile_key in self._gap_profiles:
+                return self._gap_profiles[profile_key]
+        return self._default_gap_us
+
+    def _remaining_gap_ns(self, backend: str = None, device_address: int = None):
+        gap_ns = int(self.get_gap(backend, device_address) * 1000)
+        return self._last_command_end_ns + gap_ns - time.time_ns()
+
+    def wait(self, backend: str = None, device_address: int = None):
+        remaining_ns = self._remaining_gap_ns(backend, device_address)
+        if remaining_ns > 0:
+            time.sleep(remaining_ns/10**9)
+            self._idle_ns += remaining_ns
+            if self.i2c_statistics is not None:
+                self.i2c_statistics.record_pacing(device_address, remaining_ns)
+        self._command_start_ns = time.time_ns()
+
+    #  Same as wait, but the event loop keeps running other tasks during the gap
+    async def wait_async(self, backend: str = None, device_address: int = None):
+        remaining_ns = self._remaining_gap_ns(backend, device_address)
+        if remaining_ns > 0:
+            await asyncio.sleep(remaining_ns/10**9)
+            self._idle_ns += remaining_ns
+            if self.i2c_statistics is not None:
+                self.i2c_statistics.record_pacing(device_address, remaining_ns)
+        self._command_start_ns = time.time_ns()
+
+    def done(self, backend: str = None, device_address: int = None, success: bool = True):
+        end_ns = time.time_ns()
+        if self._command_start_ns is not None:
+            self._busy_ns += end_ns - self._command_start_ns
+            self._command_start_ns = None
+        self._last_command_end_ns = end_ns
+
+        self._commands += 1
+        self.feedback(backend, device_address, success)
+
+    #  Feedback on a command without timing it, e.g. when a readback mismatch is only found later on
+    def feedback(self, backend: str = None, device_address: int = None, success: bool = True):
+        if not success:
+            self._failures += 1
+
+        if not self.auto_tune:
+            return
+
+        gap_us = self.get_gap(backend, device_address)
+        if success:
+            gap_us = max(self.min_gap_us, gap_us * self.tighten_factor)
+        else:
+            gap_us = min(self.max_gap_us, max(gap_us * self.backoff_factor, gap_us + self.backoff_step_us))
+        self._tuned_gaps[(backend, device_address)] = gap_us
+
+    def reset_statistics(self):
+        self._commands = 0
+        self._failures = 0
+        self._idle_ns = 0
+        self._busy_ns = 0
+
+    @property
+    def statistics(self):
+        return {
+            "commands": self._commands,
+            "failures": self._failures,
+            "idle_s": self._idle_ns/10**9,
+            "busy_s": self._busy_ns/10**9,
+            "gaps_us": {key: self.get_gap(*key) for key in set(self._gap_profiles) | set(self._tuned_gaps)},
+        }
@@ -0,0 +1,222 @@
+#############################################################################
+# zlib License
+#
+# (C) 2023 Cristóvão Beirão da Cruz e Silva <cbeiraod@cern.ch>
+#
+# This software is provided 'as-is', without any express or implied
+# warranty.  In no event will the authors be held liable for any damages
+# arising from the use of this software.
+#
+# Permission is granted to anyone to use this software for any purpose,
+# including commercial applications, and to alter it and redistribute it
+# freely, subject to the following restrictions:
+#
+# 1. The origin of this software must not be misrepresented; you must not
+#    claim that you wrote the original software. If you use this software
+#    in a product, an acknowledgment in the product documentation would be
+#    appreciated but is not required.
+# 2. Altered source versions must be plainly marked as such, and must not be
+#    misrepresented as being the original software.
+# 3. This notice may not be removed or altered from any source distribution.
+#############################################################################
+
+from __future__ import annotations
+
+import os
+import time
+import datetime
+from bisect import bisect_left
+
+#  Statistics of the I2C accesses of a connection, filled by the Connection_Controller once enabled with
+# enable_statistics (when disabled nothing is recorded at all):
+#  - per device: the read and write transactions, the bytes transferred and the failures (access errors and readback
+#    mismatches, there is no automatic retry so each of them means a register had to be rewritten or re-read by hand)
+#  - per operation (read, write, batch, check, direct): a histogram of the latency, excluding the pacing gap
+#  - per device: the time spent sleeping in the pacer to respect the gap between commands
+# Devices are labelled with the address spaces mapped onto them (device_labels, kept up to date by the Connection_Controller),
+# so the device statistics can be summed per address space
+class I2C_Statistics:
+    latency_buckets_us = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000, 250000, 1000000)
+
+    def __init__(self, device_labels: dict[int, str] = None):
+        self._device_labels = {} if device_labels is None else device_labels
+        self.reset()
+
+    def reset(self):
+        self._devices = {}  # device address -> [reads, writes, bytes read, bytes written, failures]
+        self._latencies = {}  # operation -> [histogram counts (the last one for the overflow), count, total ns]
+        self._pacing_ns = {}  # device address -> ns
+        self._pacing_total_ns = 0
+        self._start_time = time.time()
+
+    def _device(self, device_address: int):
+        if device_address not in self._devices:
+            self._devices[device_address] = [0, 0, 0, 0, 0]
+        return self._devices[device_address]
+
+    def record_transfer(self, operation: str, device_address: int, byte_count: int):
+        device = self._device(device_address)
+        if operation == 'read':
+            device[0] += 1
+            device[2] += byte_count
+        else:
+            device[1] += 1
+            device[3] += byte_count
+
+    def record_failure(self, device_address: int):
+        self._device(device_address)[4] += 1
+
+    def record_pacing(self, device_address: int, duration_ns: int):
+        self._pacing_ns[device_address] = self._pacing_ns.get(device_address, 0) + duration_ns
+        self._pacing_total_ns += duration_ns
+
+    #  Returns the token to pass to record_latency at the end of the operation, so the pacing sleeps in between are not counted
+    def start(self):
+        return time.perf_counter_ns(), self._pacing_total_ns
+
+    def record_latency(self, operation: str, started: tuple[int, int]):
+        start_ns, pacing_ns = started
+        duration_ns = time.perf_counter_ns() - start_ns - (self._pacing_total_ns - pacing_ns)
+
+        if operation not in self._latencies:
+            self._latencies[operation] = [[0] * (len(self.latency_buckets_us) + 1), 0, 0]
+        latency = self._latencies[operation]
+        latency[0][bisect_left(self.latency_buckets_us, duration_ns/1000)] += 1
+        latency[1] += 1
+        latency[2] += duration_ns
+
+    #  Times a single access to the interface and records it for device_address
+    def measure(self, operation: str, device_address: int, byte_count: int, function, *args):
+        started = self.start()
+        try:
+            retVal = function(*args)
+        except Exception:
+            self.record_failure(device_address)
+            raise
+        finally:
+            self.record_latency(operation, started)
+        if operation in ['read', 'write']:
+            self.record_transfer(operation, device_address, byte_count)
+        return retVal
+
+    def record_batch(self, transactions: list, started: tuple[int, int]):
+        self.record_latency('batch', started)
+        for transaction in transactions:
+            if transaction.done and transaction._exception is None:
+                self.record_transfer(transaction.operation, transaction.device_address, transaction.byte_count)
+            else:
+                self.record_failure(transaction.device_address)
+
+    @staticmethod
+    def _device_dict(values: list[int]):
+        return {
+            "reads": values[0],
+            "writes": values[1],
+            "bytes_read": values[2],
+            "bytes_written": values[3],
+            "failures": values[4],
+        }
+
+    @property
+    def devices(self):
+        return {device_address: self._device_dict(values) for device_address, values in self._devices.items()}
+
+    @property
+    def address_spaces(self):
+        address_spaces = {}
+        for device_address, values in self._devices.items():
+            name = self._device_labels.get(device_address, "Unknown")
+            if name not in address_spaces:
+                address_spaces[name] = [0, 0, 0, 0, 0]
+            address_spaces[name] = [total + value for total, value in zip(address_spaces[name], values)]
+        return {name: self._device_dict(values) for name, values in address_spaces.items()}
+
+    @property
+    def latencies(self):
+        latencies = {}
+        for operation, (histogram, count, total_ns) in self._latencies.items():
+            latencies[operation] = {
+                "count": count,
+                "total_s": total_ns/10**9,
+                "mean_s": total_ns/count/10**9 if count > 0 else 0,
+                "histogram": {le: bucket_count for le, bucket_count in zip(list(self.latency_buckets_us) + ["+Inf"], histogram)},
+            }
+        return latencies
+
+    @property
+    def pacing(self):
+        return {device_address: duration_ns/10**9 for device_address, duration_ns in self._pacing_ns.items()}
+
+    def snapshot(self):
+        return {
+            "since": self._start_time,
+            "devices": self.devices,
+            "address_spaces": self.address_spaces,
+            "latencies": self.latencies,
+            "pacing_s": self.pacing,
+            "pacing_total_s": self._pacing_total_ns/10**9,
+        }
+
+    #  Appends the current statistics to a table of an SQLite database, one row per metric, all the rows of
+    # an export share the same timestamp. The run is a free label to tell apart the exports of different runs
+    def export_sqlite(self, filename: str, table: str = "i2c_statistics", run: str = None):
+        import sqlite3
+
+        timestamp = datetime.datetime.now().isoformat()
+        rows = []
+        for device_address, values in self.devices.items():
+            name = "" if device_address is None else "0x{:02x}".format(device_address)
+            rows += [(timestamp, run, "device", name, self._device_labels.get(device_address), metric, value) for metric, value in values.items()]
+        for address_space, values in self.address_spaces.items():
+            rows += [(timestamp, run, "address_space", address_space, address_space, metric, value) for metric, value in values.items()]
+        for operation, latency in self.latencies.items():
+            rows += [(timestamp, run, "operation", operation, None, metric, latency[metric]) for metric in ["count", "total_s", "mean_s"]]
+            rows += [(timestamp, run, "operation", operation, None, "le_{}".format(le), count) for le, count in latency["histogram"].items()]
+        for device_address, duration in self.pacing.items():
+            name = "" if device_address is None else "0x{:02x}".format(device_address)
+            rows += [(timestamp, run, "pacing", name, self._device_labels.get(device_address), "pacing_s", duration)]
+
+        connection = sqlite3.connect(filename)
+        try:
+            with connection:
+                connection.execute("CREATE TABLE IF NOT EXISTS {} (timestamp TEXT, run TEXT, scope TEXT, name TEXT, address_space TEXT, metric TEXT, value REAL)".format(table))
+                connection.executemany("INSERT INTO {} VALUES (?, ?, ?, ?, ?, ?, ?)".format(table), rows)
+        finally:
+            connection.close()
+
+    #  Writes the statistics in the Prometheus text format, e.g. for the textfile collector of the node exporter.
+    # The file is replaced atomically so a scrape never sees a partial file
+    def export_prometheus(self, filename: str, prefix: str = "i2c"):
+        def labels(device_address):
+            device = "" if device_address is None else "0x{:02x}".format(device_address)
+            return 'device="{}",address_space="{}"'.format(device, self._device_labels.get(device_address, "Unknown"))
+
+        lines = []
+        lines += ["# HELP {}_transactions_total I2C transactions per device and direction".format(prefix), "# TYPE {}_transactions_total counter".format(prefix)]
+        for device_address, values in self._devices.items():
+            lines += ['{}_transactions_total{{{},direction="read"}} {}'.format(prefix, labels(device_address), values[0])]
+            lines += ['{}_transactions_total{{{},direction="write"}} {}'.format(prefix, labels(device_address), values[1])]
+        lines += ["# HELP {}_bytes_total Bytes transferred per device and direction".format(prefix), "# TYPE {}_bytes_total counter".format(prefix)]
+        for device_address, values in self._devices.items():
+            lines += ['{}_bytes_total{{{},direction="read"}} {}'.format(prefix, labels(device_address), values[2])]
+            lines += ['{}_bytes_total{{{},direction="write"}} {}'.format(prefix, labels(device_address), values[3])]
+        lines += ["# HELP {}_failures_total Failed accesses and readback mismatches per device".format(prefix), "# TYPE {}_failures_total counter".format(prefix)]
+        for device_address, values in self._devices.items():
+            lines += ['{}_failures_total{{{}}} {}'.format(prefix, labels(device_address), values[4])]
+        lines += ["# HELP {}_pacing_seconds_total Time spent waiting for the gap between I2C commands".format(prefix), "# TYPE {}_pacing_seconds_total counter".format(prefix)]
+        for device_address, duration_ns in self._pacing_ns.items():
+            lines += ['{}_pacing_seconds_total{{{}}} {}'.format(prefix, labels(device_address), duration_ns/10**9)]
+        lines += ["# HELP {}_latency_seconds Latency of the I2C operations, without the pacing gap".format(prefix), "# TYPE {}_latency_seconds histogram".format(prefix)]
+        for operation, (histogram, count, total_ns) in self._latencies.items():
+            cumulative = 0
+            for le, bucket_count in zip(list(self.latency_buckets_us) + [None], histogram):
+                cumulative += bucket_count
+                le = "+Inf" if le is None else repr(le/10**6)
+                lines += ['{}_latency_seconds_bucket{{operation="{}",le="{}"}} {}'.format(prefix, operation, le, cumulative)]
+            lines += ['{}_latency_seconds_sum{{operation="{}"}} {}'.format(prefix, operation, total_ns/10**9)]
+            lines += ['{}_latency_seconds_count{{operation="{}"}} {}'.format(prefix, operation, count)]
+
+        temporary_filename = "{}.{}.tmp".format(filename, os.getpid())
+        with open(temporary_filename, "w") as file_handle:
+            file_handle.write("\n".join(lines) + "\n")
+        os.replace(temporary_filename, filename)
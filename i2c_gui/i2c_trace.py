@@ -0,0 +1,117 @@
+#############################################################################
+# zlib License
+#
+# (C) 2023 Cristóvão Beirão da Cruz e Silva <cbeiraod@cern.ch>
+#
+# This software is provided 'as-is', without any express or implied
+# warranty.  In no event will the authors be held liable for any damages
+# arising from the use of this software.
+#
+# Permission is granted to anyone to use this software for any purpose,
+# including commercial applications, and to alter it and redistribute it
+# freely, subject to the following restrictions:
+#
+# 1. The origin of this software must not be misrepresented; you must not
+#    claim that you wrote the original software. If you use this software
+#    in a product, an acknowledgment in the product documentation would be
+#    appreciated but is not required.
+# 2. Altered source versions must be plainly marked as such, and must not be
+#    misrepresented as being the original software.
+# 3. This notice may not be removed or altered from any source distribution.
+#############################################################################
+
+from __future__ import annotations
+
+import time
+import datetime
+import struct
+from collections import deque
+
+#  Bounded trace of the I2C activity for the I2C monitor. The transfers are kept as compact binary records
+# (timestamp, operation, device, register address, length and the data bytes) and the other messages as their
+# unformatted (message, arguments) pair, so nothing is turned into text until the trace is rendered.
+# Once the records take more than capacity_bytes, the oldest ones are dropped. Each record gets a sequence number,
+# so a display can render only the records added since its last refresh
+class I2C_Trace:
+    _record_header = struct.Struct('<dBBII')  # timestamp, operation, device address, register address, byte count
+    _operations = ['read', 'write']
+    _message_size = 64  # Approximate cost of a message record, for the capacity accounting
+
+    def __init__(self, capacity_bytes: int = 4*1024*1024, max_render_bytes: int = 64):
+        self.capacity_bytes = capacity_bytes
+        self.max_render_bytes = max_render_bytes
+        self.clear()
+
+    def clear(self):
+        self._records = deque()
+        self._size = 0
+        self._first_sequence = 0  # Sequence number of the oldest record kept
+        self._next_sequence = 0
+
+    def __len__(self):
+        return len(self._records)
+
+    @property
+    def first_sequence(self):
+        return self._first_sequence
+
+    @property
+    def next_sequence(self):
+        return self._next_sequence
+
+    def _append(self, record, size: int):
+        self._records.append(record)
+        self._size += size
+        self._next_sequence += 1
+        while self._size > self.capacity_bytes and len(self._records) > 1:
+            dropped = self._records.popleft()
+            self._size -= len(dropped) if isinstance(dropped, bytes) else self._message_size
+            self._first_sequence += 1
+
+    def transfer(self, operation: str, device_address: int, memory_address: int, data: list[int]):
+        record = self._record_header.pack(time.time(), self._operations.index(operation), device_address, memory_address, len(data)) + bytes(data)
+        self._append(record, len(record))
+
+    def message(self, message: str, *args):
+        self._append((time.time(), message, args), self._message_size)
+
+    #  Decoded records: (timestamp, operation, device address, register address, data) for the transfers
+    # and (timestamp, 'message', message text) for the messages
+    def records(self, since: int = 0):
+        skip = max(since - self._first_sequence, 0)
+        for index, record in enumerate(self._records):
+            if index < skip:
+                continue
+            if isinstance(record, bytes):
+                timestamp, operation, device_address, memory_address, byte_count = self._record_header.unpack_from(record)
+                yield (timestamp, self._operations[operation], device_address, memory_address, list(record[self._record_header.size:]))
+            else:
+                timestamp, message, args = record
+                yield (timestamp, 'message', message.format(*args) if len(args) > 0 else message)
+
+    def _render_record(self, record):
+        timestamp = datetime.datetime.fromtimestamp(record[0]).strftime("%H:%M:%S.%f")
+        if record[1] == 'message':
+            return "{} {}".format(timestamp, record[2])
+
+        _, operation, device_address, memory_address, data = record
+        text = " ".join("{:02x}".format(value) for value in data[:self.max_render_bytes])
+        if len(data) > self.max_render_bytes:
+            text += " ... ({} more bytes)".format(len(data) - self.max_render_bytes)
+        return "{} {} {} bytes {} 0x{:04x} of the I2C device with address 0x{:02x}:\n   {}".format(
+            timestamp,
+            "Read" if operation == 'read' else "Wrote",
+            len(data),
+            "starting from" if operation == 'read' else "starting at",
+            memory_address,
+            device_address,
+            text,
+        )
+
+    #  Text of the records from sequence number since on, starting with a note if some of them were already dropped
+    def render(self, since: int = 0):
+        lines = []
+        if since < self._first_sequence:
+            lines += ["... {} older records were dropped from the trace".format(self._first_sequence - since)]
+        lines += [self._render_record(record) for record in self.records(since)]
+        return "\n".join(lines)
@@ -0,0 +1,150 @@
+#############################################################################
+# zlib License
+#
+# (C) 2023 Cristóvão Beirão da Cruz e Silva <cbeiraod@cern.ch>
+#
+# This software is provided 'as-is', without any express or implied
+# warranty.  In no event will the authors be held liable for any damages
+# arising from the use of this software.
+#
+# Permission is granted to anyone to use this software for any purpose,
+# including commercial applications, and to alter it and redistribute it
+# freely, subject to the following restrictions:
+#
+# 1. The origin of this software must not be misrepresented; you must not
+#    claim that you wrote the original software. If you use this software
+#    in a product, an acknowledgment in the product documentation would be
+#    appreciated but is not required.
+# 2. Altered source versions must be plainly marked as such, and must not be
+#    misrepresented as being the original software.
+# 3. This notice may not be removed or altered from any source distribution.
+#############################################################################
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from .connection_controller import Connection_Controller
+
+from math import ceil
+
+class I2C_Transaction:
+    def __init__(
+        self,
+        operation: str,
+        device_address: int,
+        memory_address: int,
+        byte_count: int,
+        data: list[int] = None,
+        register_bits: int = 16,
+        register_length: int = 8,
+        access_type: str = 'Normal',
+    ):
+        if operation not in ['read', 'write']:
+            raise RuntimeError("Unknown I2C transaction operation: {}".format(operation))
+
+        self.operation = operation
+        self.device_address = device_address
+        self.memory_address = memory_address
+        self.byte_count = byte_count
+        self.data = data
+        self.register_bits = register_bits
+        self.register_length = register_length
+        self.access_type = access_type
+
+        self._done = False
+        self._result = None
+        self._exception = None
+
+    @property
+    def done(self):
+        return self._done
+
+    def result(self):
+        if not self._done:
+            raise RuntimeError("The I2C transaction was not executed yet, the batch it belongs to must be executed first")
+        if self._exception is not None:
+            raise self._exception
+        return self._result
+
+    def set_result(self, result: list[int] = None):
+        self._result = result
+        self._done = True
+
+    def set_exception(self, exception: Exception):
+        self._exception = exception
+        self._done = True
+
+    def _can_merge(self, other: I2C_Transaction):
+        if (other.operation != self.operation or
+            other.device_address != self.device_address or
+            other.register_bits != self.register_bits or
+            other.register_length != self.register_length or
+            other.access_type != self.access_type):
+            return False
+
+        register_bytes = ceil(self.register_length/8)
+        if self.byte_count % register_bytes != 0:
+            return False
+        return other.memory_address == self.memory_address + self.byte_count // register_bytes
+
+class I2C_Transaction_Batch:
+    def __init__(self, connection: Connection_Controller = None):
+        self._connection = connection
+        self._transactions: list[I2C_Transaction] = []
+
+    def __len__(self):
+        return len(self._transactions)
+
+    #  When used as a context manager, the batch is executed on the connection it was created from
+    # when leaving the context (unless an exception was raised)
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None and self._connection is not None:
+            self._connection.execute_batch(self)
+
+    @property
+    def transactions(self):
+        return self._transactions
+
+    @property
+    def device_addresses(self):
+        return set(transaction.device_address for transaction in self._transactions)
+
+    def read(self, device_address: int, memory_address: int, byte_count: int = 1, register_bits: int = 16, register_length: int = 8, read_type: str = 'Normal'):
+        transaction = I2C_Transaction('read', device_address, memory_address, byte_count, None, register_bits, register_length, read_type)
+        self._transactions += [transaction]
+        return transaction
+
+    def write(self, device_address: int, memory_address: int, data: list[int], register_bits: int = 16, register_length: int = 8, write_type: str = 'Normal'):
+        transaction = I2C_Transaction('write', device_address, memory_address, len(data), list(data), register_bits, register_length, write_type)
+        self._transactions += [transaction]
+        return transaction
+
+    #  Consecutive transactions of the same type on adjacent addresses are merged into a single transaction,
+    # only consecutive ones are merged so that the order of reads and writes is kept.
+    # Returns a list with the merged transactions and, for each, the original transactions it covers
+    def merged(self):
+        merged = []
+        for transaction in self._transactions:
+            if len(merged) > 0 and merged[-1][0]._can_merge(transaction):
+                merged_transaction, parts = merged[-1]
+                merged_transaction.byte_count += transaction.byte_count
+                if transaction.operation == 'write':
+                    merged_transaction.data += transaction.data
+                parts += [transaction]
+            else:
+                merged_transaction = I2C_Transaction(
+                    transaction.operation,
+                    transaction.device_address,
+                    transaction.memory_address,
+                    transaction.byte_count,
+                    None if transaction.data is None else list(transaction.data),
+                    transaction.register_bits,
+                    transaction.register_length,
+                    transaction.access_type,
+                )
+                merged += [(merged_transaction, [transaction])]
+        return merged
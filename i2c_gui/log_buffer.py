@@ -0,0 +1,124 @@
+#############################################################################
+# zlib License
+#
+# (C) 2023 Cristóvão Beirão da Cruz e Silva <cbeiraod@cern.ch>
+#
+# This software is provided 'as-is', without any express or implied
+# warranty.  In no event will the authors be held liable for any damages
+# arising from the use of this software.
+#
+# Permission is granted to anyone to use this software for any purpose,
+# including commercial applications, and to alter it and redistribute it
+# freely, subject to the following restrictions:
+#
+# 1. The origin of this software must not be misrepresented; you must not
+#    claim that you wrote the original software. If you use this software
+#    in a product, an acknowledgment in the product documentation would be
+#    appreciated but is not required.
+# 2. Altered source versions must be plainly marked as such, and must not be
+#    misrepresented as being the original software.
+# 3. This notice may not be removed or altered from any source distribution.
+#############################################################################
+
+from __future__ import annotations
+
+import logging
+import logging.handlers
+from collections import deque
+from itertools import islice
+
+#  Logging handler which keeps only the last max_records formatted records in memory.
+# Each record gets a sequence number, so a display can fetch only the records added since its last refresh.
+# Optionally, the records dropped from the buffer are spilled to a rotating log file on disk, so long runs
+# keep their full history while the memory used stays constant
+class Log_Ring_Buffer_Handler(logging.Handler):
+    def __init__(self, max_records: int = 10000, level = logging.NOTSET):
+        super().__init__(level)
+        self._records = deque()
+        self._max_records = max_records
+        self._first_sequence = 0  # Sequence number of the oldest record kept
+        self._spill_handler = None
+
+    def __len__(self):
+        return len(self._records)
+
+    @property
+    def max_records(self):
+        return self._max_records
+
+    @max_records.setter
+    def max_records(self, value: int):
+        if value < 1:
+            raise RuntimeError("The log buffer must keep at least one record")
+        self.acquire()
+        try:
+            self._max_records = value
+            self._trim()
+        finally:
+            self.release()
+
+    @property
+    def first_sequence(self):
+        return self._first_sequence
+
+    @property
+    def next_sequence(self):
+        return self._first_sequence + len(self._records)
+
+    @property
+    def spill_file(self):
+        if self._spill_handler is None:
+            return None
+        return self._spill_handler.baseFilename
+
+    def enable_spill(self, filename: str, max_bytes: int = 10*1024*1024, backup_count: int = 5):
+        self.disable_spill()
+        self._spill_handler = logging.handlers.RotatingFileHandler(filename, maxBytes=max_bytes, backupCount=backup_count, delay=True)
+
+    def disable_spill(self):
+        if self._spill_handler is not None:
+            self._spill_handler.close()
+            self._spill_handler = None
+
+    def _trim(self):
+        while len(self._records) > self._max_records:
+            text = self._records.popleft()
+            self._first_sequence += 1
+            if self._spill_handler is not None:  # The text is already formatted, so it is spilled as the message of a bare record
+                self._spill_handler.handle(logging.makeLogRecord({"msg": text}))
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            text = self.format(record)
+        except Exception:
+            self.handleError(record)
+            return
+        self._records.append(text)
+        self._trim()
+
+    def clear(self):
+        self.acquire()
+        try:
+            self._first_sequence = self.next_sequence
+            self._records.clear()
+        finally:
+            self.release()
+
+    def close(self):
+        self.disable_spill()
+        super().close()
+
+    #  Formatted records from sequence number since on
+    def records(self, since: int = 0):
+        self.acquire()
+        try:
+            count = min(self.next_sequence - since, len(self._records))
+            if count <= 0:
+                return []
+            #  Walk from the newest record, so that a refresh only costs the records added since the previous one
+            return list(islice(reversed(self._records), count))[::-1]
+        finally:
+            self.release()
+
+    def get_log(self):
+        return "".join(text + "\n" for text in self.records())
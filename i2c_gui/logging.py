@@ -24,11 +24,12 @@ from __future__ import annotations
 
 from .gui_helper import GUI_Helper
 from .base_gui import Base_GUI
+from .log_buffer import Log_Ring_Buffer_Handler
 
 import tkinter as tk
 import tkinter.ttk as ttk  # For themed widgets (gives a more native visual to the elements)
 import logging
-import io
+from collections import deque
 
 class Logging_Helper(GUI_Helper):
     _parent: Base_GUI
@@ -43,14 +44,17 @@ class Logging_Helper(GUI_Helper):
     }
     _default_log_level = "Info"
 
-    def __init__(self, parent: Base_GUI):
+    def __init__(self, parent: Base_GUI, max_records: int = 10000):
         super().__init__(parent, None, parent._logger)
 
         self._do_logging = False
         self._logger.disabled = True
 
-        self._stream = io.StringIO()
-        self._stream_handler = logging.StreamHandler(self._stream)
+        #  Only the last max_records records are kept, the text display is updated with the records added since
+        # its last refresh. Enable the spill to keep the records dropped from memory in a rotating log file
+        self._stream_handler = Log_Ring_Buffer_Handler(max_records)
+        self._rendered_sequence = 0  # Sequence number of the first record not yet in the text display
+        self._rendered_lines = deque()  # Number of lines of each record in the text display
         self._stream_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s:%(name)s:%(message)s'))
         self._logger.handlers.clear()
 
@@ -113,8 +117,26 @@ class Logging_Helper(GUI_Helper):
             self._logger.disabled = True
             self._logging_window_status_var.set("Logging Disabled")
 
+    @property
+    def max_records(self):
+        return self._stream_handler.max_records
+
+    @max_records.setter
+    def max_records(self, value: int):
+        self._stream_handler.max_records = value
+
+    @property
+    def spill_file(self):
+        return self._stream_handler.spill_file
+
+    def enable_spill(self, filename: str, max_bytes: int = 10*1024*1024, backup_count: int = 5):
+        self._stream_handler.enable_spill(filename, max_bytes=max_bytes, backup_count=backup_count)
+
+    def disable_spill(self):
+        self._stream_handler.disable_spill()
+
     def get_log(self):
-        return self._stream.getvalue()
+        return self._stream_handler.get_log()
 
     def display_logging(self):
         if hasattr(self, "_logging_window"):
@@ -182,11 +204,17 @@ class Logging_Helper(GUI_Helper):
 
         self._logging_window.destroy()
         del self._logging_window
+        self._rendered_sequence = 0
+        self._rendered_lines.clear()
 
     def clear_log(self):
-        self._stream.truncate(0)
-        self._stream.seek(0)
-        self.refresh_logging()
+        self._stream_handler.clear()
+        if hasattr(self, "_logging_window"):
+            self._text_display.configure(state='normal')
+            self._text_display.delete("1.0", tk.END)
+            self._text_display.configure(state='disabled')
+        self._rendered_sequence = self._stream_handler.next_sequence
+        self._rendered_lines.clear()
 
     def toggle_logging(self):
         self.is_logging = not self.is_logging
@@ -232,9 +260,28 @@ class Logging_Helper(GUI_Helper):
         # TODO: Scrollbar is still jumping around when updating. It is related to when the lines of text wrap to the next line
         # Disabling line wrapping seems to have "fixed" (hidden) the issue
 
+        #  Only the records added since the last refresh are appended, and the lines of the records which were
+        # dropped from the buffer in the meantime are removed from the top of the display
+        first_sequence = self._stream_handler.first_sequence
+        rendered_first = self._rendered_sequence - len(self._rendered_lines)
+        dropped_lines = 0
+        while rendered_first < first_sequence and len(self._rendered_lines) > 0:
+            dropped_lines += self._rendered_lines.popleft()
+            rendered_first += 1
+        self._rendered_sequence = max(self._rendered_sequence, first_sequence)
+
+        records = self._stream_handler.records(self._rendered_sequence)
+        if dropped_lines == 0 and len(records) == 0:
+            return
+
         self._text_display.configure(state='normal')
-        self._text_display.delete("1.0", tk.END)
-        self._text_display.insert('end', self.get_log())
+        if dropped_lines > 0:
+            self._text_display.delete("1.0", "{}.0".format(dropped_lines + 1))
+        if len(records) > 0:
+            self._text_display.insert('end', "".join(text + "\n" for text in records))
         self._text_display.configure(state='disabled')
         #self._text_display.yview_moveto(pos[0])
-        self._text_display.yview_moveto(vw[0])
\ No newline at end of file
+        self._text_display.yview_moveto(vw[0])
+
+        self._rendered_lines.extend(text.count("\n") + 1 for text in records)
+        self._rendered_sequence += len(records)
\ No newline at end of file
@@ -0,0 +1,95 @@
+#############################################################################
+# zlib License
+#
+# (C) 2023 Cristóvão Beirão da Cruz e Silva <cbeiraod@cern.ch>
+#
+# This software is provided 'as-is', without any express or implied
+# warranty.  In no event will the authors be held liable for any damages
+# arising from the use of this software.
+#
+# Permission is granted to anyone to use this software for any purpose,
+# including commercial applications, and to alter it and redistribute it
+# freely, subject to the following restrictions:
+#
+# 1. The origin of this software must not be misrepresented; you must not
+#    claim that you wrote the original software. If you use this software
+#    in a product, an acknowledgment in the product documentation would be
+#    appreciated but is not required.
+# 2. Altered source versions must be plainly marked as such, and must not be
+#    misrepresented as being the original software.
+# 3. This notice may not be removed or altered from any source distribution.
+#############################################################################
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from .connection_controller import Connection_Controller
+
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+import threading
+
+#  Runs operations on chips which sit on different physical buses concurrently. There is one worker thread per
+# bus (i.e. per Connection_Controller), so operations on chips sharing a bus are executed one after the other in
+# the order they were submitted, while operations on different buses run at the same time. The I2C transfers
+# release the GIL while waiting on the adapter, so the buses are driven in parallel.
+# The chips should be built on a headless ScriptHelper, tk variables can not be used from the worker threads,
+# and while operations are pending a bus should not be used directly from another thread
+class Multi_Bus_Executor:
+    def __init__(self):
+        self._workers: dict[int, tuple[Connection_Controller, ThreadPoolExecutor]] = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown(wait=True)
+
+    @property
+    def bus_count(self):
+        return len(self._workers)
+
+    def _get_connection(self, target) -> Connection_Controller:
+        from .connection_controller import Connection_Controller
+        if isinstance(target, Connection_Controller):
+            return target
+        if hasattr(target, "_i2c_controller"):  # A chip
+            return target._i2c_controller
+        raise RuntimeError("Unable to find the I2C bus of {}, expected a chip or a Connection_Controller".format(target))
+
+    def _get_worker(self, connection: Connection_Controller):
+        with self._lock:
+            key = id(connection)
+            if key not in self._workers:
+                self._workers[key] = (connection, ThreadPoolExecutor(max_workers=1, thread_name_prefix="I2C_Bus_{}".format(len(self._workers))))
+            return self._workers[key][1]
+
+    #  Queue function(*args, **kwargs) on the bus of target (a chip or a Connection_Controller), returns a future with its result
+    def submit(self, target, function, *args, **kwargs) -> Future:
+        return self._get_worker(self._get_connection(target)).submit(function, *args, **kwargs)
+
+    #  Queue the chip method with the given name, with the same arguments, for each of the chips
+    def submit_all(self, chips: list, method: str, *args, **kwargs) -> list[Future]:
+        return [self.submit(chip, getattr(chip, method), *args, **kwargs) for chip in chips]
+
+    #  Queue apply_config for each chip in configs ({chip: config file}), see Base_Chip.apply_config
+    def apply_configs(self, configs: dict, **kwargs) -> list[Future]:
+        return [self.submit(chip, chip.apply_config, configs[chip], **kwargs) for chip in configs]
+
+    #  Wait for the futures and return their results in the same order, the first exception raised by an operation is raised again
+    @staticmethod
+    def gather(futures: list[Future], timeout: float = None):
+        done, not_done = wait(futures, timeout=timeout)
+        if len(not_done) > 0:
+            raise TimeoutError("{} of the operations did not finish in time".format(len(not_done)))
+        return [future.result() for future in futures]
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            workers = list(self._workers.values())
+            self._workers = {}
+        for _, executor in workers:
+            executor.shutdown(wait=wait)
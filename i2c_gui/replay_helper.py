@@ -0,0 +1,273 @@
+#############################################################################
+# zlib License
+#
+# (C) 2023 Cristóvão Beirão da Cruz e Silva <cbeiraod@cern.ch>
+#
+# This software is provided 'as-is', without any express or implied
+# warranty.  In no event will the authors be held liable for any damages
+# arising from the use of this software.
+#
+# Permission is granted to anyone to use this software for any purpose,
+# including commercial applications, and to alter it and redistribute it
+# freely, subject to the following restrictions:
+#
+# 1. The origin of this software must not be misrepresented; you must not
+#    claim that you wrote the original software. If you use this software
+#    in a product, an acknowledgment in the product documentation would be
+#    appreciated but is not required.
+# 2. Altered source versions must be plainly marked as such, and must not be
+#    misrepresented as being the original software.
+# 3. This notice may not be removed or altered from any source distribution.
+#############################################################################
+
+from __future__ import annotations
+
+from .i2c_connection_helper import I2C_Connection_Helper
+from .i2c_transaction_batch import I2C_Transaction
+from .i2c_journal import I2C_Journal
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from .base_gui import Base_GUI
+
+try:
+    import tkinter as tk
+    import tkinter.ttk as ttk  # For themed widgets (gives a more native visual to the elements)
+except ImportError:
+    tk = None
+    ttk = None
+import logging
+import time
+
+from math import ceil
+
+#  Replays an I2C journal recorded with Connection_Controller.start_journal instead of talking to an interface.
+# The transactions are matched in order against the journal: reads return the recorded data, writes and direct
+# I2C commands are compared to the recorded ones and recorded failures are raised again. When the transaction stream
+# diverges, the journal is searched up to lookahead entries ahead: the skipped entries are counted as missing and a
+# transaction without a match as unexpected, its reads being served from the last values seen for those registers.
+# With strict, any divergence raises instead. The report property summarizes the differences found
+class Replay_Helper(I2C_Connection_Helper):
+    native_batch = True
+    max_reported_mismatches = 100
+
+    def __init__(self, parent: Base_GUI, max_seq_byte: int = None, swap_endian: bool = False, strict: bool = False, realtime: bool = False, lookahead: int = 64):
+        super().__init__(parent, max_seq_byte, swap_endian)
+
+        self._journal_file_var = self._build_variable("String", value="")
+        self._strict_var = self._build_variable("Boolean", value=strict)
+        self.realtime = realtime
+        self.lookahead = lookahead
+
+        self._entries = []
+        self.rewind()
+
+    @property
+    def journal_file(self):
+        return self._journal_file_var.get()
+
+    @journal_file.setter
+    def journal_file(self, value: str):
+        self._journal_file_var.set(value)
+
+    @property
+    def strict(self):
+        return self._strict_var.get()
+
+    @strict.setter
+    def strict(self, value: bool):
+        self._strict_var.set(value)
+
+    @property
+    def entries(self):
+        return self._entries
+
+    #  Restarts the replay from the first entry of the journal
+    def rewind(self):
+        self._cursor = 0
+        self._memory = {}
+        self._matched = 0
+        self._missing = 0
+        self._unexpected = 0
+        self._payload_mismatches = 0
+        self._mismatches = []
+
+    @property
+    def report(self):
+        return {
+            "entries": len(self._entries),
+            "matched": self._matched,
+            "payload_mismatches": self._payload_mismatches,
+            "missing": self._missing,
+            "unexpected": self._unexpected,
+            "remaining": len(self._entries) - self._cursor,
+            "recorded_time_s": sum(entry.duration_ns for entry in self._entries if not entry.batch)/10**9 + self._batch_time_ns()/10**9,
+            "mismatches": list(self._mismatches),
+        }
+
+    #  The entries of a batch share the timing of the batch, so it is only counted once
+    def _batch_time_ns(self):
+        total = 0
+        previous = None
+        for entry in self._entries:
+            if entry.batch and (previous is None or (entry.start_ns, entry.duration_ns) != previous):
+                total += entry.duration_ns
+                previous = (entry.start_ns, entry.duration_ns)
+        return total
+
+    def _mismatch(self, description: str):
+        if self.strict:
+            raise RuntimeError("I2C replay mismatch: {}".format(description))
+        if len(self._mismatches) < self.max_reported_mismatches:
+            self._mismatches += [description]
+        self._logger.warning("I2C replay mismatch: {}".format(description))
+
+    def _describe(self, operation: str, device_address: int, memory_address: int, byte_count: int):
+        if operation in ['read', 'write']:
+            return "{} of {} bytes from 0x{:04x} of the I2C device with address 0x{:02x}".format(operation, byte_count, memory_address, device_address)
+        if operation == 'check':
+            return "check of the I2C device with address 0x{:02x}".format(device_address)
+        return "direct I2C commands"
+
+    def _matches(self, entry, operation: str, device_address: int, memory_address: int, byte_count: int):
+        if entry.operation != operation:
+            return False
+        if operation == 'direct':
+            return True
+        return entry.device_address == device_address and entry.memory_address == memory_address and entry.byte_count == byte_count
+
+    #  Returns the journal entry matching the transaction, or None if there is none close enough
+    def _consume(self, operation: str, device_address: int = 0, memory_address: int = 0, byte_count: int = 0, payload: list[int] = None):
+        description = self._describe(operation, device_address, memory_address, byte_count)
+
+        last = min(len(self._entries), self._cursor + self.lookahead + 1)
+        for index in range(self._cursor, last):
+            if self._matches(self._entries[index], operation, device_address, memory_address, byte_count):
+                break
+        else:
+            self._unexpected += 1
+            self._mismatch("unexpected {} (journal entry {})".format(description, self._cursor))
+            return None
+
+        if index > self._cursor:
+            self._missing += index - self._cursor
+            self._mismatch("{} journal entries missing before the {} (journal entry {})".format(index - self._cursor, description, index))
+        entry = self._entries[index]
+        self._cursor = index + 1
+        self._matched += 1
+
+        if payload is not None and entry.payload != payload:
+            self._payload_mismatches += 1
+            self._mismatch("{} with different data (journal entry {}): {} instead of {}".format(description, index, payload, entry.payload))
+
+        if self.realtime and not entry.batch and entry.duration_ns > 0:
+            time.sleep(entry.duration_ns/10**9)
+        if entry.failed:
+            raise RuntimeError("The replayed {} failed when it was recorded".format(description))
+        return entry
+
+    def _update_memory(self, device_address: int, memory_address: int, register_length: int, data: list[int]):
+        memory = self._memory.setdefault(device_address, {})
+        base = memory_address * ceil(register_length/8)
+        for offset, value in enumerate(data):
+            memory[base + offset] = value
+
+    def _read_memory(self, device_address: int, memory_address: int, register_length: int, byte_count: int):
+        memory = self._memory.get(device_address, {})
+        base = memory_address * ceil(register_length/8)
+        return [memory.get(base + offset, 0) for offset in range(byte_count)]
+
+    def _check_i2c_device(self, address: int):
+        entry = self._consume('check', address)
+        if entry is None:
+            return any(recorded.device_address == address for recorded in self._entries if recorded.operation != "direct")
+        return entry.result == [1]
+
+    def _write_i2c_device_memory(self, address: int, memory_address: int, data: list[int], register_bits: int = 16, write_type: str = 'Normal'):
+        self._execute_i2c_batch([I2C_Transaction('write', address, memory_address, len(data), list(data), register_bits, 8, write_type)])
+
+    def _read_i2c_device_memory(self, address: int, memory_address: int, byte_count: int, register_bits: int = 16, read_type: str = 'Normal') -> list[int]:
+        transaction = I2C_Transaction('read', address, memory_address, byte_count, None, register_bits, 8, read_type)
+        self._execute_i2c_batch([transaction])
+        return transaction.result()
+
+    def _execute_i2c_batch(self, transactions: list[I2C_Transaction]):
+        batch_durations = {}
+        try:
+            for transaction in transactions:
+                payload = list(transaction.data) if transaction.operation == 'write' else None
+                entry = self._consume(transaction.operation, transaction.device_address, transaction.memory_address, transaction.byte_count, payload)
+                if entry is not None and entry.batch:
+                    batch_durations[entry.start_ns] = entry.duration_ns
+
+                if transaction.operation == 'read':
+                    data = self._read_memory(transaction.device_address, transaction.memory_address, transaction.register_length, transaction.byte_count) if entry is None else list(entry.result)
+                    self._update_memory(transaction.device_address, transaction.memory_address, transaction.register_length, data)
+                    transaction.set_result(data)
+                else:
+                    self._update_memory(transaction.device_address, transaction.memory_address, transaction.register_length, transaction.data)
+                    transaction.set_result()
+        finally:
+            if self.realtime and len(batch_durations) > 0:
+                time.sleep(sum(batch_durations.values())/10**9)
+
+    def _direct_i2c(self, commands: list[int]) -> list[int]:
+        entry = self._consume('direct', payload=I2C_Journal.encode_commands(commands))
+        if entry is None:
+            return []
+        return list(entry.result)
+
+    def display_in_frame(self, frame: ttk.Frame):
+        if hasattr(self, '_frame') and self._frame is not None:
+            tmp = self._frame.children.copy()
+            for widget in tmp:
+                tmp[widget].destroy()
+
+        self._frame = frame
+
+        self._journal_label = ttk.Label(self._frame, text="Journal:")
+        self._journal_label.grid(column=0, row=0, sticky=(tk.W, tk.E))
+
+        self._journal_entry = ttk.Entry(self._frame, textvariable=self._journal_file_var, width=25)
+        self._journal_entry.grid(column=1, row=0, sticky=(tk.W, tk.E), padx=(0,30))
+
+        self._frame.columnconfigure(2, weight=1)
+
+        self._strict_checkbutton = ttk.Checkbutton(self._frame, variable=self._strict_var, text='Strict')
+        self._strict_checkbutton.grid(column=3, row=0, sticky=(tk.W, tk.E), padx=(0,30))
+
+        self._frame.columnconfigure(4, weight=1)
+
+    def validate_connection_params(self):
+        if self.journal_file == "":
+            self.send_message("Please enter the I2C journal file to replay", "Error")
+            return False
+
+        return True
+
+    def connect(self, no_connect: bool = False):
+        self._no_connect = no_connect
+        try:
+            self._entries = I2C_Journal.load(self.journal_file)
+        except (OSError, RuntimeError) as error:
+            self.send_message("Unable to load the I2C journal {}: {}".format(self.journal_file, error), "Error")
+            return False
+        self.rewind()
+
+        if hasattr(self, "_journal_entry"):
+            self._journal_entry.config(state="disabled")
+        self.send_message("Replaying the I2C journal {} with {} transactions".format(self.journal_file, len(self._entries)))
+        return True
+
+    def disconnect(self):
+        report = self.report
+        self.send_message("Finished replaying the I2C journal {}: {} transactions matched, {} with different data, {} missing, {} unexpected and {} not replayed".format(
+            self.journal_file,
+            report["matched"],
+            report["payload_mismatches"],
+            report["missing"],
+            report["unexpected"],
+            report["remaining"],
+        ))
+
+        if hasattr(self, "_journal_entry"):
+            self._journal_entry.config(state="normal")
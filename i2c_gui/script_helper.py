@@ -24,13 +24,26 @@ from __future__ import annotations
 
 from .gui_helper import GUI_Helper
 
-import tkinter as tk
+try:
+    import tkinter as tk
+except ImportError:
+    tk = None
 import logging
 
 class ScriptHelper(GUI_Helper):
-    def __init__(self, logger: logging.Logger):
-        # self._root = tk.Tk()  # Needed for some of the variables to work correctly
-        super().__init__("Script Helper", tk.Tk(), logger)
+    def __init__(self, logger: logging.Logger, headless: bool = False):
+        #  In headless mode the chips and the connection are built on plain python variables,
+        # so no tk root (and no display) is needed, which also makes it safe to use from worker processes
+        self._headless = headless or tk is None
+        if self._headless:
+            super().__init__("Script Helper", None, logger)
+        else:
+            # self._root = tk.Tk()  # Needed for some of the variables to work correctly
+            super().__init__("Script Helper", tk.Tk(), logger)
+
+    @property
+    def is_headless(self):
+        return self._headless
 
     def _local_status_update(self, value):
         self._logger.info("Updating local status to: {}".format(value))
@@ -24,26 +24,42 @@ from __future__ import annotations
 
 from .i2c_connection_helper import I2C_Connection_Helper
 from .i2c_messages import I2CMessages
-from .base_gui import Base_GUI
-
-import tkinter as tk
-import tkinter.ttk as ttk  # For themed widgets (gives a more native visual to the elements)
+from .i2c_transaction_batch import I2C_Transaction
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from .base_gui import Base_GUI
+
+try:
+    import tkinter as tk
+    import tkinter.ttk as ttk  # For themed widgets (gives a more native visual to the elements)
+except ImportError:
+    tk = None
+    ttk = None
 import logging
 import time
 
 from usb_iss import UsbIss, defs
 
 class USB_ISS_Helper(I2C_Connection_Helper):
-    def __init__(self, parent: Base_GUI, max_seq_byte: int = 8, swap_endian: bool = True):
+    #  Limits of a single USB-ISS command frame (64 bytes): bytes in the command sequence
+    # sent and bytes which can be read back in the reply
+    _frame_max_command_bytes = 60
+    _frame_max_read_bytes = 60
+
+    #  With max_seq_byte set to None (the default) the transfers are sized per operation: each one is split into I2C direct
+    # segments as large as a frame allows and the segments are then packed into as few frames as possible. Note that
+    # this sends the "Normal" reads as direct frames with a repeated start. With max_seq_byte set, the transfers are
+    # done as before: one I2C_AD1/I2C_AD2 command per max_seq_byte chunk, also within batches
+    def __init__(self, parent: Base_GUI, max_seq_byte: int = None, swap_endian: bool = True):
         super().__init__(parent, max_seq_byte, swap_endian)
 
         self._iss = UsbIss()
         #self._iss = UsbIss(verbose=True)
 
-        self._port_var = tk.StringVar()
+        self._port_var = self._build_variable("String")
         self._port_var.set("COM3")
 
-        self._clk_var = tk.IntVar(self._frame)
+        self._clk_var = self._build_variable("Int")
         self._clk_var.set(100)
 
     @property
@@ -88,55 +104,160 @@ class USB_ISS_Helper(I2C_Connection_Helper):
                 self.send_message("Unknown bit size trying to be sent", "Error")
                 return []
         elif read_type == "Repeated Start":
-            direct_msg = [defs.I2CDirect.START]
-
-            device_address_byte = address << 1
-            if register_bits == 8:
-                direct_msg += [
-                    defs.I2CDirect.WRITE2,
-                    device_address_byte,
-                    memory_address & 0xff,
-                ]
-            elif register_bits == 16:
-                direct_msg += [
-                    defs.I2CDirect.WRITE3,
-                    device_address_byte,
-                    (memory_address >> 8) & 0xff,
-                    memory_address & 0xff,
-                ]
-            else:
+            if register_bits not in [8, 16]:
                 self.send_message("Unknown bit size trying to be sent", "Error")
                 return []
 
-            direct_msg += [
-                defs.I2CDirect.RESTART,
-                defs.I2CDirect.WRITE1,
-                device_address_byte | 0x01,
-            ]
-
-            #byte_count += 1  # Why do I need to do this... maybe something is misconfigured
-            if byte_count <= 16:
-                if byte_count > 1:
-                    direct_msg += [
-                        getattr(defs.I2CDirect, f"READ{byte_count-1}"),
-                    ]
-            else:
-                raise RuntimeError("USB ISS does not support a block read of more than 16 bytes")
+            data = []
+            for segment_data in self._run_direct_segments(self._build_read_segments(address, memory_address, byte_count, register_bits)):
+                data += segment_data
+            return data
+        else:
+            raise RuntimeError("Unknown read type chosen for the USB ISS")
 
-            direct_msg += [
-                defs.I2CDirect.NACK,
-                defs.I2CDirect.READ1,
-                defs.I2CDirect.STOP,
-            ]
+    def _address_bytes(self, memory_address: int, register_bits: int):
+        if register_bits == 16:
+            return [(memory_address >> 8) & 0xff, memory_address & 0xff]
+        elif register_bits == 8:
+            return [memory_address & 0xff]
+        raise RuntimeError("Unknown bit size trying to be sent")
+
+    def _offset_memory_address(self, memory_address: int, offset: int, register_bits: int):
+        #  The memory address received may have its bytes swapped, so it is swapped back before adding the offset
+        if self._swap_endian and register_bits == 16:
+            return self.swap_endian_16bit(self.swap_endian_16bit(memory_address) + offset)
+        return memory_address + offset
+
+    def _get_segment_size(self, max_bytes: int, register_bytes: int):
+        segment_size = max_bytes
+        if self._max_seq_byte is not None:
+            segment_size = min(segment_size, self._max_seq_byte)
+        return segment_size - segment_size % register_bytes  # Segments must not split registers
+
+    def _max_frame_write_bytes(self, register_bits: int):
+        # START + WRITEn commands (one per 16 bytes) + device/memory address + data + STOP
+        header_bytes = 1 + register_bits//8
+        max_bytes = 0
+        while 2 + -(-(header_bytes + max_bytes + 1)//16) + header_bytes + max_bytes + 1 <= self._frame_max_command_bytes:
+            max_bytes += 1
+        return max_bytes
+
+    #  A segment is a full I2C transaction (START ... STOP) in direct commands, together with the number of bytes it reads
+    def _build_read_segments(self, address: int, memory_address: int, byte_count: int, register_bits: int, register_bytes: int = 1):
+        segment_size = self._get_segment_size(self._frame_max_read_bytes, register_bytes)
+
+        segments = []
+        for offset in range(0, byte_count, segment_size):
+            this_byte_count = min(segment_size, byte_count - offset)
+            this_address = self._offset_memory_address(memory_address, offset//register_bytes, register_bits)
+
+            header = [address << 1] + self._address_bytes(this_address, register_bits)
+            commands = [I2CMessages.START.value, I2CMessages.WRITE1.value + len(header) - 1] + header
+            commands += [I2CMessages.RESTART.value, I2CMessages.WRITE1.value, (address << 1) | 0x01]
+            remaining = this_byte_count - 1  # The last byte is read after the NACK
+            while remaining > 0:
+                this_read = min(16, remaining)
+                commands += [I2CMessages.READ1.value + this_read - 1]
+                remaining -= this_read
+            commands += [I2CMessages.NACK.value, I2CMessages.READ1.value, I2CMessages.STOP.value]
+
+            segments += [(commands, this_byte_count)]
+        return segments
+
+    def _build_write_segments(self, address: int, memory_address: int, data: list[int], register_bits: int, register_bytes: int = 1):
+        segment_size = self._get_segment_size(self._max_frame_write_bytes(register_bits), register_bytes)
+
+        segments = []
+        for offset in range(0, len(data), segment_size):
+            this_address = self._offset_memory_address(memory_address, offset//register_bytes, register_bits)
+            payload = [address << 1] + self._address_bytes(this_address, register_bits) + list(data[offset:offset+segment_size])
+
+            commands = [I2CMessages.START.value]
+            for idx in range(0, len(payload), 16):
+                chunk = payload[idx:idx+16]
+                commands += [I2CMessages.WRITE1.value + len(chunk) - 1] + chunk
+            commands += [I2CMessages.STOP.value]
+
+            segments += [(commands, 0)]
+        return segments
+
+    #  Segments are packed into as few direct frames as the frame limits allow. All the frames are built
+    # before any of them is sent so that the USB round trips are done back to back, the replies are only
+    # split into the data of each segment once all the frames have been sent
+    def _pack_direct_frames(self, segments: list[tuple], device_addresses: list[int] = None):
+        frames = []
+        for idx, (commands, read_bytes) in enumerate(segments):
+            if (len(frames) == 0 or
+                len(frames[-1][0]) + len(commands) > self._frame_max_command_bytes or
+                frames[-1][1] + read_bytes > self._frame_max_read_bytes):
+                frames += [[[], 0, [], set()]]
+            frames[-1][0] += commands
+            frames[-1][1] += read_bytes
+            frames[-1][2] += [read_bytes]
+            if device_addresses is not None:
+                frames[-1][3].add(device_addresses[idx])
+        return frames
+
+    #  When the device address of each segment is given, each frame is paced as a separate command (with the gap of
+    # its device, if it only addresses one), otherwise the caller is expected to pace the whole call
+    def _run_direct_segments(self, segments: list[tuple], device_addresses: list[int] = None):
+        frames = self._pack_direct_frames(segments, device_addresses)
+
+        replies = []
+        for commands, read_bytes, _, frame_devices in frames:
+            if device_addresses is None:
+                reply = self._iss.i2c.direct(commands)
+            else:
+                frame_device = next(iter(frame_devices)) if len(frame_devices) == 1 else None
+                reply = self._paced_access(frame_device, self._iss.i2c.direct, commands)
+            if len(reply) != read_bytes:
+                raise RuntimeError("Did not receive the expected number of bytes from the USB ISS, expected {} and got {}".format(read_bytes, len(reply)))
+            replies += [reply]
+
+        segment_data = []
+        for reply, (_, _, segment_read_bytes, _) in zip(replies, frames):
+            idx = 0
+            for read_bytes in segment_read_bytes:
+                segment_data += [list(reply[idx:idx+read_bytes])]
+                idx += read_bytes
+        return segment_data
+
+    def _execute_i2c_batch(self, transactions: list[I2C_Transaction]):
+        if self._max_seq_byte is not None:
+            return super()._execute_i2c_batch(transactions)
+
+        segments = []
+        segment_count = []
+        segment_devices = []
+        for transaction in transactions:
+            if transaction.register_bits not in [8, 16] or transaction.access_type not in ['Normal', 'Repeated Start']:
+                raise RuntimeError("Unsupported transaction for the USB ISS batch execution")
+
+            memory_address = transaction.memory_address
+            if self._swap_endian and transaction.register_bits == 16:
+                memory_address = self.swap_endian_16bit(memory_address)
+
+            register_bytes = -(-transaction.register_length//8)
+            if transaction.operation == 'read':
+                this_segments = self._build_read_segments(transaction.device_address, memory_address, transaction.byte_count, transaction.register_bits, register_bytes)
+            else:
+                this_segments = self._build_write_segments(transaction.device_address, memory_address, transaction.data, transaction.register_bits, register_bytes)
+            segments += this_segments
+            segment_count += [len(this_segments)]
+            segment_devices += [transaction.device_address] * len(this_segments)
 
-            retVal = self._iss.i2c.direct(direct_msg)
+        segment_data = self._run_direct_segments(segments, segment_devices)
 
-            if len(retVal) != byte_count:
-                raise RuntimeError(f"Did not receive the expected number of bytes")
+        idx = 0
+        for transaction, count in zip(transactions, segment_count):
+            if transaction.operation == 'read':
+                data = []
+                for this_data in segment_data[idx:idx+count]:
+                    data += this_data
+                transaction.set_result(data)
             else:
-                return retVal
-        else:
-            raise RuntimeError("Unknown read type chosen for the USB ISS")
+                transaction.set_result()
+            idx += count
 
     def _direct_i2c(self, commands: list[int]) -> list[int]:
         direct_msg = []
@@ -73,7 +73,7 @@ valid_power_modes = ['low', '010', '101', 'high']
 class i2c_connection():
     _chips = None
 
-    def __init__(self, port, chip_addresses, ws_addresses, chip_names, chip_fc_delays):
+    def __init__(self, port, chip_addresses, ws_addresses, chip_names, chip_fc_delays, headless=False, broker_socket=None):
         self.chip_addresses = chip_addresses
         self.ws_addresses = ws_addresses
         self.chip_names = chip_names
@@ -87,12 +87,17 @@ class i2c_connection():
         log_level=30
         logging.basicConfig(format='%(asctime)s - %(levelname)s:%(name)s:%(message)s')
         logger = logging.getLogger("Script_Logger")
-        self.Script_Helper = i2c_gui.ScriptHelper(logger)
+        self.Script_Helper = i2c_gui.ScriptHelper(logger, headless=headless)
         self.conn = i2c_gui.Connection_Controller(self.Script_Helper)
-        self.conn.connection_type = "USB-ISS"
-        self.conn.handle: USB_ISS_Helper
-        self.conn.handle.port = port
-        self.conn.handle.clk = 100
+        if broker_socket is None:
+            self.conn.connection_type = "USB-ISS"
+            self.conn.handle: USB_ISS_Helper
+            self.conn.handle.port = port
+            self.conn.handle.clk = 100
+        else:  # Share the USB-ISS owned by an I2C broker (i2c_broker.py), e.g. with a monitoring script
+            self.conn.connection_type = "Broker"
+            self.conn.handle.socket_path = broker_socket
+            self.conn.handle.priority = "Interactive"
         self.conn.connect()
         logger.setLevel(log_level)
 
@@ -127,6 +132,15 @@ class i2c_connection():
     def __del__(self):
         self.conn.disconnect()
 
+    #--------------------------------------------------------------------------#
+    ## Configure the chips of several boards, each on its own USB-ISS, at the same time
+    ## The connections must be created with headless=True, the chips of each connection are still configured in series
+    @staticmethod
+    def config_chips_in_parallel(connections: list, func_string = '00000000'):
+        with i2c_gui.Multi_Bus_Executor() as executor:
+            futures = [executor.submit(connection.conn, connection.config_chips, func_string) for connection in connections]
+            return executor.gather(futures)
+
     #--------------------------------------------------------------------------#
     ## Useful helper functions to streamline register reading and writing
     def pixel_decoded_register_write(self, decodedRegisterName, data_to_write, chip=None, chip_address=None):
@@ -397,76 +411,8 @@ class i2c_connection():
         if(check_broadcast):
             return
 
-        broadcast_ok = True
-        for row in range(16):
-            for col in range(16):
-                column_indexer_handle.set(col)
-                row_indexer_handle.set(row)
-
-                chip.read_all_block("ETROC2", "Pixel Config")
-
-                if int(disDataReadout_handle.get(), 0) != int(disDataReadout, 0):
-                    broadcast_ok = False
-                    break
-                if int(QInjEn_handle.get(), 0) != int(QInjEn, 0):
-                    broadcast_ok = False
-                    break
-                if int(disTrigPath_handle.get(), 0) != int(disTrigPath, 0):
-                    broadcast_ok = False
-                    break
-                if int(upperTOATrig_handle.get(), 0) != int(upperTOA, 0):
-                    broadcast_ok = False
-                    break
-                if int(lowerTOATrig_handle.get(), 0) != int(lowerTOA, 0):
-                    broadcast_ok = False
-                    break
-                if int(upperTOTTrig_handle.get(), 0) != int(upperTOT, 0):
-                    broadcast_ok = False
-                    break
-                if int(lowerTOTTrig_handle.get(), 0) != int(lowerTOT, 0):
-                    broadcast_ok = False
-                    break
-                if int(upperCalTrig_handle.get(), 0) != int(upperCal, 0):
-                    broadcast_ok = False
-                    break
-                if int(lowerCalTrig_handle.get(), 0) != int(lowerCal, 0):
-                    broadcast_ok = False
-                    break
-                if int(upperTOA_handle.get(), 0) != int(upperTOA, 0):
-                    broadcast_ok = False
-                    break
-                if int(lowerTOA_handle.get(), 0) != int(lowerTOA, 0):
-                    broadcast_ok = False
-                    break
-                if int(upperTOT_handle.get(), 0) != int(upperTOT, 0):
-                    broadcast_ok = False
-                    break
-                if int(lowerTOT_handle.get(), 0) != int(lowerTOT, 0):
-                    broadcast_ok = False
-                    break
-                if int(upperCal_handle.get(), 0) != int(upperCal, 0):
-                    broadcast_ok = False
-                    break
-                if int(lowerCal_handle.get(), 0) != int(lowerCal, 0):
-                    broadcast_ok = False
-                    break
-                if int(enable_TDC_handle.get(), 0) != int(enable_TDC, 0):
-                    broadcast_ok = False
-                    break
-                if int(IBSel_handle.get(), 0) != int(IBSel, 0):
-                    broadcast_ok = False
-                    break
-                if int(Bypass_THCal_handle.get(), 0) != int(Bypass_THCal, 0):
-                    broadcast_ok = False
-                    break
-                if int(TH_offset_handle.get(), 0) != int(TH_offset, 0):
-                    broadcast_ok = False
-                    break
-                if int(DAC_handle.get(), 0) != int(DAC, 0):
-                    broadcast_ok = False
-                    break
-            if not broadcast_ok:
-                break
+        mismatches = chip.verify_broadcast("Pixel Config")
+        broadcast_ok = not any(mismatches[field].any() for field in mismatches)
 
         if not broadcast_ok:
             print("Broadcast failed! \n Will manually disable pixels")
@@ -773,7 +719,7 @@ class i2c_connection():
             chip: i2c_gui.chips.ETROC2_Chip = self.get_chip_i2c_connection(address)
 
             chip.read_all()
-            chip.save_config(base_dir / "{}_{}_{}.pckl".format(datetime.datetime.now().isoformat().replace(":","-"),name,title))
+            chip.save_config(base_dir / "{}_{}_{}.i2c_conf".format(datetime.datetime.now().isoformat().replace(":","-"),name,title))
 
     #--------------------------------------------------------------------------#
     ## Broadcast Utils
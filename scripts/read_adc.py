@@ -85,6 +85,7 @@ class ADCMeasurements():
             vref: int,
             i2c_address: int,
             internal_vref: bool,
+            broker_socket: str = None,
                  ):
         self._interval = interval
         self._outdir = outdir
@@ -102,11 +103,16 @@ class ADCMeasurements():
 
         self._script_helper = ScriptHelper(self._logger)
 
-        ## USB ISS connection
+        ## USB ISS connection, or through the I2C broker which owns it so the notebooks can keep using it
         self._conn = Connection_Controller(self._script_helper)
-        self._conn.connection_type = "USB-ISS"
-        self._conn.handle.port = self._port
-        self._conn.handle.clk = 100
+        if broker_socket is None:
+            self._conn.connection_type = "USB-ISS"
+            self._conn.handle.port = self._port
+            self._conn.handle.clk = 100
+        else:
+            self._conn.connection_type = "Broker"
+            self._conn.handle.socket_path = broker_socket
+            self._conn.handle.priority = "Monitoring"
 
         self._conn.connect()
 
@@ -317,7 +323,7 @@ if __name__ == "__main__":
 
     parser = argparse.ArgumentParser(
                     prog='Read ADC',
-                    description='Control it!\nBy default, this script will take no action apart from finding and attempting to configure the ADC. Use the --turn-on --log --turn-off options to control what actions the script takes./n/nWARNING: This script will conflict with any notebook trying to run things with the USB-ISS',
+                    description='Control it!\nBy default, this script will take no action apart from finding and attempting to configure the ADC. Use the --turn-on --log --turn-off options to control what actions the script takes./n/nWARNING: Unless --broker is used, this script will conflict with any notebook trying to run things with the USB-ISS',
                     #epilog='Text at the bottom of help'
                     )
 
@@ -333,9 +339,15 @@ if __name__ == "__main__":
         '-p',
         '--port',
         type = str,
-        help = 'The USB-ISS port',
+        help = 'The USB-ISS port, required unless --broker is used',
         dest = 'port',
-        required = True,
+    )
+    parser.add_argument(
+        '-b',
+        '--broker',
+        type = str,
+        help = 'Go through the I2C broker listening on this socket instead of opening the USB-ISS directly, the measurements then run with monitoring priority',
+        dest = 'broker',
     )
     parser.add_argument(
         '-a',
@@ -368,6 +380,9 @@ if __name__ == "__main__":
 
     args = parser.parse_args()
 
+    if args.port is None and args.broker is None:
+        parser.error("one of --port or --broker is required")
+
     device_meas = ADCMeasurements(
                                     outdir = Path(args.output_directory),
                                     interval = args.measurement_interval,
@@ -375,6 +390,7 @@ if __name__ == "__main__":
                                     vref = 1.024,
                                     i2c_address = args.i2c_address,
                                     internal_vref = args.internal_vref,
+                                    broker_socket = args.broker,
                                   )
     
     device_meas.add_temperature()
@@ -393,9 +393,11 @@ def run_ws(
     # Disable reading data from WS:
     ws_decoded_register_write("rd_en_I2C", "0")
 
-    output = f"rawdataWS_{chip_name}_" + datetime.datetime.now().strftime("%Y-%m-%d_%H-%M") + ".csv"
-    outfile = base_dir / output
-    df.to_csv(outfile)
+    # The raw samples are appended to the capture store of the chip, the dataframe can be rebuilt with store.get_dataframe(capture, coeff)
+    from i2c_gui.chips.waveform_sampler_store import Waveform_Sampler_Store
+    store = Waveform_Sampler_Store(base_dir / f"rawdataWS_{chip_name}")
+    capture = store.append([row["Data"] for row in base_data], chip_name=chip_name, config_hash=chip.get_config_hash())
+    print(f"Saved WS capture {capture} to {store.path}")
 
     df['Aout'] = -(df['Dout']-(31.5-coeff*31.5)*1.2)/32
 